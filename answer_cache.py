@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import itertools
+from collections import OrderedDict
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("RICHBOT_ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("RICHBOT_ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("RICHBOT_ANSWER_CACHE_MAX_ENTRIES", "512"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def history_digest(history, summary=""):
+    # History kosong -> digest kosong. Kalau ada, jawaban cuma boleh dipakai ulang
+    # kalau window history-nya (plus ringkasan percakapan yang ikut masuk prompt) persis sama.
+    if not history and not summary:
+        return ""
+    payload = json.dumps([[turn["user"], turn["bot"]] for turn in history or []], ensure_ascii=False)
+    if summary:
+        payload += "\0" + summary
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def sampling_params(llm, k, **retrieval_params):
+    # Jawaban cuma dipakai ulang untuk model, setting sampling & retrieval yang sama
+    return {
+        "model": getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "top_p": getattr(llm, "top_p", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "k": k,
+        **retrieval_params,
+    }
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+# --- 1. SEMANTIC ANSWER CACHE: (dokumen, parameter sampling, history + summary) + cosine similarity query ---
+class SemanticAnswerCache:
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # entry_id -> (scope, vector, answer, created_at); urutan = LRU
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _scope(self, doc_key, params, history, summary):
+        return (doc_key, tuple(sorted(params.items())), history_digest(history, summary))
+
+    def _expire(self, now):
+        expired = [entry_id for entry_id, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]
+        for entry_id in expired:
+            del self._entries[entry_id]
+
+    def lookup(self, doc_key, params, history, query_vector, summary=""):
+        scope = self._scope(doc_key, params, history, summary)
+        query_vector = _normalize(query_vector)
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire(now)
+            best_id, best_score = None, self.threshold
+            for entry_id, (entry_scope, vector, _, _) in self._entries.items():
+                if entry_scope != scope:
+                    continue
+                score = float(np.dot(vector, query_vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def store(self, doc_key, params, history, query_vector, answer, summary=""):
+        if not answer:
+            return
+        scope = self._scope(doc_key, params, history, summary)
+        with self._lock:
+            self._entries[next(self._ids)] = (scope, _normalize(query_vector), answer, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+def get_answer_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+        return _cache
@@ -0,0 +1,57 @@
+import json
+import requests
+
+REQUEST_TIMEOUT = (5, 120)  # (connect, read) detik
+
+# --- Client sync untuk api_server.py (dipakai Streamlit kalau RICHBOT_API_URL di-set) ---
+def upload_document(base_url, doc_bytes, wait=True):
+    # wait=False -> langsung balik {"job_id", "state", ...}; status & hasilnya di-poll lewat get_job
+    response = requests.post(
+        f"{base_url}/documents",
+        params=None if wait else {"wait": "0"},
+        data=doc_bytes,
+        headers={"Content-Type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
+
+def get_job(base_url, job_id):
+    response = requests.get(f"{base_url}/jobs/{job_id}", timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def cancel_job(base_url, job_id):
+    response = requests.delete(f"{base_url}/jobs/{job_id}", timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def create_conversation(base_url, document_id=None):
+    response = requests.post(f"{base_url}/conversations", json={"document_id": document_id}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["conversation_id"]
+
+def stream_turn(base_url, conversation_id, question, **params):
+    response = requests.post(
+        f"{base_url}/conversations/{conversation_id}/stream",
+        json={"question": question, **params},
+        stream=True,
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+
+    event = "message"
+    with response:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                event = "message"
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                payload = json.loads(line[len("data:"):].strip())
+                if event == "error":
+                    raise RuntimeError(payload.get("error", "Unknown API error"))
+                if event == "done":
+                    return
+                yield payload["content"]
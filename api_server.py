@@ -0,0 +1,314 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import functools
+from collections import OrderedDict
+from aiohttp import web
+from chatbot_logic import (
+    DOC_PATH, EMBEDDING_MODEL, PRIMARY_LLM_MODEL, VECTOR_SEARCH_TOP_K, CHUNK_PATTERN,
+    load_api_key, create_logical_chunks, create_embeddings, prepare_turn, coalesce_turn, finish_turn,
+)
+from backends import embedding_model_id
+from conversation_memory import SUMMARY_MAX_TOKENS, SUMMARY_TEMPERATURE, ConversationMemory
+from docx_stream import DOCX_PARSER, iter_lines
+from hierarchy import SUB_CHUNKING
+from index_registry import get_index_registry
+from index_store import compute_index_key, load_or_build_index
+from ingestion_queue import IngestionQueueFull, get_ingestion_queue
+from llm_gateway import get_llm, get_llm_gateway
+from shared_corpus import CORPUS_KEY_PREFIX, open_corpus
+from tracing import observe, render_prometheus
+
+API_HOST = os.getenv("RICHBOT_API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("RICHBOT_API_PORT", "8080"))
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_CONVERSATIONS = 10000
+MAX_K = 20
+DOCUMENT_ID_PATTERN = re.compile(r"[0-9a-f]{64}")  # document_id = index key (sha256), juga dipakai sebagai path di disk
+
+# --- 1. SERVICE STATE: Dokumen, LLM client & percakapan disimpan di server ---
+class ChatService:
+    def __init__(self):
+        self.embeddings = create_embeddings()
+        self.documents = get_index_registry()  # document_id (index key) -> vector store, di-evict kalau memory penuh
+        self.conversations = OrderedDict()  # conversation_id -> state, urutan = LRU
+        self.default_document_id = None
+        # Opsional: corpus bersama (RICHBOT_CORPUS_DIR), profil dipilih per percakapan lewat profile_id
+        self.corpus = open_corpus(self.embeddings, embedding_model_id(EMBEDDING_MODEL))
+
+    def _load_vector_store(self, index_key, doc_bytes=None, job=None):
+        def build_chunks():
+            if doc_bytes is None:
+                # Index udah di-evict & disk cache-nya hilang: dokumennya harus di-upload ulang
+                raise LookupError("Document not found. Upload it first via POST /documents.")
+            lines = iter_lines(doc_bytes)
+            if job is not None:
+                # Parse dijalanin penuh dulu biar progress parse / chunk kebaca terpisah
+                job.set_stage("parse")
+                lines = list(lines)
+                job.set_stage("chunk")
+            return create_logical_chunks(lines)
+
+        vector_store, _ = load_or_build_index(index_key, self.embeddings, build_chunks, job=job)
+        return vector_store
+
+    def ingest(self, doc_bytes, job=None):
+        # Sync + CPU-bound (parse, embedding) -> dijalanin worker ingestion queue (atau executor pas startup)
+        index_key = compute_index_key(doc_bytes, embedding_model_id(EMBEDDING_MODEL), f"{CHUNK_PATTERN}|{SUB_CHUNKING}|{DOCX_PARSER}")
+        vector_store = self.documents.get(index_key, lambda: self._load_vector_store(index_key, doc_bytes, job))
+        return index_key, vector_store.index.ntotal
+
+    def submit_ingest(self, doc_bytes):
+        # Upload masuk antrian (worker terbatas, dokumen kecil duluan); document_id baru ada setelah index siap
+        def work(job):
+            document_id, chunks = self.ingest(doc_bytes, job)
+            return {"document_id": document_id, "chunks": chunks}
+
+        return get_ingestion_queue().submit(work, size=len(doc_bytes))
+
+    def resolve_document(self, document_id, conversation_id=None):
+        # Sync: kalau index-nya udah di-evict, di-load ulang dari disk cache. Return (index_key, vector_store)
+        if document_id.startswith(CORPUS_KEY_PREFIX):
+            # Profil corpus bersama: cuma view teks + filter, vector-nya tetap di index corpus.
+            # Key ikut doc_hash: profil yang di-ingest ulang dapat view (& answer cache) baru, yang lama keluar lewat LRU
+            profile_id = document_id[len(CORPUS_KEY_PREFIX):]
+            index_key = f"{document_id}@{self.corpus.profile_hash(profile_id)}"
+            loader = lambda: self.corpus.profile_store(profile_id)
+        else:
+            index_key = document_id
+            loader = lambda: self._load_vector_store(document_id)
+        return index_key, self.documents.get(index_key, loader, session_id=conversation_id)
+
+    def get_vector_store(self, document_id, conversation_id=None):
+        return self.resolve_document(document_id, conversation_id)[1]
+
+    def get_llm(self, temperature=0.7, top_p=0.7, max_tokens=256):
+        # Client di-pool di gateway per (model, sampling); deadline, retry & concurrency limit juga di sana
+        return get_llm(PRIMARY_LLM_MODEL, temperature=float(temperature), top_p=float(top_p), max_tokens=int(max_tokens))
+
+    def create_conversation(self, document_id):
+        conversation_id = uuid.uuid4().hex
+        self.conversations[conversation_id] = {
+            "id": conversation_id,
+            "document_id": document_id,
+            "memory": ConversationMemory(),
+            "lock": asyncio.Lock(),
+        }
+        while len(self.conversations) > MAX_CONVERSATIONS:
+            evicted_id, _ = self.conversations.popitem(last=False)
+            self.documents.release(evicted_id)
+        return conversation_id
+
+    def get_conversation(self, conversation_id):
+        conversation = self.conversations.get(conversation_id)
+        if conversation is not None:
+            self.conversations.move_to_end(conversation_id)
+        return conversation
+
+    async def stream_turn(self, conversation, question, params, retrieval_options=None):
+        retrieval_options = retrieval_options or {}
+        # Satu turn per percakapan dalam satu waktu, tapi percakapan lain tetap jalan paralel
+        async with conversation["lock"]:
+            llm = self.get_llm(**params)
+            memory = conversation["memory"]
+
+            loop = asyncio.get_running_loop()
+            index_key, vector_store = await loop.run_in_executor(
+                None, self.resolve_document, conversation["document_id"], conversation["id"]
+            )
+            turn = await loop.run_in_executor(
+                None, functools.partial(
+                    prepare_turn, vector_store, index_key, llm, question, memory.recent_turns(),
+                    summary=memory.summary, **retrieval_options,
+                )
+            )
+
+            if turn["answer"] is not None:
+                answer = turn["answer"]
+                yield answer
+            else:
+                answer = ""
+                first_token = True
+                started = time.perf_counter()
+                # Turn identik dari percakapan lain yang lagi jalan share satu generation upstream
+                async for chunk in coalesce_turn(turn, llm).astream(turn["prompt"]):
+                    if first_token:
+                        first_token = False
+                        observe("llm.ttft", (time.perf_counter() - started) * 1000)
+                    answer += chunk.content
+                    yield chunk.content
+                observe("llm.generate", (time.perf_counter() - started) * 1000)
+                answer = answer.strip()
+                finish_turn(turn, answer)
+
+            memory.add_turn(question, answer)
+            # Rolling summary jalan di thread sendiri setelah jawaban terkirim
+            memory.summarize_async(self.get_llm(
+                temperature=SUMMARY_TEMPERATURE, top_p=0.7, max_tokens=SUMMARY_MAX_TOKENS
+            ))
+
+# --- 2. HTTP HANDLERS ---
+def _service(request):
+    return request.app["service"]
+
+async def _read_turn_request(request):
+    conversation = _service(request).get_conversation(request.match_info["conversation_id"])
+    if conversation is None:
+        raise web.HTTPNotFound(text="Conversation not found.")
+
+    body = await request.json()
+    question = (body.get("question") or "").strip()
+    if not question:
+        raise web.HTTPBadRequest(text="'question' is required.")
+
+    params = {key: body[key] for key in ("temperature", "top_p", "max_tokens") if key in body}
+
+    # Opsi retrieval per request; index-nya sendiri di-share semua percakapan
+    retrieval_options = {}
+    try:
+        if body.get("k") is not None:
+            retrieval_options["k"] = int(body["k"])
+        if body.get("score_threshold") is not None:
+            retrieval_options["score_threshold"] = float(body["score_threshold"])
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text="'k' must be an integer and 'score_threshold' a number.")
+    if not 1 <= retrieval_options.get("k", VECTOR_SEARCH_TOP_K) <= MAX_K:
+        raise web.HTTPBadRequest(text=f"'k' must be between 1 and {MAX_K}.")
+    return conversation, question, params, retrieval_options
+
+async def health(request):
+    service = _service(request)
+    stats = service.documents.stats()
+    stats["llm"] = get_llm_gateway().stats()
+    stats["ingest"] = get_ingestion_queue().stats()
+    if service.corpus is not None:
+        stats["corpus_chunks"] = service.corpus.index.ntotal if service.corpus.is_trained else 0
+    return web.json_response({"status": "ok", **stats})
+
+async def metrics(request):
+    return web.Response(text=render_prometheus(), content_type="text/plain")
+
+async def upload_document(request):
+    doc_bytes = await request.read()
+    if not doc_bytes:
+        raise web.HTTPBadRequest(text="Empty document.")
+
+    try:
+        job = _service(request).submit_ingest(doc_bytes)
+    except IngestionQueueFull as e:
+        raise web.HTTPServiceUnavailable(text=str(e), headers={"Retry-After": "5"})
+
+    if request.query.get("wait", "1").lower() in ("0", "false"):
+        # Async: client poll GET /jobs/{job_id} (stage & progress), cancel lewat DELETE
+        return web.json_response(job.to_dict(), status=202)
+
+    try:
+        await job.wait_async()
+    except asyncio.CancelledError:
+        # Client disconnect sebelum selesai -> job-nya gak usah diterusin
+        job.cancel()
+        raise
+    if job.state == "failed":
+        raise web.HTTPUnprocessableEntity(text=f"Error processing document: {str(job.error)}")
+    if job.state == "cancelled":
+        raise web.HTTPConflict(text="Document processing was cancelled.")
+    return web.json_response(job.result)
+
+def _job(request):
+    job = get_ingestion_queue().get(request.match_info["job_id"])
+    if job is None:
+        raise web.HTTPNotFound(text="Job not found.")
+    return job
+
+async def get_job(request):
+    return web.json_response(_job(request).to_dict())
+
+async def cancel_job(request):
+    job = _job(request)
+    job.cancel()
+    return web.json_response(job.to_dict())
+
+async def create_conversation(request):
+    service = _service(request)
+    text = await request.text()
+    body = json.loads(text) if text.strip() else {}
+    if body.get("profile_id"):
+        profile_id = str(body["profile_id"])
+        if service.corpus is None:
+            raise web.HTTPBadRequest(text="Shared corpus is not enabled (set RICHBOT_CORPUS_DIR).")
+        if not service.corpus.has_profile(profile_id):
+            raise web.HTTPNotFound(text="Profile not found in corpus.")
+        document_id = f"{CORPUS_KEY_PREFIX}{profile_id}"
+    else:
+        document_id = body.get("document_id") or service.default_document_id
+        if not document_id or not DOCUMENT_ID_PATTERN.fullmatch(document_id):
+            raise web.HTTPNotFound(text="Document not found. Upload it first via POST /documents.")
+
+    conversation_id = service.create_conversation(document_id)
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, service.get_vector_store, document_id, conversation_id)
+    except LookupError as e:
+        service.conversations.pop(conversation_id, None)
+        raise web.HTTPNotFound(text=str(e))
+    return web.json_response({"conversation_id": conversation_id, "document_id": document_id})
+
+async def chat_turn(request):
+    conversation, question, params, retrieval_options = await _read_turn_request(request)
+    answer = ""
+    async for token in _service(request).stream_turn(conversation, question, params, retrieval_options):
+        answer += token
+    return web.json_response({"answer": answer.strip()})
+
+async def chat_stream(request):
+    conversation, question, params, retrieval_options = await _read_turn_request(request)
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await response.prepare(request)
+
+    answer = ""
+    try:
+        async for token in _service(request).stream_turn(conversation, question, params, retrieval_options):
+            answer += token
+            await response.write(f"data: {json.dumps({'content': token}, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await response.write(f"event: done\ndata: {json.dumps({'answer': answer.strip()}, ensure_ascii=False)}\n\n".encode("utf-8"))
+    except ConnectionResetError:
+        # Client udah nutup koneksi
+        pass
+    except Exception as e:
+        await response.write(f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n".encode("utf-8"))
+    return response
+
+# --- 3. APP ---
+async def _load_default_document(app):
+    service = app["service"]
+    if os.path.exists(DOC_PATH):
+        with open(DOC_PATH, "rb") as f:
+            doc_bytes = f.read()
+        loop = asyncio.get_running_loop()
+        service.default_document_id, _ = await loop.run_in_executor(None, service.ingest, doc_bytes)
+
+def create_app():
+    load_api_key()
+    app = web.Application(client_max_size=MAX_UPLOAD_BYTES)
+    app["service"] = ChatService()
+    app.on_startup.append(_load_default_document)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_post("/documents", upload_document)
+    app.router.add_get("/jobs/{job_id}", get_job)
+    app.router.add_delete("/jobs/{job_id}", cancel_job)
+    app.router.add_post("/conversations", create_conversation)
+    app.router.add_post("/conversations/{conversation_id}/turns", chat_turn)
+    app.router.add_post("/conversations/{conversation_id}/stream", chat_stream)
+    return app
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=API_HOST, port=API_PORT)
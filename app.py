@@ -1,13 +1,21 @@
 import streamlit as st
 import os
+import io
 import re
-import docx
-from langchain_nvidia_ai_endpoints import ChatNVIDIA
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.prompts import PromptTemplate
-import tempfile
-import requests
+import uuid
+from backends import LLM_BACKEND, embedding_model_id
+from llm_gateway import get_llm, get_llm_gateway
+from index_store import compute_index_key, load_or_build_index
+from index_registry import get_index_registry
+from ingestion_queue import get_ingestion_queue
+from hierarchy import SUB_CHUNKING
+from docx_stream import DOCX_PARSER, iter_lines
+from embedding_service import get_embeddings
+from chatbot_logic import prepare_turn, coalesce_turn, finish_turn, start_preload
+from conversation_memory import MAX_DISPLAY_TURNS, ConversationMemory, create_summary_llm
+from tracing import span, start_trace, traced_stream, latency_snapshot, start_metrics_server
+import api_client
+from template_source import TemplateSource
 
 st.set_page_config(
     page_title="RichBot - AI Personal Assistant",
@@ -17,9 +25,14 @@ st.set_page_config(
 )
 
 DEFAULT_DOC_PATH = "resource/PersonalProfile_RAG_purpose.docx"
+TEMPLATE_PATH = "resource/Personal Profile - Template.docx"
 TEMPLATE_URL = "https://raw.githubusercontent.com/RichardDeanTan/Personal-Chatbot-With-RAG/main/resource/Personal%20Profile%20-%20Template.docx"
 EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
 PRIMARY_LLM_MODEL = "gotocompany/gemma-2-9b-cpt-sahabatai-instruct"
+API_URL = os.getenv("RICHBOT_API_URL")  # Kalau di-set, app jadi thin client ke api_server.py
+CHUNK_PATTERN = r'\n(?=\d+\.\s[A-Z])'
+INGEST_POLL_SECONDS = 1.0
+STAGE_LABELS = {"parse": "Parsing document", "chunk": "Chunking", "embed": "Embedding chunks", "index": "Saving index"}
 
 st.markdown("""
 <style>
@@ -90,8 +103,14 @@ st.markdown("""
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
-if 'retriever' not in st.session_state:
-    st.session_state.retriever = None
+if 'memory' not in st.session_state:
+    st.session_state.memory = ConversationMemory()
+
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+if 'doc_bytes' not in st.session_state:
+    st.session_state.doc_bytes = None
 
 if 'llm' not in st.session_state:
     st.session_state.llm = None
@@ -102,8 +121,28 @@ if 'document_processed' not in st.session_state:
 if 'current_doc_name' not in st.session_state:
     st.session_state.current_doc_name = "Default Richard's Profile"
 
+if 'index_key' not in st.session_state:
+    st.session_state.index_key = None
+
+if 'conversation_id' not in st.session_state:
+    st.session_state.conversation_id = None
+
+if 'last_trace' not in st.session_state:
+    st.session_state.last_trace = None
+
+if 'ingest_job' not in st.session_state:
+    st.session_state.ingest_job = None  # Dokumen yang lagi diproses di background: {"job_id", "doc_name", "doc_bytes"}
+
+if 'ingest_notice' not in st.session_state:
+    st.session_state.ingest_notice = None
+
+if 'default_document_requested' not in st.session_state:
+    st.session_state.default_document_requested = False
+
 @st.cache_resource
 def load_api_key():
+    if LLM_BACKEND != "nvidia":
+        return True
     try:
         nvidia_api_key = st.secrets["NVIDIA_API_KEY"]
         os.environ["NVIDIA_API_KEY"] = nvidia_api_key
@@ -112,45 +151,21 @@ def load_api_key():
         st.error(f"❌ Failed to load API key: {str(e)}")
         return False
 
+@span("document.parse")
 def load_document(file_path=None, uploaded_file=None):
     try:
-        if uploaded_file is not None:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            doc = docx.Document(tmp_file_path)
-            os.unlink(tmp_file_path) # Clean temp file
-        else:
-            # Handle file path
-            doc = docx.Document(file_path)
-        
-        full_text = []
-        
-        for para in doc.paragraphs:
-            # Check list items
-            if para._p.pPr and para._p.pPr.numPr:
-                indent_level = para._p.pPr.numPr.ilvl.val
-                indentation = '    ' * indent_level
-
-                if indent_level == 0:
-                    bullet = '•'
-                elif indent_level == 1:
-                    bullet = 'o'
-                else:
-                    bullet = '-'
-                
-                full_text.append(f"{indentation}{bullet} {para.text}")
-            else:
-                full_text.append(para.text)
-        
-        return '\n'.join(full_text)
+        # Upload dibaca langsung dari memory (tanpa temp file), tabel ikut ke-parse
+        source = uploaded_file if uploaded_file is not None else file_path
+        return '\n'.join(iter_lines(source))
     except Exception as e:
         raise Exception(f"Error loading document: {str(e)}")
 
+@span("document.chunk")
 def create_logical_chunks(text_content):
-    pattern = r'\n(?=\d+\.\s[A-Z])'
-    chunks = re.split(pattern, text_content)
+    if not isinstance(text_content, str):
+        text_content = '\n'.join(text_content)
+
+    chunks = re.split(CHUNK_PATTERN, text_content)
     
     cleaned_chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
     
@@ -160,90 +175,98 @@ def create_logical_chunks(text_content):
 
     return cleaned_chunks
 
-@st.cache_resource
-def create_vector_store(chunks):
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-    vector_store = FAISS.from_texts(texts=chunks, embedding=embeddings)
-    return vector_store.as_retriever(search_kwargs={'k': 5})
+def create_vector_store(index_key, doc_bytes, previous_store=None, job=None):
+    # previous_store = index dokumen sebelumnya di session ini, dipatch kalau dokumen barunya cuma beda sedikit
+    # job = job ingestion queue (progress per stage + cancel), None kalau di-load ulang setelah evict
+    def build_chunks():
+        if job is not None:
+            job.set_stage("parse")
+        document_text = load_document(uploaded_file=io.BytesIO(doc_bytes))
+        if job is not None:
+            job.set_stage("chunk")
+        return create_logical_chunks(document_text)
+
+    # Model embedding di-share satu proses, jadi upload dokumen baru gak load model lagi
+    vector_store, _ = load_or_build_index(index_key, get_embeddings(EMBEDDING_MODEL), build_chunks, previous_store, job)
+    return vector_store
+
+def get_vector_store():
+    # Index di-share antar session lewat registry (refcount + LRU + batas memory).
+    # Kalau udah di-evict, di-load ulang dari disk cache / dokumen session ini.
+    index_key, doc_bytes = st.session_state.index_key, st.session_state.doc_bytes
+    if API_URL or not index_key or doc_bytes is None:
+        return None
+    return get_index_registry().get(
+        index_key, lambda: create_vector_store(index_key, doc_bytes), session_id=st.session_state.session_id
+    )
 
 def create_llm(temperature=0.7, top_p=0.7, max_tokens=256):
-    return ChatNVIDIA(
-        model=PRIMARY_LLM_MODEL,
-        temperature=temperature,
-        top_p=top_p,
-        max_tokens=max_tokens,
-    )
+    # Handle murah: client HTTP, koneksi & batas concurrency di-share satu proses lewat gateway
+    return get_llm(PRIMARY_LLM_MODEL, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
 
-def create_prompt_template():
-    template = """
-Anda adalah 'RichBot', sebuah asisten AI dengan kepribadian yang santai, ramah, dan informatif. Anggap diri Anda seperti seorang teman yang sedang bersemangat menceritakan profil Richard Dean Tanjaya kepada pengguna.
-
-**--- GAYA BAHASA & PERSONALITAS ---**
-1.  **Santai & Tidak Kaku:** Gunakan bahasa sehari-hari yang sopan. Hindari jawaban yang terlalu formal atau terdengar seperti skrip. Boleh menggunakan kata-kata seperti "nih", "lho", "sih", "keren, kan?", atau "hehe" jika konteksnya pas.
-2.  **Variasi Awalan Kalimat:** JANGAN selalu memulai jawaban dengan "Tentu!". Coba variasikan dengan "Oh, kalau soal itu...", "Oke, jadi gini...", "Siap! Untuk...", "Wah, pertanyaan bagus!", atau langsung ke poin utama.
-3.  **Proaktif & Membantu:** Jika pengguna tampak bingung atau bertanya secara umum, bantu arahkan percakapan dengan menawarkan beberapa topik menarik.
-
-**--- ATURAN UTAMA (SANGAT PENTING) ---**
-1. **SELALU PERIKSA CONTEXT TERLEBIH DAHULU:** Sebelum menjawab apapun, WAJIB baca dan analisis CONTEXT yang diberikan.
-2. **JANGAN PERNAH MENGARANG:** Hanya gunakan informasi yang ADA di CONTEXT. Jika tidak ada, katakan dengan jelas.
-3. **KOREKSI INFORMASI YANG SALAH:** Jika pengguna menyatakan sesuatu yang BERTENTANGAN dengan CONTEXT, WAJIB koreksi dengan tegas tapi ramah.
-4. **BAHASA INDONESIA 100%:** Selalu balas dalam Bahasa Indonesia, apapun bahasa pertanyaan pengguna.
-5. **JANGAN SEBUT KATA "CONTEXT":** Jika informasi tidak tersedia, gunakan frasa seperti "di informasi yang aku punya", "dari yang aku tau", "berdasarkan profil Richard", atau "di data yang tersedia".
-
-**ATURAN PALING PENTING: KOREKSI PENGGUNA JIKA SALAH**
-Jika pertanyaan atau pernyataan pengguna SALAH atau BERTENTANGAN dengan `CONTEXT`, tugas utama Anda adalah MENGOREKSI mereka dengan ramah dan tegas. Jangan pernah setuju dengan informasi yang salah.
-
-**--- SKENARIO & CONTOH WAJIB ---**
-
-**Skenario 1: Pertanyaan Topik Baru tentang Richard**
--   *User Question:* "apa saja proyeknya?"
--   *Jawaban Ideal Anda:* "Oh, soal proyek ya? Ada beberapa yang keren nih di portofolionya, seperti Personal AI Chatbot, Prediksi Obesitas, dan Analisis Sentimen Saham. Mau aku ceritain lebih dalam soal salah satunya?"
-
-**Skenario 2: Pertanyaan Meta ("Kamu bisa apa?")**
--   *User Question:* "kamu bisa kasi tau aku apa aja?"
--   *Jawaban Ideal Anda:* "Aku bisa ceritain banyak hal tentang Richard. Mulai dari Informasi Pribadi, Pendidikan, Keterampilan (Skills), Pengalaman kerja, Proyek-proyeknya, sampai Sertifikasi yang dia punya. Kita mulai dari mana enaknya?"
-
-**Skenario 3: Pertanyaan Navigasi ("Bahas apa lagi?")**
--   *User Question:* "next kita mau bahas apa?" atau "apalagi yang menarik?"
--   *Jawaban Ideal Anda:* "Masih banyak lho yang bisa kita bahas! Ada topik soal Pengalaman kerja, Latar Belakang Pendidikan, atau Keterampilan teknisnya. Kamu tertarik sama yang mana?"
-
-**Skenario 4: Pertanyaan Follow-up untuk Detail**
--   *Chat History:*
-    RichBot: "...Mau aku ceritain lebih dalam soal salah satunya?"
--   *New User Question:* "jelaskan yang chatbot"
--   *Jawaban Ideal Anda:* "Oke, jadi gini. Proyek Personal AI Chatbot itu intinya dia bikin chatbot pribadi pakai teknologi AI dan RAG. Tujuannya supaya chatbotnya bisa ngasih jawaban yang pas berdasarkan data pribadinya dia. Keren, kan?" *(Setelah ini, berhenti dan tunggu respons pengguna).*
-
-**Skenario 5: Menangani Respon Singkat/Pujian ("menarik", "hmm")**
--   *New User Question:* "menarik" atau "hmm oke"
--   *Jawaban Ideal Anda:* "Asiik, kalau kamu tertarik! Mau lanjut liat bagian lain dari profilnya, atau ada pertanyaan spesifik mungkin?"
-
-**Skenario 6: Jawaban TIDAK ADA di Konteks**
--   *User Question:* "Dia bisa main musik gak?"
--   *Jawaban Ideal Anda:* "Wah, kalau soal kemampuan main musik, sepertinya belum ada infonya nih di profilnya. Mungkin bisa jadi hobi baru, hehe."
-
----
-**CONTEXT:**
-{context}
-
-**CHAT HISTORY (percakapan terakhir):**
-{chat_history}
-
-**User Question:** {question}
-**Jawaban Anda (dalam Bahasa Indonesia yang santai):**
-"""
-    return PromptTemplate(
-        template=template,
-        input_variables=["context", "chat_history", "question"]
-    )
+@st.cache_resource
+def start_background_preload():
+    # Sekali per proses: import modul berat, load model + embed pertanyaan umum di background,
+    # jadi halaman & greeting udah tampil sebelum model selesai di-load
+    if not API_URL:
+        start_preload()
+    return True
 
-def format_chat_history(history):
-    if not history:
-        return "No conversation yet."
-    return "\n".join([f"User: {turn['user']}\nRichBot: {turn['bot']}" for turn in history[-1:]])  # Only last turn
+@st.cache_resource
+def get_summary_llm():
+    # Summarizer pakai parameter tetap (temperature rendah, output pendek), di-share semua session
+    return create_summary_llm(PRIMARY_LLM_MODEL)
 
-def display_chat_message(message, is_user=False):
+@st.cache_resource
+def get_template_source():
+    # Satu per proses: isi template & ETag-nya di-share semua session
+    return TemplateSource(TEMPLATE_URL, TEMPLATE_PATH)
+
+@st.cache_resource
+def start_metrics_endpoint():
+    # Prometheus /metrics cuma nyala kalau RICHBOT_METRICS_PORT di-set
+    return start_metrics_server()
+
+def render_debug_panel():
+    st.header("🐞 Latency Debug")
+    if st.session_state.last_trace:
+        st.caption("Span tree turn terakhir (ms)")
+        st.json(st.session_state.last_trace, expanded=False)
+
+    snapshot = latency_snapshot()
+    if snapshot:
+        st.caption("Rolling percentiles per stage (ms)")
+        st.table([
+            {
+                "stage": name,
+                "count": stats["count"],
+                "p50": round(stats.get("p50", 0), 1),
+                "p95": round(stats.get("p95", 0), 1),
+                "p99": round(stats.get("p99", 0), 1),
+            }
+            for name, stats in snapshot.items()
+        ])
+    else:
+        st.caption("Belum ada data latency.")
+
+    if not API_URL:
+        stats = get_embeddings(EMBEDDING_MODEL).query_cache_stats()
+        st.caption(f"Query embedding cache: {stats['hits']} hit / {stats['misses']} miss ({stats['size']} entries)")
+        registry = get_index_registry().stats()
+        st.caption(
+            f"Index registry: {registry['indexes']} index ({registry['bytes'] / 1024 / 1024:.1f} MB), "
+            f"{registry['sessions']} session, {registry['evictions']} evicted"
+        )
+        gateway = get_llm_gateway().stats()
+        st.caption(f"LLM gateway: {gateway['in_flight']}/{gateway['max_concurrency']} in flight, {gateway['queued']} queued")
+        ingest = get_ingestion_queue().stats()
+        st.caption(f"Ingestion queue: {ingest['running']}/{ingest['workers']} running, {ingest['queued']} queued")
+
+def display_chat_message(message, is_user=False, container=None):
+    # container = st.empty() placeholder kalo pesannya mau di-update (streaming)
+    container = container or st
     if is_user:
-        st.markdown(f"""
+        container.markdown(f"""
         <div class="user-message-container">
             <div class="custom-chat-message custom-chat-user">
                 👤 <strong>You:</strong><br>{message}
@@ -251,7 +274,7 @@ def display_chat_message(message, is_user=False):
         </div>
         """, unsafe_allow_html=True)
     else:
-        st.markdown(f"""
+        container.markdown(f"""
         <div class="bot-message-container">
             <div class="custom-chat-message custom-chat-bot">
                 👾 <strong>RichBot:</strong><br>{message}
@@ -259,29 +282,136 @@ def display_chat_message(message, is_user=False):
         </div>
         """, unsafe_allow_html=True)
 
-def process_document(uploaded_file=None):
+def stream_to_bubble(tokens, container):
+    full_response = ""
+    for token in tokens:
+        full_response += token
+        display_chat_message(full_response + "▌", is_user=False, container=container)
+    return full_response.strip()
+
+def read_document(uploaded_file=None):
+    if uploaded_file:
+        return uploaded_file.getvalue(), uploaded_file.name
+    with open(DEFAULT_DOC_PATH, "rb") as f:
+        return f.read(), "Default Richard's Profile"
+
+def apply_document(document_id, doc_name, doc_bytes=None):
+    # Swap atomik: state dokumen session diganti sekaligus setelah index baru siap, sebelumnya chat tetap pakai index lama
+    conversation_id = api_client.create_conversation(API_URL, document_id) if API_URL else None
+    st.session_state.index_key = document_id
+    st.session_state.doc_bytes = doc_bytes
+    st.session_state.conversation_id = conversation_id
+    st.session_state.current_doc_name = doc_name
+    st.session_state.document_processed = True
+
+def ready_notice(doc_name, chunks):
+    return {
+        "kind": "success",
+        "text": f"✅ Document '{doc_name}' processed! Created {chunks} chunks.",
+        "balloons": doc_name != "Default Richard's Profile",
+    }
+
+def start_ingest(uploaded_file=None):
+    # Parse, chunk & embedding jalan di worker ingestion queue, bukan di script run session ini
     try:
-        with st.spinner("🔄 Processing document..."):
-            if uploaded_file:
-                document_text = load_document(uploaded_file=uploaded_file)
-                st.session_state.current_doc_name = uploaded_file.name
-            else:
-                document_text = load_document(DEFAULT_DOC_PATH)
-                st.session_state.current_doc_name = "Default Richard's Profile"
-            
-            logical_chunks = create_logical_chunks(document_text)
-            st.session_state.retriever = create_vector_store(logical_chunks)
-            st.session_state.document_processed = True
-            
-            return len(logical_chunks)
+        doc_bytes, doc_name = read_document(uploaded_file)
+
+        if API_URL:
+            # Index & percakapan disimpan di API server, progress di-poll lewat /jobs/{id}
+            job = api_client.upload_document(API_URL, doc_bytes, wait=False)
+            st.session_state.ingest_job = {"job_id": job["job_id"], "doc_name": doc_name}
+            return
+
+        # Dokumen yang sama (dan setting yang sama) -> index diambil dari disk, tanpa embedding ulang
+        index_key = compute_index_key(doc_bytes, embedding_model_id(EMBEDDING_MODEL), f"{CHUNK_PATTERN}|{SUB_CHUNKING}|{DOCX_PARSER}")
+        registry = get_index_registry()
+        cached = registry.peek(index_key)
+        if cached is not None:
+            # Udah ada di memory (session lain / upload sebelumnya): langsung dipakai, gak perlu antri
+            apply_document(index_key, doc_name, doc_bytes)
+            st.session_state.ingest_notice = ready_notice(doc_name, cached.index.ntotal)
+            return
+
+        previous = registry.peek(st.session_state.index_key) if st.session_state.index_key else None
+
+        def work(job):
+            vector_store = registry.get(index_key, lambda: create_vector_store(index_key, doc_bytes, previous, job))
+            return {"document_id": index_key, "chunks": vector_store.index.ntotal}
+
+        job = get_ingestion_queue().submit(work, size=len(doc_bytes), name=doc_name)
+        st.session_state.ingest_job = {"job_id": job.id, "doc_name": doc_name, "doc_bytes": doc_bytes}
     except Exception as e:
-        st.error(f"❌ Error processing document: {str(e)}")
-        return None
+        st.session_state.ingest_notice = {"kind": "error", "text": f"❌ Error processing document: {str(e)}"}
+
+def ingest_status(pending):
+    if API_URL:
+        return api_client.get_job(API_URL, pending["job_id"])
+    job = get_ingestion_queue().get(pending["job_id"])
+    return job.to_dict() if job is not None else {"state": "failed", "error": "Job not found."}
+
+def cancel_ingest(pending):
+    if API_URL:
+        api_client.cancel_job(API_URL, pending["job_id"])
+    else:
+        get_ingestion_queue().cancel(pending["job_id"])
+
+def finish_ingest(pending, status):
+    st.session_state.ingest_job = None
+    doc_name = pending["doc_name"]
+    if status["state"] == "cancelled":
+        st.session_state.ingest_notice = {"kind": "info", "text": f"Processing of '{doc_name}' cancelled."}
+        return
+    try:
+        if status["state"] != "done":
+            raise RuntimeError(status.get("error", "Unknown error"))
+        apply_document(status["result"]["document_id"], doc_name, pending.get("doc_bytes"))
+    except Exception as e:
+        st.session_state.ingest_notice = {"kind": "error", "text": f"❌ Error processing document: {str(e)}"}
+        return
+    st.session_state.ingest_notice = ready_notice(doc_name, status["result"]["chunks"])
+
+@st.fragment(run_every=INGEST_POLL_SECONDS)
+def render_ingest_progress():
+    # Cuma fragment ini yang rerun tiap poll; chat tetap bisa dipakai (pakai index lama) selama dokumen diproses
+    pending = st.session_state.ingest_job
+    if pending is None:
+        return
+    try:
+        status = ingest_status(pending)
+    except Exception as e:
+        status = {"state": "failed", "error": str(e)}
+
+    if status["state"] in ("queued", "running"):
+        label = STAGE_LABELS.get(status["stage"], "Waiting in queue")
+        st.progress(status["progress"], text=f"🔄 {pending['doc_name']}: {label}...")
+        if st.button("✖️ Cancel Processing", key="cancel_ingest"):
+            cancel_ingest(pending)
+        return
+
+    finish_ingest(pending, status)
+    st.rerun()
+
+def render_ingest_notice():
+    notice = st.session_state.ingest_notice
+    if notice is None:
+        return
+    st.session_state.ingest_notice = None
+    getattr(st, notice["kind"])(notice["text"])
+    if notice.get("balloons"):
+        st.balloons()
 
 def refresh_chat():
     st.session_state.chat_history = []
+    st.session_state.memory.clear()
+    if API_URL and st.session_state.index_key:
+        st.session_state.conversation_id = api_client.create_conversation(API_URL, st.session_state.index_key)
     st.rerun()
 
+# Dokumen default diproses di background pas session baru; greeting & UI langsung tampil
+if not st.session_state.document_processed and st.session_state.ingest_job is None and not st.session_state.default_document_requested:
+    st.session_state.default_document_requested = True
+    start_ingest()
+
 # === SIDEBAR ===
 with st.sidebar:
     if st.button("🔄 Start a New Chat", key="refresh_chat", help="Start a new conversation"):
@@ -307,7 +437,7 @@ with st.sidebar:
     - 🔍 **RAG**  
     Menggunakan **FAISS** sebagai vector store untuk mencari potongan dokumen yang relevan berdasarkan pertanyaan pengguna.
     - 🧠 **Session-based Memory**  
-    Menyimpan riwayat percakapan secara manual menggunakan `st.session_state` (hanya **1 interaksi** terakhir yang digunakan sebagai konteks).
+    Percakapan terbaru dipakai utuh sebagai konteks (dibatasi jumlah token), percakapan yang lebih lama diringkas otomatis di background.
     """)
 
     
@@ -321,19 +451,19 @@ with st.sidebar:
         "Gunakan penomoran pada setiap bagian (1., 2., 3., dst.) dengan judul yang jelas."
     )
 
-    try:
-        response = requests.get(TEMPLATE_URL)
-        if response.status_code == 200:
-            st.download_button(
-                label="📥 Download Template",
-                data=response.content,
-                file_name="Document_Template.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            )
-        else:
-            st.error("❌ Failed to fetch template from GitHub.")
-    except FileNotFoundError:
-        st.error("Template file not found.")
+    template_source = get_template_source()
+    template_bytes = template_source.get()
+    if template_bytes:
+        st.download_button(
+            label="📥 Download Template",
+            data=template_bytes,
+            file_name="Document_Template.docx",
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        )
+    elif template_source.last_error:
+        st.error("❌ Failed to fetch template from GitHub.")
+    else:
+        st.caption("⏳ Template sedang disiapkan...")
     
     uploaded_file = st.file_uploader(
         "Upload your own profile document",
@@ -344,23 +474,23 @@ with st.sidebar:
     # Menentukan file new, unprocessed file has been uploaded
     is_new_file_uploaded = (uploaded_file is not None) and (uploaded_file.name != st.session_state.current_doc_name)
 
-    if is_new_file_uploaded:
+    if st.session_state.ingest_job is not None:
+        # Lagi diproses di background: progress per stage + cancel
+        render_ingest_progress()
+    elif is_new_file_uploaded:
         if st.button("🔄 Process New Document"):
-            chunks_count = process_document(uploaded_file=uploaded_file)
-            if chunks_count:
-                st.success(f"✅ Document '{uploaded_file.name}' processed! Created {chunks_count} chunks.")
-                st.balloons()
-                st.rerun()
+            start_ingest(uploaded_file=uploaded_file)
+            st.rerun()
     else:
         # No new file is pending
         if st.button("📖 Load Default Document"):
             if st.session_state.current_doc_name == "Default Richard's Profile":
                 st.info("Default document is already loaded.")
             else:
-                chunks_count = process_document()
-                if chunks_count:
-                    st.success(f"✅ Default document reloaded! Created {chunks_count} chunks.")
-                    st.rerun()
+                start_ingest()
+                st.rerun()
+
+    render_ingest_notice()
 
     st.markdown("---")
     
@@ -401,6 +531,38 @@ with st.sidebar:
         help="Jumlah potongan dokumen relevan yang akan diambil."
     )
 
+    score_threshold = st.slider(
+        "Minimum Relevance Score",
+        min_value=0.0,
+        max_value=1.0,
+        value=0.0,
+        step=0.05,
+        help="Potongan dokumen dengan skor relevansi di bawah nilai ini tidak dipakai (0 = tanpa filter)."
+    )
+
+    context_token_budget = st.slider(
+        "Context Token Budget",
+        min_value=256,
+        max_value=2048,
+        value=1024,
+        step=128,
+        help="Batas maksimal token dokumen yang dimasukkan ke prompt. Chunk berikutnya tidak dipakai kalau budget sudah habis."
+    )
+
+    trim_sentences = st.checkbox(
+        "Trim Chunks to Relevant Sentences",
+        value=False,
+        help="Hanya ambil kalimat yang paling relevan dengan pertanyaan dari setiap chunk."
+    )
+
+    st.markdown("---")
+
+    show_debug_panel = st.checkbox(
+        "🐞 Show Latency Debug Panel",
+        value=False,
+        help="Tampilkan durasi tiap stage RAG (retrieval, prompt, TTFT, generation) untuk turn terakhir."
+    )
+
 def main():
     # === MAIN INTERFACE ===
     st.title("👾 RichBot - Personal AI Assistant")
@@ -412,74 +574,89 @@ def main():
         st.error(f"❌ API Key Error: {e}")
         st.stop()
 
-    # Auto process default document
-    if not st.session_state.document_processed and not st.session_state.retriever:
-        with st.spinner("Loading default document..."):
-            chunks_count = process_document()
-            if chunks_count:
-                st.success(f"✅ Default document loaded with {chunks_count} chunks!")
-
-    # Inisialisasi LLM + Default Parameter
-    if st.session_state.retriever:
-        st.session_state.llm = create_llm(temperature, top_p, max_tokens)    
-        st.session_state.retriever.search_kwargs['k'] = vector_k
+    start_metrics_endpoint()
+    start_background_preload()
 
     # Display chat history
     st.markdown('<div class="chat-container">', unsafe_allow_html=True)
 
-    if not st.session_state.chat_history and st.session_state.document_processed:
-        # Initial greeting
+    if not st.session_state.chat_history:
+        # Initial greeting: tampil duluan, dokumen default & model disiapin sambil user baca
         display_chat_message("Halo, perkenalkan namaku RichBot! Aku adalah AI Chatbot yang siap membantumu mengenal Richard. Silakan ajukan pertanyaanmu.", is_user=False)
 
+    # Inisialisasi LLM + Default Parameter
+    vector_store = get_vector_store()
+    if vector_store:
+        st.session_state.llm = create_llm(temperature, top_p, max_tokens)
+
     for message in st.session_state.chat_history:
         display_chat_message(message["user"], is_user=True)
         display_chat_message(message["bot"], is_user=False)
 
-    st.markdown('</div>', unsafe_allow_html=True)
-
     # Chat input
     if prompt := st.chat_input("Ketik pertanyaan Anda di sini..."):
-        if not st.session_state.retriever or not st.session_state.llm:
+        if not st.session_state.document_processed and st.session_state.ingest_job is not None:
+            st.warning("⏳ Document is still being processed, please wait a moment.")
+            st.stop()
+        if not st.session_state.document_processed or (not API_URL and not st.session_state.llm):
             st.error("❌ Please process a document first!")
             st.stop()
-        
-        # Add user message to history and display
-        st.session_state.chat_history.append({"user": prompt, "bot": ""})
-        st.rerun() # Rerun to display message user
-
-    if st.session_state.chat_history and st.session_state.chat_history[-1]["bot"] == "":
-        last_message = st.session_state.chat_history[-1]
-        prompt = last_message["user"]
-
-        # Generate Chatbot response
-        with st.spinner("RichBot is thinking..."):
-            try:
-                # RAG
-                retrieved_docs = st.session_state.retriever.invoke(prompt)
-                context_text = "\n\n---\n\n".join([doc.page_content for doc in retrieved_docs])
-                # Prompt
-                prompt_template = create_prompt_template()
-                # Memory
-                recent_history = st.session_state.chat_history[:-1]
-                
-                formatted_prompt = prompt_template.format(
-                    context=context_text,
-                    chat_history=format_chat_history(recent_history),
-                    question=prompt
+
+        display_chat_message(prompt, is_user=True)
+
+        # Placeholder bubble bot, di-update tiap chunk token yang masuk
+        bot_placeholder = st.empty()
+        display_chat_message("▌", is_user=False, container=bot_placeholder)
+
+        try:
+            if API_URL:
+                # Thin client: retrieval, memory & LLM jalan di api_server.py
+                tokens = api_client.stream_turn(
+                    API_URL, st.session_state.conversation_id, prompt,
+                    temperature=temperature, top_p=top_p, max_tokens=max_tokens,
+                    k=vector_k, score_threshold=score_threshold or None
                 )
-                
-                # Generate response
-                response = st.session_state.llm.invoke(formatted_prompt)
-                full_response = response.content.strip()
-
-                # Update message terakhir dengan Chatbot's response
-                st.session_state.chat_history[-1]["bot"] = full_response
-                
-                # Rerun to display bot's response
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"❌ Error generating response: {str(e)}")
+                full_response = stream_to_bubble(tokens, bot_placeholder)
+            else:
+                with start_trace("chat.turn", question_chars=len(prompt)) as turn_trace:
+                    # Memory: turn terbaru (dibatasi token) + ringkasan turn yang lebih lama
+                    memory = st.session_state.memory
+                    # K & threshold dikirim per request; index-nya sendiri di-share & gak diubah
+                    turn = prepare_turn(
+                        vector_store, st.session_state.index_key, st.session_state.llm,
+                        prompt, memory.recent_turns(), context_token_budget, trim_sentences, memory.summary,
+                        k=vector_k, score_threshold=score_threshold or None
+                    )
+
+                    if turn["answer"] is not None:
+                        turn_trace.set(fast_path=turn["source"])
+                        full_response = turn["answer"]
+                    else:
+                        # Stream response; pertanyaan identik dari session lain yang lagi jalan share satu generation
+                        llm = coalesce_turn(turn, st.session_state.llm)
+                        tokens = (chunk.content for chunk in traced_stream(llm, turn["prompt"]))
+                        full_response = stream_to_bubble(tokens, bot_placeholder)
+                        finish_turn(turn, full_response)
+
+                st.session_state.last_trace = turn_trace.to_dict()
+
+            display_chat_message(full_response, is_user=False, container=bot_placeholder)
+
+            # Baru commit ke history setelah jawaban lengkap
+            st.session_state.chat_history.append({"user": prompt, "bot": full_response})
+            del st.session_state.chat_history[:-MAX_DISPLAY_TURNS]
+            if not API_URL:
+                st.session_state.memory.add_turn(prompt, full_response)
+                st.session_state.memory.summarize_async(get_summary_llm())
+
+        except Exception as e:
+            st.error(f"❌ Error generating response: {str(e)}")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if show_debug_panel:
+        with st.sidebar:
+            render_debug_panel()
 
     # Footer
     st.markdown("---")
@@ -0,0 +1,135 @@
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# "nvidia" = endpoint chat completions NVIDIA (OpenAI-compatible, RICHBOT_LLM_BASE_URL),
+# "fake" = model lokal deterministik (buat benchmark / load test tanpa API key)
+LLM_BACKEND = os.getenv("RICHBOT_LLM_BACKEND", "nvidia")
+# "huggingface" = sentence-transformers (PyTorch), "onnx" = ONNX Runtime, "onnx-int8" = ONNX dynamic quantized int8,
+# "hashing" = embedder hashing lokal tanpa download weight
+EMBEDDING_BACKEND = os.getenv("RICHBOT_EMBEDDING_BACKEND", "huggingface")
+EMBEDDING_THREADS = int(os.getenv("RICHBOT_EMBEDDING_THREADS", "0"))  # 0 = default runtime (semua core)
+EMBEDDING_BATCH_SIZE = int(os.getenv("RICHBOT_EMBEDDING_BATCH_SIZE", "32"))
+ONNX_QUANTIZATION = os.getenv("RICHBOT_ONNX_QUANTIZATION", "avx2")  # arm64 / avx2 / avx512 / avx512_vnni
+ONNX_MODEL_DIR = os.getenv("RICHBOT_ONNX_MODEL_DIR", os.path.join(".index_cache", "onnx"))
+
+HASHING_EMBEDDING_DIM = 768
+ONNX_INSTALL_HINT = 'Backend ONNX butuh optimum + onnxruntime: pip install "sentence-transformers[onnx]"'
+
+# --- 1. HASHING EMBEDDINGS: Feature hashing unigram + bigram, cepat & tanpa model ---
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dim=HASHING_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "big")
+            vector[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+# --- 2. FACTORY ---
+def create_chat_model(model, temperature=0.7, top_p=0.7, max_tokens=256, backend=None):
+    backend = backend or LLM_BACKEND
+    if backend == "fake":
+        from fake_llm import FakeChatModel
+        return FakeChatModel(model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
+    if backend == "nvidia":
+        from llm_client import ChatCompletionsClient
+        return ChatCompletionsClient(model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+def embedding_model_id(model_name, backend=None):
+    # Dipakai di cache key: vector dari backend beda (termasuk config quantization) gak boleh kecampur
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "onnx-int8":
+        backend = f"{backend}-{ONNX_QUANTIZATION}"
+    return f"{backend}:{model_name}"
+
+# --- 3. CPU EMBEDDING BACKENDS: PyTorch / ONNX Runtime / ONNX int8 ---
+def _onnx_session_kwargs(threads):
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(ONNX_INSTALL_HINT) from e
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    return {"provider": "CPUExecutionProvider", "session_options": options}
+
+def _quantized_onnx_model(model_name, quantization):
+    # Export + quantize cuma sekali, hasilnya disimpan lokal & dipakai ulang
+    path = os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "--"))
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    if os.path.exists(os.path.join(path, file_name)):
+        return path, file_name
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix="export.", dir=ONNX_MODEL_DIR)
+    try:
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(tmp_path)
+        export_dynamic_quantized_onnx_model(model, quantization, tmp_path)
+    except ImportError as e:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise ImportError(ONNX_INSTALL_HINT) from e
+    except Exception:
+        # Export / quantization gagal -> error-nya naik, jangan balikin path yang gak ada
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Proses lain udah duluan export ke path yang sama
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    if not os.path.exists(os.path.join(path, file_name)):
+        raise RuntimeError(f"Quantized ONNX model not found at {os.path.join(path, file_name)} after export.")
+    return path, file_name
+
+def create_embedding_model(model_name, backend=None, threads=None, batch_size=None):
+    backend = backend or EMBEDDING_BACKEND
+    threads = EMBEDDING_THREADS if threads is None else threads
+    batch_size = batch_size or EMBEDDING_BATCH_SIZE
+
+    if backend == "hashing":
+        return HashingEmbeddings()
+    if backend not in ("huggingface", "onnx", "onnx-int8"):
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if backend == "huggingface":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        model_kwargs = {}
+    elif backend == "onnx":
+        model_kwargs = {"backend": "onnx", "model_kwargs": _onnx_session_kwargs(threads)}
+    else:
+        model_name, file_name = _quantized_onnx_model(model_name, ONNX_QUANTIZATION)
+        model_kwargs = {"backend": "onnx", "model_kwargs": {"file_name": file_name, **_onnx_session_kwargs(threads)}}
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"batch_size": batch_size},
+    )
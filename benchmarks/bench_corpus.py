@@ -0,0 +1,114 @@
+import time
+import argparse
+import tempfile
+import numpy as np
+from benchmarks.common import percentiles, write_results
+from shared_corpus import SharedCorpus, normalize_vectors
+
+# --- Corpus bersama: memory per 1 juta chunk & latency query terfilter per profil ---
+# Vector sintetis (bukan embedding beneran) biar bisa skala jutaan chunk tanpa model:
+# tiap profil = satu pusat topik + noise, mirip sebaran sub-chunk satu dokumen.
+def synthetic_profiles(num_chunks, profile_size, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    num_profiles = max(1, num_chunks // profile_size)
+    for profile in range(num_profiles):
+        center = rng.standard_normal(dim, dtype=np.float32)
+        vectors = center + 0.8 * rng.standard_normal((profile_size, dim), dtype=np.float32)
+        yield f"profile-{profile}", normalize_vectors(vectors)
+
+def build_corpus(path, encoding, num_chunks, profile_size, dim, train_size):
+    corpus = SharedCorpus(path, f"synthetic:{dim}")
+    profiles, ranges, pending = {}, {}, []
+
+    def add(profile_id, vectors):
+        texts = [f"{profile_id} chunk {i}" for i in range(len(vectors))]
+        ranges[profile_id] = corpus.add_profile(
+            profile_id, profile_id, [profile_id], texts, [{"parent_id": 0}] * len(texts),
+            [f"{profile_id}-{i}" for i in range(len(texts))], vectors,
+        )
+
+    started = time.perf_counter()
+    for profile_id, vectors in synthetic_profiles(num_chunks, profile_size, dim):
+        profiles[profile_id] = vectors
+        if corpus.is_trained:
+            add(profile_id, vectors)
+            continue
+        pending.append((profile_id, vectors))
+        if sum(len(v) for _, v in pending) >= train_size:
+            corpus.train(np.concatenate([v for _, v in pending]), encoding)
+            for item in pending:
+                add(*item)
+            pending.clear()
+    if pending:
+        corpus.train(np.concatenate([v for _, v in pending]), encoding)
+        for item in pending:
+            add(*item)
+    corpus.save()
+    return corpus, profiles, ranges, time.perf_counter() - started
+
+def run_encoding(encoding, num_chunks, profile_size, dim, train_size, queries, k, nprobes):
+    import faiss
+
+    with tempfile.TemporaryDirectory() as path:
+        corpus, profiles, ranges, build_s = build_corpus(path, encoding, num_chunks, profile_size, dim, train_size)
+        index_bytes = faiss.serialize_index(corpus.index).size
+        total = corpus.index.ntotal
+
+        rng = np.random.default_rng(1)
+        profile_ids = list(profiles)
+
+        result = {
+            "encoding": encoding,
+            "factory": corpus.factory,
+            "chunks": total,
+            "build_s": round(build_s, 3),
+            "index_bytes": int(index_bytes),
+            "bytes_per_chunk": round(index_bytes / total, 2),
+            "mb_per_million_chunks": round(index_bytes / total * 1_000_000 / (1024 * 1024), 1),
+            "float32_flat_mb_per_million": round(dim * 4 * 1_000_000 / (1024 * 1024), 1),
+            "search": [],
+        }
+
+        for nprobe in nprobes:
+            latencies, recalls = [], []
+            for _ in range(queries):
+                profile_id = profile_ids[rng.integers(len(profile_ids))]
+                vectors = profiles[profile_id]
+                # Query = chunk profil itu + noise, ground truth = top-k exact di profil yang sama
+                noise = 0.3 * rng.standard_normal(dim, dtype=np.float32)
+                query = normalize_vectors((vectors[rng.integers(len(vectors))] + noise).reshape(1, -1))
+                exact = set((np.argsort(-(vectors @ query[0]))[:k] + ranges[profile_id][0]).tolist())
+
+                t0 = time.perf_counter()
+                hits = corpus.search(*ranges[profile_id], query, k, nprobe=nprobe if nprobe >= 0 else None)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                recalls.append(len(exact & {chunk_id for chunk_id, _ in hits}) / k)
+
+            result["search"].append({
+                "nprobe": {0: "all", -1: "auto"}.get(nprobe, nprobe),
+                "query_ms": percentiles(latencies),
+                f"recall@{k}": round(sum(recalls) / len(recalls), 4),
+            })
+        return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark corpus bersama: memory per 1M chunk & latency query per profil.")
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--profile-size", type=int, default=60, help="Sub-chunk per profil")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--encodings", nargs="+", default=["SQfp16", "SQ8", "PQ64"])
+    parser.add_argument("--train-size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[0, -1, 64, 16], help="0 = semua list, -1 = otomatis")
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    results = [
+        run_encoding(encoding, args.chunks, args.profile_size, args.dim, args.train_size, args.queries, args.k, args.nprobes)
+        for encoding in args.encodings
+    ]
+    write_results("shared_corpus", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
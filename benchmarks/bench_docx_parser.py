@@ -0,0 +1,72 @@
+import time
+import argparse
+import tracemalloc
+from benchmarks.common import percentiles, write_results
+from benchmarks.synthetic import profile_docx_bytes
+from docx_stream import iter_lines
+
+# --- Parser .docx: python-docx (loader lama, via temp file) vs streaming iterparse ---
+def python_docx_text(doc_bytes):
+    import os
+    import docx
+    import tempfile
+
+    # Replika loader lama: tulis ke temp file, bangun object tree, tabel gak ikut
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_file:
+        tmp_file.write(doc_bytes)
+        tmp_file_path = tmp_file.name
+    try:
+        doc = docx.Document(tmp_file_path)
+    finally:
+        os.unlink(tmp_file_path)
+    lines = []
+    for para in doc.paragraphs:
+        if para._p.pPr is not None and para._p.pPr.numPr is not None:
+            level = para._p.pPr.numPr.ilvl.val
+            lines.append(f"{'    ' * level}{'•o-'[min(level, 2)]} {para.text}")
+        else:
+            lines.append(para.text)
+    return "\n".join(lines)
+
+def stream_text(doc_bytes):
+    return "\n".join(iter_lines(doc_bytes))
+
+PARSERS = {"python-docx": python_docx_text, "stream": stream_text}
+
+def measure(parse, documents, repeats):
+    timings, peaks, chars = [], [], 0
+    for doc_bytes in documents:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            text = parse(doc_bytes)
+            timings.append((time.perf_counter() - started) * 1000)
+        tracemalloc.start()
+        parse(doc_bytes)
+        peaks.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+        tracemalloc.stop()
+        chars += len(text)
+    return {"parse_ms": percentiles(timings), "peak_mb": percentiles(peaks), "chars": chars}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser .docx: waktu parse & peak memory.")
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--bullets-per-section", type=int, default=20)
+    parser.add_argument("--images", type=int, default=20, help="Gambar 512x512 per dokumen")
+    parser.add_argument("--table-rows", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--parsers", nargs="+", default=list(PARSERS))
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    documents = [
+        profile_docx_bytes(seed, args.bullets_per_section, images=args.images, table_rows=args.table_rows)
+        for seed in range(args.docs)
+    ]
+    results = {
+        "doc_mb": percentiles([len(doc_bytes) / (1024 * 1024) for doc_bytes in documents]),
+        "parsers": {name: measure(PARSERS[name], documents, args.repeats) for name in args.parsers},
+    }
+    write_results("docx_parser", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import io
+import os
+import time
+import argparse
+import contextlib
+import numpy as np
+from benchmarks.common import percentiles, write_results
+from benchmarks.synthetic import QUESTIONS, profile_docx_bytes
+from backends import create_embedding_model
+from chatbot_logic import DOC_PATH, EMBEDDING_MODEL, load_document, create_logical_chunks
+from hierarchy import create_sub_chunks
+
+# --- Embedding backend CPU: throughput & top-k agreement vs model referensi ---
+def load_corpus(paths, synthetic_docs):
+    texts, documents = [], []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                documents.append(f.read())
+    documents += [profile_docx_bytes(seed) for seed in range(synthetic_docs)]
+    for doc_bytes in documents:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parents = create_logical_chunks(load_document(io.BytesIO(doc_bytes)))
+        texts.extend(create_sub_chunks(parents)[0])
+    return texts
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def top_k(doc_vectors, query_vectors, k):
+    scores = query_vectors @ doc_vectors.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+def run(backends, texts, queries, k, threads, batch_size):
+    results = []
+    reference = None
+
+    for backend in backends:
+        started = time.perf_counter()
+        model = create_embedding_model(EMBEDDING_MODEL, backend=backend, threads=threads, batch_size=batch_size)
+        model.embed_documents(["warmup"])
+        load_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        doc_vectors = normalize(model.embed_documents(texts))
+        ingest_s = time.perf_counter() - started
+
+        query_ms, query_vectors = [], []
+        for question in queries:
+            t0 = time.perf_counter()
+            query_vectors.append(model.embed_query(question))
+            query_ms.append((time.perf_counter() - t0) * 1000)
+        hits = top_k(doc_vectors, normalize(query_vectors), k)
+
+        result = {
+            "backend": backend,
+            "load_s": round(load_s, 3),
+            "chunks": len(texts),
+            "chunks_per_s": round(len(texts) / ingest_s, 3) if ingest_s else None,
+            "query_ms": percentiles(query_ms),
+        }
+        if reference is None:
+            # Backend pertama = referensi (default PyTorch full precision)
+            reference = hits
+        else:
+            overlaps = [len(a & b) / k for a, b in zip(reference, hits)]
+            result[f"top{k}_agreement"] = round(sum(overlaps) / len(overlaps), 4) if overlaps else None
+        results.append(result)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backend CPU (PyTorch vs ONNX vs int8).")
+    parser.add_argument("--backends", nargs="+", default=["huggingface", "onnx", "onnx-int8"],
+                        help="Backend pertama dipakai sebagai referensi top-k agreement")
+    parser.add_argument("--docs", nargs="*", default=[DOC_PATH], help="Dokumen profil .docx")
+    parser.add_argument("--synthetic-docs", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.docs, args.synthetic_docs)
+    queries = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.queries)]
+    results = run(args.backends, texts, queries, args.k, args.threads, args.batch_size)
+    write_results("embedding_backends", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
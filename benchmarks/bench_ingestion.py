@@ -0,0 +1,60 @@
+import io
+import time
+import argparse
+import contextlib
+from benchmarks.common import percentiles, write_results
+from benchmarks.synthetic import profile_docx_bytes
+from chatbot_logic import EMBEDDING_MODEL, load_document, create_logical_chunks
+from embedding_service import get_embeddings
+from hierarchy import build_vector_store
+
+# --- Ingestion throughput: parse -> chunk -> embed + index, per dokumen ---
+def run(num_docs, bullets_per_section):
+    documents = [profile_docx_bytes(seed, bullets_per_section) for seed in range(num_docs)]
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    embeddings.embed_query("warmup")
+
+    parse_ms, chunk_ms, embed_ms = [], [], []
+    total_chunks = 0
+    started = time.perf_counter()
+
+    for doc_bytes in documents:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = load_document(io.BytesIO(doc_bytes))
+        t1 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            chunks = create_logical_chunks(text)
+        t2 = time.perf_counter()
+        vector_store = build_vector_store(chunks, embeddings)
+        t3 = time.perf_counter()
+
+        parse_ms.append((t1 - t0) * 1000)
+        chunk_ms.append((t2 - t1) * 1000)
+        embed_ms.append((t3 - t2) * 1000)
+        total_chunks += vector_store.index.ntotal
+
+    elapsed = time.perf_counter() - started
+    return {
+        "docs": num_docs,
+        "chunks": total_chunks,
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(num_docs / elapsed, 3),
+        "chunks_per_s": round(total_chunks / elapsed, 3),
+        "parse_ms": percentiles(parse_ms),
+        "chunk_ms": percentiles(chunk_ms),
+        "embed_index_ms": percentiles(embed_ms),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput (docs/s, chunks/s).")
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--bullets-per-section", type=int, default=6)
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.docs, args.bullets_per_section)
+    write_results("ingestion", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import io
+import time
+import random
+import argparse
+import contextlib
+from benchmarks.common import percentiles, write_results
+from benchmarks.synthetic import profile_docx_bytes
+from chatbot_logic import EMBEDDING_MODEL, load_document, create_logical_chunks
+from embedding_service import get_embeddings
+from hierarchy import build_vector_store
+from ingestion_queue import IngestionQueue
+
+# --- Ingestion queue: latency upload kecil di belakang dokumen besar, small-first vs FIFO ---
+def make_work(doc_bytes, embeddings):
+    def work(job):
+        job.set_stage("parse")
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = load_document(io.BytesIO(doc_bytes))
+        job.set_stage("chunk")
+        with contextlib.redirect_stdout(io.StringIO()):
+            chunks = create_logical_chunks(text)
+        job.set_stage("embed")
+        vector_store = build_vector_store(chunks, job.track_embeddings(embeddings))
+        job.set_stage("index")
+        return vector_store.index.ntotal
+    return work
+
+def run_mode(documents, workers, prioritize_small, embeddings):
+    ingestion = IngestionQueue(workers=workers, max_pending=len(documents), prioritize_small=prioritize_small)
+    jobs = [(kind, ingestion.submit(make_work(doc_bytes, embeddings), size=len(doc_bytes))) for kind, doc_bytes in documents]
+
+    # Query embedding session lain selama ingestion jalan (contention di model embedding bersama)
+    query_ms = []
+    while not all(job.finished for _, job in jobs):
+        started = time.perf_counter()
+        embeddings.embed_documents([f"pertanyaan {random.random()}"])
+        query_ms.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.01)
+
+    latency = {"small": [], "large": []}
+    for kind, job in jobs:
+        latency[kind].append((job.finished_at - job.created_at) * 1000)
+    return {
+        "small_done_ms": percentiles(latency["small"]),
+        "large_done_ms": percentiles(latency["large"]),
+        "query_embed_ms": percentiles(query_ms),
+    }
+
+def build_documents(args, offset):
+    # Seed beda per mode, biar chunk mode kedua gak ke-hit embedding cache dari mode pertama.
+    # Upload besar duluan, yang kecil nyusul (kasus terburuk buat FIFO)
+    documents = [("large", profile_docx_bytes(offset + seed, args.large_bullets)) for seed in range(args.large)]
+    documents += [("small", profile_docx_bytes(offset + 1000 + seed, args.small_bullets)) for seed in range(args.small)]
+    return documents
+
+def run(args):
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    embeddings.embed_query("warmup")
+    return {
+        "fifo": run_mode(build_documents(args, 0), args.workers, False, embeddings),
+        "small_first": run_mode(build_documents(args, 10000), args.workers, True, embeddings),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion queue (small-first vs FIFO, query contention).")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--large", type=int, default=4)
+    parser.add_argument("--small", type=int, default=12)
+    parser.add_argument("--large-bullets", type=int, default=200)
+    parser.add_argument("--small-bullets", type=int, default=4)
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    write_results("ingestion_queue", vars(args), run(args), args.output)
+
+if __name__ == "__main__":
+    main()
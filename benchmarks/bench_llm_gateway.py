@@ -0,0 +1,106 @@
+import time
+import argparse
+import threading
+from benchmarks.common import percentiles, write_results
+from benchmarks.stub_llm_server import start_in_thread
+from llm_client import ChatCompletionsClient
+from llm_gateway import LLMGateway
+from single_flight import CoalescedLLM
+from tracing import counter_snapshot
+
+PRIMARY_MODEL = "stub/primary"
+FALLBACK_MODEL = "stub/fallback"
+
+# --- LLM gateway vs stub server: TTFT, error rate, retry/hedge di bawah beban N session ---
+def run(args):
+    base_url, app = start_in_thread({
+        "ttft_ms": args.ttft_ms,
+        "tokens_per_second": args.tokens_per_second,
+        "tokens": args.tokens,
+        "error_rate": args.error_rate,
+        "stall_rate": args.stall_rate,
+        "stall_ms": args.stall_ms,
+        "healthy_models": [FALLBACK_MODEL],
+    })
+    gateway = LLMGateway(
+        max_concurrency=args.max_concurrency,
+        ttft_deadline=args.ttft_deadline,
+        total_deadline=args.total_deadline,
+        max_retries=args.max_retries,
+        fallback_model=FALLBACK_MODEL if args.hedge else None,
+        client_factory=lambda model, **params: ChatCompletionsClient(model, base_url=base_url, api_key="stub", **params),
+    )
+    llm = gateway.llm(PRIMARY_MODEL, max_tokens=args.tokens)
+
+    ttfts, totals, errors = [], [], {}
+    lock = threading.Lock()
+
+    def session(session_id):
+        for turn in range(args.turns):
+            started = time.perf_counter()
+            ttft = None
+            if args.same_question:
+                # Spike: semua session nanya hal yang sama barengan -> di-coalesce jadi satu generation
+                prompt = f"turn {turn}"
+                stream = CoalescedLLM(llm, prompt).stream(prompt)
+            else:
+                stream = llm.stream(f"session {session_id} turn {turn}")
+            try:
+                for _ in stream:
+                    if ttft is None:
+                        ttft = (time.perf_counter() - started) * 1000
+            except Exception as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            with lock:
+                if ttft is not None:
+                    ttfts.append(ttft)
+                totals.append((time.perf_counter() - started) * 1000)
+
+    before = counter_snapshot()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    after = counter_snapshot()
+    counters = {name: value - before.get(name, 0) for name, value in after.items() if name.startswith("llm.")}
+    stub_stats = dict(app["stats"])
+    return {
+        "calls": args.sessions * args.turns,
+        "succeeded": len(totals),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "ttft_ms": percentiles(ttfts),
+        "total_ms": percentiles(totals),
+        "gateway": counters,
+        "stub": stub_stats,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM gateway (deadline, retry, hedging, concurrency) vs stub server.")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--ttft-deadline", type=float, default=2.0)
+    parser.add_argument("--total-deadline", type=float, default=30.0)
+    parser.add_argument("--max-retries", type=int, default=2)
+    parser.add_argument("--hedge", action="store_true", help="Hedge ke fallback model kalau TTFT deadline kelewat")
+    parser.add_argument("--same-question", action="store_true", help="Semua session kirim prompt yang sama (single flight)")
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--tokens", type=int, default=48)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--stall-ms", type=float, default=20000)
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    write_results("llm_gateway", vars(args), run(args), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+import argparse
+from benchmarks.common import percentiles, write_results
+from benchmarks.synthetic import QUESTIONS, corpus_chunks
+from langchain_community.vectorstores import FAISS
+from chatbot_logic import EMBEDDING_MODEL
+from embedding_service import get_embeddings
+from retrieval import embed_query, lexical_search, retrieve
+
+# --- Retrieval latency vs. ukuran corpus ---
+def run(sizes, queries, k):
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    results = []
+
+    for size in sizes:
+        vector_store = FAISS.from_texts(texts=corpus_chunks(size), embedding=embeddings)
+
+        bm25_ms, embed_ms, search_ms = [], [], []
+        decisive = 0
+        for i in range(queries):
+            question = QUESTIONS[i % len(QUESTIONS)]
+            t0 = time.perf_counter()
+            lexical = lexical_search(vector_store, question, k)
+            t1 = time.perf_counter()
+            query_vector = None if lexical[1] else embed_query(vector_store, question)
+            t2 = time.perf_counter()
+            retrieve(vector_store, question, k, query_vector=query_vector, lexical=lexical)
+            t3 = time.perf_counter()
+            bm25_ms.append((t1 - t0) * 1000)
+            decisive += lexical[1]
+            if query_vector is not None:
+                embed_ms.append((t2 - t1) * 1000)
+            search_ms.append((t3 - t2) * 1000)
+
+        results.append({
+            "corpus_chunks": size,
+            "bm25_ms": percentiles(bm25_ms),
+            "lexical_short_circuit_rate": decisive / queries if queries else 0.0,
+            "embed_query_ms": percentiles(embed_ms),
+            "search_ms": percentiles(search_ms),
+        })
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval latency vs. corpus size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.queries, args.k)
+    write_results("retrieval", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import io
+import time
+import argparse
+import threading
+import contextlib
+from benchmarks.common import percentiles, write_results
+from benchmarks.synthetic import QUESTIONS, profile_docx_bytes
+from fake_llm import FakeChatModel
+from backends import embedding_model_id
+from chatbot_logic import (
+    EMBEDDING_MODEL, PRIMARY_LLM_MODEL, CHUNK_PATTERN,
+    load_document, create_logical_chunks, prepare_turn, coalesce_turn, finish_turn,
+)
+from conversation_memory import SUMMARY_MAX_TOKENS, SUMMARY_TEMPERATURE, ConversationMemory
+from docx_stream import DOCX_PARSER
+from embedding_service import get_embeddings
+from hierarchy import SUB_CHUNKING, build_vector_store
+from index_store import compute_index_key
+from llm_gateway import LLMGateway
+from tracing import counter_snapshot, start_trace, traced_stream
+
+# --- End-to-end turn latency dengan N session simulasi yang jalan barengan ---
+# Lewat entry point yang sama dengan app / CLI / API: intent router, answer cache, single flight & gateway ikut keukur
+def run_turn(vector_store, index_key, llm, question, memory):
+    started = time.perf_counter()
+    with start_trace("chat.turn", question_chars=len(question)):
+        turn = prepare_turn(vector_store, index_key, llm, question, memory.recent_turns(), summary=memory.summary)
+        if turn["answer"] is not None:
+            return turn["source"], None, (time.perf_counter() - started) * 1000, turn["answer"]
+
+        coalesced = coalesce_turn(turn, llm)
+        ttft = None
+        answer = ""
+        for chunk in traced_stream(coalesced, turn["prompt"]):
+            if ttft is None:
+                ttft = (time.perf_counter() - started) * 1000
+            answer += chunk.content
+        answer = answer.strip()
+        finish_turn(turn, answer)
+    source = "llm" if coalesced.leader else "coalesced"
+    return source, ttft, (time.perf_counter() - started) * 1000, answer
+
+def run(sessions, turns, ttft_ms, tokens_per_second):
+    doc_bytes = profile_docx_bytes(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = create_logical_chunks(load_document(io.BytesIO(doc_bytes)))
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    vector_store = build_vector_store(chunks, embeddings)
+    index_key = compute_index_key(doc_bytes, embedding_model_id(EMBEDDING_MODEL), f"{CHUNK_PATTERN}|{SUB_CHUNKING}|{DOCX_PARSER}")
+
+    gateway = LLMGateway(client_factory=lambda model, **params: FakeChatModel(
+        model=model, ttft_ms=ttft_ms, tokens_per_second=tokens_per_second, **params
+    ))
+    llm = gateway.llm(PRIMARY_LLM_MODEL)
+    summary_llm = gateway.llm(PRIMARY_LLM_MODEL, temperature=SUMMARY_TEMPERATURE, max_tokens=SUMMARY_MAX_TOKENS)
+
+    ttfts, totals, errors = [], {}, []
+    lock = threading.Lock()
+
+    def session(session_id):
+        memory = ConversationMemory()
+        for turn in range(turns):
+            question = QUESTIONS[(session_id + turn) % len(QUESTIONS)]
+            try:
+                source, ttft, total, answer = run_turn(vector_store, index_key, llm, question, memory)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            memory.add_turn(question, answer)
+            memory.summarize_async(summary_llm)
+            with lock:
+                if ttft is not None:
+                    ttfts.append(ttft)
+                totals.setdefault(source, []).append(total)
+
+    before = counter_snapshot()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = counter_snapshot()
+
+    completed = sum(len(values) for values in totals.values())
+    return {
+        "turns_completed": completed,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(completed / elapsed, 3),
+        "ttft_ms": percentiles(ttfts),
+        "turn_total_ms": percentiles([value for values in totals.values() for value in values]),
+        # Per jalur: intent:* / answer_cache (tanpa LLM), llm (leader), coalesced (follower single flight)
+        "turn_total_ms_by_source": {source: percentiles(values) for source, values in sorted(totals.items())},
+        "counters": {
+            name: value - before.get(name, 0) for name, value in after.items()
+            if name.startswith(("single_flight.", "llm.")) and value - before.get(name, 0)
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end turn latency under concurrent sessions.")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=40)
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.turns, args.ttft_ms, args.tokens_per_second)
+    write_results("turns", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import time
+import platform
+
+# Default benchmark: backend lokal, jadi gak butuh NVIDIA API key / download weight HF.
+# Set env-nya sendiri sebelum run kalau mau benchmark model beneran.
+os.environ.setdefault("RICHBOT_LLM_BACKEND", "fake")
+os.environ.setdefault("RICHBOT_EMBEDDING_BACKEND", "hashing")
+
+def percentiles(values, quantiles=(0.5, 0.95, 0.99)):
+    if not values:
+        return {}
+    values = sorted(values)
+    result = {}
+    for q in quantiles:
+        index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+        result[f"p{int(q * 100)}"] = round(values[index], 3)
+    result["mean"] = round(sum(values) / len(values), 3)
+    return result
+
+def write_results(name, params, results, output=None):
+    # Output JSON biar bisa di-diff antar commit / dibaca CI
+    report = {
+        "benchmark": name,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "llm_backend": os.environ.get("RICHBOT_LLM_BACKEND"),
+        "embedding_backend": os.environ.get("RICHBOT_EMBEDDING_BACKEND"),
+        "params": params,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return report
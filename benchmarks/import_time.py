@@ -0,0 +1,74 @@
+import sys
+import json
+import argparse
+import subprocess
+from benchmarks.common import percentiles, write_results
+
+# Modul yang gak boleh ke-import cuma gara-gara `import chatbot_logic` (harus lazy / background)
+HEAVY_MODULES = [
+    "torch", "transformers", "sentence_transformers", "langchain_huggingface",
+    "langchain_community", "faiss", "docx", "onnxruntime",
+]
+DEFAULT_MODULES = ["chatbot_logic", "api_server"]
+DEFAULT_BUDGET_MS = 1500
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"elapsed_ms": elapsed_ms, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# --- Cold-start import time: tiap sample = proses Python baru ---
+def slowest_imports(stderr, top):
+    # Parse output `-X importtime`: "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return [{"module": name, "self_ms": round(self_ms, 3), "cumulative_ms": round(cumulative_ms, 3)} for name, self_ms, cumulative_ms in rows[:top]]
+
+def measure(module, samples, top):
+    timings, loaded, slowest = [], set(), []
+    for i in range(samples):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["elapsed_ms"])
+        loaded.update(result["loaded"])
+        if i == 0:
+            slowest = slowest_imports(completed.stderr, top)
+    return {"module": module, "import_ms": percentiles(timings), "heavy_loaded": sorted(loaded), "slowest": slowest}
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import budget. Exit code 1 kalau budget kelewat.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Batas median import time per modul")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Jumlah import paling lambat yang dilaporkan")
+    parser.add_argument("--output", help="Path file JSON hasil (default: stdout)")
+    args = parser.parse_args()
+
+    results = [measure(module, args.samples, args.top) for module in args.modules]
+    failures = []
+    for result in results:
+        if result["import_ms"]["p50"] > args.budget_ms:
+            failures.append(f"{result['module']}: p50 {result['import_ms']['p50']} ms > budget {args.budget_ms} ms")
+        if result["heavy_loaded"]:
+            failures.append(f"{result['module']}: eagerly imports {', '.join(result['heavy_loaded'])}")
+
+    write_results("import_time", vars(args), {"modules": results, "failures": failures}, args.output)
+    if failures:
+        sys.stderr.write("\n".join(failures) + "\n")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from aiohttp import web
+
+# --- Stub endpoint chat completions (OpenAI/NVIDIA-compatible) buat test gateway tanpa API beneran ---
+# TTFT, kecepatan token, error 503 & request yang "nyangkut" bisa diatur; model di healthy_models gak pernah nyangkut.
+DEFAULT_CONFIG = {
+    "ttft_ms": 300.0,
+    "tokens_per_second": 40.0,
+    "tokens": 48,
+    "error_rate": 0.0,
+    "stall_rate": 0.0,
+    "stall_ms": 30000.0,
+    "healthy_models": [],
+}
+
+async def list_models(request):
+    models = sorted(request.app["stats"]["models"])
+    return web.json_response({"object": "list", "data": [{"id": model, "object": "model"} for model in models]})
+
+async def stats(request):
+    return web.json_response(request.app["stats"])
+
+async def chat_completions(request):
+    config, counters = request.app["config"], request.app["stats"]
+    body = await request.json()
+    model = body.get("model", "stub")
+    counters["requests"] += 1
+    counters["models"][model] = counters["models"].get(model, 0) + 1
+
+    if random.random() < config["error_rate"]:
+        counters["errors"] += 1
+        return web.json_response({"error": "stub overloaded"}, status=503)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+
+    delay_ms = config["ttft_ms"]
+    if model not in config["healthy_models"] and random.random() < config["stall_rate"]:
+        counters["stalls"] += 1
+        delay_ms += config["stall_ms"]
+
+    try:
+        await asyncio.sleep(delay_ms / 1000)
+        interval = 1 / config["tokens_per_second"] if config["tokens_per_second"] > 0 else 0
+        for i in range(min(int(body.get("max_tokens") or config["tokens"]), config["tokens"])):
+            chunk = {
+                "id": f"stub-{counters['requests']}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": f"token{i} "}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            if interval:
+                await asyncio.sleep(interval)
+        await response.write(b"data: [DONE]\n\n")
+    except (ConnectionResetError, asyncio.CancelledError):
+        # Client (gateway) batalin request: hedge yang kalah / deadline
+        counters["cancelled"] += 1
+        raise
+    return response
+
+def create_app(config=None):
+    app = web.Application()
+    app["config"] = {**DEFAULT_CONFIG, **(config or {})}
+    app["stats"] = {"requests": 0, "errors": 0, "stalls": 0, "cancelled": 0, "models": {}}
+    app.router.add_get("/v1/models", list_models)
+    app.router.add_get("/stats", stats)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+def start_in_thread(config=None, host="127.0.0.1", port=0):
+    # Jalan di event loop thread sendiri; return (base_url, app) buat benchmark in-process
+    app = create_app(config)
+    ready = threading.Event()
+    address = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, host, port)
+        loop.run_until_complete(site.start())
+        address["port"] = runner.addresses[0][1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name="stub-llm-server", daemon=True).start()
+    ready.wait()
+    return f"http://{host}:{address['port']}/v1", app
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub LLM server (chat completions streaming) buat testing gateway.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttft-ms", type=float, default=DEFAULT_CONFIG["ttft_ms"])
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_CONFIG["tokens_per_second"])
+    parser.add_argument("--tokens", type=int, default=DEFAULT_CONFIG["tokens"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraksi request yang dibalas 503")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraksi request yang TTFT-nya ditambah --stall-ms")
+    parser.add_argument("--stall-ms", type=float, default=DEFAULT_CONFIG["stall_ms"])
+    parser.add_argument("--healthy-models", nargs="*", default=[], help="Model yang gak pernah nyangkut (mis. fallback)")
+    args = parser.parse_args()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("host", "port")}
+    web.run_app(create_app(config), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import io
+import zlib
+import random
+import struct
+import docx
+
+SECTION_TITLES = [
+    "Informasi Pribadi", "Deskripsi Singkat", "Pendidikan", "Keterampilan",
+    "Pengalaman", "Proyek", "Sertifikasi", "Organisasi",
+]
+WORDS = (
+    "python data machine learning analisis model dashboard chatbot rag prediksi "
+    "sentimen saham obesitas universitas jakarta magang engineer sertifikat tim "
+    "proyek cloud streamlit faiss retrieval embedding nvidia api deployment"
+).split()
+
+QUESTIONS = [
+    "apa saja proyeknya?",
+    "kamu bisa apa?",
+    "dia kuliah di mana?",
+    "skill apa yang dia punya?",
+    "ceritain pengalaman kerjanya dong",
+    "sertifikasi apa aja yang dimiliki?",
+    "jelaskan yang chatbot",
+    "next kita mau bahas apa?",
+]
+
+def _sentence(rng, min_words=6, max_words=16):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize() + "."
+
+def profile_text(seed, bullets_per_section=6):
+    rng = random.Random(seed)
+    lines = [f"Profil Kandidat {seed}"]
+    for number, title in enumerate(SECTION_TITLES, start=1):
+        lines.append(f"{number}. {title}")
+        for _ in range(bullets_per_section):
+            lines.append(f"• {_sentence(rng)}")
+            if rng.random() < 0.5:
+                lines.append(f"    o {_sentence(rng)}")
+    return "\n".join(lines)
+
+def png_bytes(width, height, seed=0):
+    # PNG noise (gak bisa dikompres) buat simulasi profil yang banyak gambarnya
+    rng = random.Random(seed)
+    rows = b"".join(b"\0" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+def profile_docx_bytes(seed, bullets_per_section=6, images=0, table_rows=0):
+    document = docx.Document()
+    for line in profile_text(seed, bullets_per_section).split("\n"):
+        document.add_paragraph(line)
+    if table_rows:
+        rng = random.Random(seed)
+        table = document.add_table(rows=table_rows, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = _sentence(rng, 2, 5)
+    for i in range(images):
+        document.add_picture(io.BytesIO(png_bytes(512, 512, seed * 1000 + i)))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def corpus_chunks(size, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.randint(1, 8)}. {rng.choice(SECTION_TITLES)}\n" + "\n".join(f"• {_sentence(rng)}" for _ in range(4))
+        for _ in range(size)
+    ]
@@ -0,0 +1,93 @@
+import re
+import math
+import heapq
+import threading
+import weakref
+from collections import Counter
+from langchain_core.documents import Document
+from tracing import span
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+# Lexical dianggap "decisive" kalau skornya tinggi & jauh di atas section lain -> embedding query di-skip
+DECISIVE_MIN_SCORE = 3.0
+DECISIVE_RATIO = 2.0
+
+_indexes = weakref.WeakKeyDictionary()  # vector store -> BM25Index, ikut hilang kalau index-nya di-drop
+_indexes_lock = threading.Lock()
+
+def tokenize(text):
+    # Nama proyek, sertifikat, perusahaan & tahun tetap utuh sebagai token
+    return re.findall(r"\w+", text.lower())
+
+# --- 1. INVERTED INDEX: Dari sub-chunk yang sama dengan FAISS ---
+class BM25Index:
+    def __init__(self, docs):
+        self.docs = docs
+        self.postings = {}  # term -> [(doc_index, term_frequency)]
+        self.doc_lengths = []
+
+        for i, doc in enumerate(docs):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self.postings.setdefault(term, []).append((i, frequency))
+
+        total = len(docs)
+        self.avg_length = sum(self.doc_lengths) / total if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query, k):
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, frequency in self.postings[term]:
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[i] / self.avg_length
+                scores[i] = scores.get(i, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+
+        ranked = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.docs[i], score) for i, score in ranked]
+
+def get_bm25_index(vector_store):
+    index = _indexes.get(vector_store)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(vector_store)
+            if index is None:
+                with span("index.bm25") as bm25_span:
+                    docs = [vector_store.docstore.search(doc_id) for doc_id in vector_store.index_to_docstore_id.values()]
+                    index = BM25Index([doc for doc in docs if isinstance(doc, Document)])
+                    bm25_span.set(docs=len(index.docs), terms=len(index.postings))
+                _indexes[vector_store] = index
+    return index
+
+# --- 2. DECISIVE CHECK & FUSION ---
+def is_decisive(hits, k):
+    if not hits or hits[0][1] < DECISIVE_MIN_SCORE:
+        return False
+
+    top_parent = hits[0][0].metadata.get("parent_id")
+    other_sections = [score for doc, score in hits if doc.metadata.get("parent_id") != top_parent]
+    if other_sections:
+        runner_up = other_sections[0]
+    elif len(hits) < k:
+        runner_up = 0.0
+    else:
+        # Top-k semua dari section yang sama: batas atas skor section lain = skor hit terakhir
+        runner_up = hits[-1][1]
+    return hits[0][1] >= DECISIVE_RATIO * runner_up
+
+def reciprocal_rank_fusion(result_lists, k, rrf_k=RRF_K):
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = (doc.metadata.get("parent_id"), doc.page_content)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
@@ -1,62 +1,103 @@
 import os
 import re
-from dotenv import load_dotenv
-import docx
-from langchain_nvidia_ai_endpoints import ChatNVIDIA
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.prompts import PromptTemplate
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from backends import LLM_BACKEND, embedding_model_id
+from llm_gateway import get_llm
+from index_store import compute_index_key, load_or_build_index
+from hierarchy import SUB_CHUNKING, build_vector_store
+from docx_stream import DOCX_PARSER, iter_lines
+from embedding_service import get_embeddings, normalize_query
+from retrieval import embed_query, lexical_search, retrieve
+from answer_cache import get_answer_cache, history_digest, sampling_params
+from single_flight import CoalescedLLM
+from intent_router import match_rules, match_centroid, answer_intent
+from context_builder import CONTEXT_TOKEN_BUDGET, build_context
+from token_counter import count_tokens
+from tracing import span, start_trace, traced_stream, start_metrics_server
+from conversation_memory import ConversationMemory, create_summary_llm, format_turn
 
 DOC_PATH = "resource/Personal Profile - RAG purpose.docx"
 EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
 PRIMARY_LLM_MODEL = "gotocompany/gemma-2-9b-cpt-sahabatai-instruct"
 VECTOR_SEARCH_TOP_K = 5
-CHAT_HISTORY_WINDOW = 1
+CONTEXT_TRIM_SENTENCES = False
+TURN_PROMPT_TOKEN_CAP = 1536  # Batas token yang ditambahkan tiap turn (di luar system prompt)
+# Chat template keluarga Gemma nolak role system -> persona digabung ke pesan user (tetap paling depan).
+# RICHBOT_MERGE_SYSTEM_PROMPT=1/0 buat maksa; default-nya ikut nama model.
+SYSTEMLESS_MODEL_PATTERN = re.compile(r"gemma", re.IGNORECASE)
+
+def merge_system_prompt(model, setting=None):
+    setting = os.getenv("RICHBOT_MERGE_SYSTEM_PROMPT", "auto") if setting is None else setting
+    if setting in ("0", "1"):
+        return setting == "1"
+    return SYSTEMLESS_MODEL_PATTERN.search(model) is not None
+
+MERGE_SYSTEM_PROMPT = merge_system_prompt(PRIMARY_LLM_MODEL)
+CHUNK_PATTERN = r'\n(?=\d+\.\s[A-Z])'
+# Modul berat yang di-import di background pas startup (bukan pas import chatbot_logic)
+PRELOAD_MODULES = ["faiss", "langchain_community.vectorstores", "langchain_core.prompts"]
+
+_preload_thread = None
+_preload_lock = threading.Lock()
 
 # --- 1. SETUP: Load API Key ---
 def load_api_key():
+    # Cuma dipakai CLI; app Streamlit & API server gak perlu python-dotenv pas import modul ini
+    from dotenv import load_dotenv
+
     load_dotenv()
+    if LLM_BACKEND != "nvidia":
+        print(f"Using local '{LLM_BACKEND}' LLM backend, NVIDIA API key not required.")
+        return
     if os.getenv("NVIDIA_API_KEY") is None:
         raise ValueError("NVIDIA_API_KEY not found. Please set it in your .env file.")
     print("API Key loaded successfully.")
 
+# --- 1.1. STARTUP: Import modul berat & warmup model di background, UI / banner gak perlu nunggu ---
+def _preload(modules):
+    with span("startup.preload", modules=len(modules)):
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # Backend opsional yang gak ke-install; error aslinya muncul pas beneran dipakai
+                pass
+        create_prompt_template()
+
+def start_preload():
+    global _preload_thread
+    modules = PRELOAD_MODULES + (["requests", "llm_client"] if LLM_BACKEND == "nvidia" else [])
+    with _preload_lock:
+        if _preload_thread is None:
+            _preload_thread = threading.Thread(target=_preload, args=(modules,), name="preload", daemon=True)
+            _preload_thread.start()
+    get_embeddings(EMBEDDING_MODEL).start_warmup()
+    return _preload_thread
+
 # --- 2. DOCUMENT LOADING ---
+@span("document.parse")
 def load_document(file_path):
+    # Streaming dari zip (path / bytes / file-like): list item jadi bullet per level, tabel jadi baris "a | b"
     try:
-        doc = docx.Document(file_path)
-        full_text = []
-        
-        for para in doc.paragraphs:
-            # Cek paragraf (properti item list)
-            if para._p.pPr and para._p.pPr.numPr:
-                indent_level = para._p.pPr.numPr.ilvl.val
-
-                # Buat indentation
-                indentation = '    ' * indent_level
-
-                if indent_level == 0:
-                    bullet = '•'
-                elif indent_level == 1:
-                    bullet = 'o'
-                else:
-                    bullet = '-'
-                
-                # Gabungin semuanya menjadi satu baris yang terformat
-                full_text.append(f"{indentation}{bullet} {para.text}")
-            else:
-                full_text.append(para.text)
-        
+        text = '\n'.join(iter_lines(file_path))
         print(f"Document '{file_path}' loaded successfully (with nested list formatting).")
-        return '\n'.join(full_text)
+        return text
     except FileNotFoundError:
         raise FileNotFoundError(f"The document at {file_path} was not found.")
 
 # --- 2.1. LOGICAL CHUNKING: ---
+@span("document.chunk")
 def create_logical_chunks(text_content):
+    # Bisa teks utuh atau iterable baris langsung dari docx_stream.iter_lines
+    if not isinstance(text_content, str):
+        text_content = '\n'.join(text_content)
+
     # Regex untuk memecah teks, cth: "1. Informasi Pribadi", "2. Deskripsi Singkat"
     # Menambahkan '[A-Z]' untuk memastikan hanya memecah pada judul (yang diawali huruf kapital).
-    pattern = r'\n(?=\d+\.\s[A-Z])'
-    chunks = re.split(pattern, text_content)
+    chunks = re.split(CHUNK_PATTERN, text_content)
 
     # Hapus chunk kosong kalo ada dan bersihin spasi di awal/akhir
     cleaned_chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
@@ -70,30 +111,52 @@ def create_logical_chunks(text_content):
     return cleaned_chunks
 
 # --- 3. RAG - RETRIEVAL: Create Vector Store ---
-def create_vector_store(chunks):
+def create_embeddings():
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    # Model di-load & dipanasin di background sambil dokumen di-index
+    embeddings.start_warmup()
+    print(f"Embedding model '{EMBEDDING_MODEL}' warming up in background (shared across sessions).")
+    return embeddings
+
+def create_vector_store(chunks, embeddings=None):
     print(f"Creating vector store from {len(chunks)} logical chunks.")
 
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-    print(f"Embedding model '{EMBEDDING_MODEL}' loaded.")
+    if embeddings is None:
+        embeddings = create_embeddings()
+
+    # Two-level index: sub-chunk (bullet/kalimat) di-embed, section induk disimpan buat lookup
+    vector_store = build_vector_store(chunks, embeddings)
+    print(f"FAISS vector store created successfully ({vector_store.index.ntotal} sub-chunks).")
+
+    return vector_store
+
+# --- 3.1. PERSISTENT INDEX: Load dari disk kalo dokumen yang sama udah pernah di-index ---
+def load_or_create_vector_store(file_path, embeddings):
+    with open(file_path, "rb") as f:
+        doc_bytes = f.read()
+    index_key = compute_index_key(doc_bytes, embedding_model_id(EMBEDDING_MODEL), f"{CHUNK_PATTERN}|{SUB_CHUNKING}|{DOCX_PARSER}")
 
-    vector_store = FAISS.from_texts(texts=chunks, embedding=embeddings)
-    print("FAISS vector store created successfully.")
+    def build_chunks():
+        document_text = load_document(file_path)
+        return create_logical_chunks(document_text)
 
-    return vector_store.as_retriever(search_kwargs={'k': VECTOR_SEARCH_TOP_K})
+    vector_store, from_disk = load_or_build_index(index_key, embeddings, build_chunks)
+    if from_disk:
+        print(f"FAISS index loaded from disk cache ({vector_store.index.ntotal} chunks).")
+    else:
+        print("FAISS vector store created and saved to disk cache.")
+
+    return vector_store, index_key
 
 # --- 4. RAG - GENERATION: LLM and Prompt ---
 def create_llm():
     print(f"Initializing primary LLM: {PRIMARY_LLM_MODEL}")
-    llm = ChatNVIDIA(
-        model=PRIMARY_LLM_MODEL,
-        temperature=0.7,
-        top_p=0.7,
-        max_tokens=256,
-    )
-    return llm
+    # Lewat gateway: client & koneksi di-pool, deadline + retry + batas concurrency per proses
+    return get_llm(PRIMARY_LLM_MODEL, temperature=0.7, top_p=0.7, max_tokens=256)
 
-def create_prompt_template():
-    template = """
+# Persona, aturan & skenario: statis, dikirim sebagai system message yang sama persis tiap turn
+# (prefix-nya stabil -> bisa kena prefix/KV cache di backend)
+SYSTEM_PROMPT = """
 Anda adalah 'RichBot', sebuah asisten AI dengan kepribadian yang santai, ramah, dan informatif. Anggap diri Anda seperti seorang teman yang sedang bersemangat menceritakan profil Richard Dean Tanjaya kepada pengguna.
 
 **--- GAYA BAHASA & PERSONALITAS ---**
@@ -138,8 +201,10 @@ Jika pertanyaan atau pernyataan pengguna SALAH atau BERTENTANGAN dengan `CONTEXT
 **Skenario 6: Jawaban TIDAK ADA di Konteks**
 -   *User Question:* "Dia bisa main musik gak?"
 -   *Jawaban Ideal Anda:* "Wah, kalau soal kemampuan main musik, sepertinya belum ada infonya nih di profilnya. Mungkin bisa jadi hobi baru, hehe."
+"""
 
----
+# Bagian per-turn: context, history & pertanyaan
+TURN_PROMPT = """---
 **CONTEXT:**
 {context}
 
@@ -149,23 +214,144 @@ Jika pertanyaan atau pernyataan pengguna SALAH atau BERTENTANGAN dengan `CONTEXT
 **User Question:** {question}
 **Jawaban Anda (dalam Bahasa Indonesia yang santai):**
 """
-    return PromptTemplate(
-        template=template,
-        input_variables=["context", "chat_history", "question"]
+
+@lru_cache(maxsize=None)
+def create_prompt_template():
+    from langchain_core.messages import SystemMessage
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if MERGE_SYSTEM_PROMPT:
+        # Buat model yang gak support role system: prefix statis tetap paling depan
+        return ChatPromptTemplate.from_messages([("human", SYSTEM_PROMPT + TURN_PROMPT)])
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=SYSTEM_PROMPT),
+        ("human", TURN_PROMPT),
+    ])
+
+@lru_cache(maxsize=None)
+def static_prefix_tokens():
+    return count_tokens(SYSTEM_PROMPT)
+
+def format_prompt(context_text, recent_history, question, summary=""):
+    messages = create_prompt_template().format_messages(
+        context=context_text,
+        chat_history=format_chat_history(recent_history, summary),
+        question=question
     )
+    turn_tokens = count_tokens(messages[-1].content) - (static_prefix_tokens() if MERGE_SYSTEM_PROMPT else 0)
+    return messages, turn_tokens
 
 # --- 5. HELPER FUNCTION: Format Chat History ---
-def format_chat_history(history):
-    if not history:
+def format_chat_history(history, summary=""):
+    if not history and not summary:
         return "No conversation yet."
-    return "\n".join([f"User: {turn['user']}\nRichBot: {turn['bot']}" for turn in history])
+    lines = [f"(Ringkasan percakapan sebelumnya: {summary})"] if summary else []
+    return "\n".join(lines + [format_turn(turn) for turn in history])
+
+# --- 5.1. TURN PIPELINE: Dipakai bareng CLI & API server ---
+def prepare_turn(vector_store, index_key, llm, user_input, recent_history,
+                 token_budget=CONTEXT_TOKEN_BUDGET, trim_sentences=CONTEXT_TRIM_SENTENCES, summary="",
+                 k=VECTOR_SEARCH_TOP_K, score_threshold=None):
+    # vector_store di-share antar session & read-only; k / score_threshold khusus request ini
+    turn = {
+        "question": user_input,
+        "history": recent_history,
+        "summary": summary,
+        "index_key": index_key,
+        "cache_params": sampling_params(
+            llm, k, token_budget=token_budget, trim_sentences=trim_sentences, score_threshold=score_threshold
+        ),
+        "query_vector": None,
+        "answer": None,  # Kalau udah ada jawaban (fast path / cache), LLM gak perlu dipanggil
+        "source": None,
+        "prompt": None,
+    }
+
+    # BM25 duluan: murah, dan kalau exact match-nya jelas embedding query gak perlu dihitung sama sekali
+    lexical = lexical_search(vector_store, user_input, k)
+    lexical_decisive = lexical[1]
+
+    # Fast path: pertanyaan meta / navigasi / respon singkat dijawab dari template, tanpa RAG & LLM
+    with span("intent.route") as intent_span:
+        intent = match_rules(user_input)
+        if intent is None and not lexical_decisive:
+            turn["query_vector"] = embed_query(vector_store, user_input)
+            intent = match_centroid(user_input, turn["query_vector"], vector_store.embeddings)
+        if intent is not None:
+            turn["answer"] = answer_intent(intent, vector_store, recent_history)
+        intent_span.set(intent=intent)
+    if turn["answer"] is not None:
+        turn["source"] = f"intent:{intent}"
+        return turn
+
+    if not lexical_decisive:
+        if turn["query_vector"] is None:
+            turn["query_vector"] = embed_query(vector_store, user_input)
+
+        # Pertanyaan yang (hampir) sama untuk dokumen & parameter yang sama -> langsung pakai jawaban lama
+        with span("answer_cache.lookup") as cache_span:
+            turn["answer"] = get_answer_cache().lookup(
+                index_key, turn["cache_params"], recent_history, turn["query_vector"], summary=summary
+            )
+            cache_span.set(hit=turn["answer"] is not None)
+        if turn["answer"] is not None:
+            turn["source"] = "answer_cache"
+            return turn
+
+    with span("retrieval") as retrieval_span:
+        retrieved_docs = retrieve(
+            vector_store, user_input, k, score_threshold, query_vector=turn["query_vector"], lexical=lexical
+        )
+        retrieval_span.set(mode="lexical" if lexical_decisive and score_threshold is None else "hybrid")
+    with span("context.build") as context_span:
+        context_text, context_tokens = build_context(user_input, retrieved_docs, token_budget, trim_sentences)
+        context_span.set(context_tokens=context_tokens)
+
+    with span("prompt.format") as prompt_span:
+        turn["prompt"], turn_tokens = format_prompt(context_text, recent_history, user_input, summary)
+
+        overflow = turn_tokens - TURN_PROMPT_TOKEN_CAP
+        if overflow > 0:
+            # Kelebihan token dipotong dari context (history & pertanyaan gak diutak-atik)
+            context_text, context_tokens = build_context(
+                user_input, retrieved_docs, max(context_tokens - overflow, 0), trim_sentences
+            )
+            turn["prompt"], turn_tokens = format_prompt(context_text, recent_history, user_input, summary)
+
+        prompt_span.set(
+            prompt_chars=sum(len(message.content) for message in turn["prompt"]),
+            static_prefix_tokens=static_prefix_tokens(),
+            turn_tokens=turn_tokens,
+        )
+
+    return turn
+
+def coalesce_turn(turn, llm):
+    # Turn identik yang lagi jalan barengan (dokumen, pertanyaan ternormalisasi, history + summary, sampling)
+    # share satu generation upstream; tiap subscriber dapat token stream yang sama
+    key = (
+        turn["index_key"],
+        normalize_query(turn["question"]),
+        history_digest(turn["history"], turn["summary"]),
+        tuple(sorted(turn["cache_params"].items())),
+    )
+    turn["llm"] = CoalescedLLM(llm, key)
+    return turn["llm"]
+
+def finish_turn(turn, answer):
+    # Follower single flight gak nyimpen lagi: jawabannya sama persis dengan punya leader
+    if turn.get("llm") is not None and turn["llm"].leader is False:
+        return
+    # Jalur lexical gak punya query vector -> gak bisa masuk semantic cache
+    if turn["source"] is None and turn["query_vector"] is not None:
+        get_answer_cache().store(
+            turn["index_key"], turn["cache_params"], turn["history"], turn["query_vector"], answer, summary=turn["summary"]
+        )
 
 # --- 6. MAIN CHAT LOGIC ---
 def run_chatbot():
     load_api_key()
-    document_text = load_document(DOC_PATH)
-    
-    logical_chunks = create_logical_chunks(document_text)
+    start_metrics_server()
 
     # print("\n--- Verifikasi Hasil Logical Chunking ---")
     # for i, chunk in enumerate(logical_chunks):
@@ -173,11 +359,15 @@ def run_chatbot():
     #     print(chunk)
     #     print("====================================================\n")
 
-    retriever = create_vector_store(logical_chunks)
-    
-    llm = create_llm()
-    prompt_template = create_prompt_template()
-    chat_history = []
+    # Banner langsung tampil; index & LLM client disiapin di background selama user ngetik pertanyaan pertama
+    start_preload()
+    background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+    vector_store_future = background.submit(load_or_create_vector_store, DOC_PATH, create_embeddings())
+    llm_future = background.submit(create_llm)
+    background.shutdown(wait=False)
+
+    summary_llm = None
+    memory = ConversationMemory()
 
     print("\n--- RichBot is Online ---")
     print("RichBot: Halo, perkenalkan namaku RichBot! Aku adalah AI Chatbot yang siap membantumu mengenal Richard. Silakan ajukan pertanyaanmu.")
@@ -189,27 +379,35 @@ def run_chatbot():
             print("RichBot: Sampai jumpa lagi!")
             break
 
-        retrieved_docs = retriever.invoke(user_input)
-        context_text = "\n\n---\n\n".join([doc.page_content for doc in retrieved_docs])
+        # Turn pertama nunggu startup background selesai (biasanya udah selesai duluan)
+        vector_store, index_key = vector_store_future.result()
+        llm = llm_future.result()
+        if summary_llm is None:
+            summary_llm = create_summary_llm(PRIMARY_LLM_MODEL)
+
+        with start_trace("chat.turn", question_chars=len(user_input)) as turn_trace:
+            turn = prepare_turn(
+                vector_store, index_key, llm, user_input, memory.recent_turns(), summary=memory.summary
+            )
+
+            if turn["answer"] is not None:
+                turn_trace.set(fast_path=turn["source"])
+                print(f"RichBot: {turn['answer']}")
+                full_bot_response = turn["answer"]
+            else:
+                print("RichBot: ", end="", flush=True)
 
-        recent_history = chat_history[-CHAT_HISTORY_WINDOW:]
+                full_bot_response = ""
+                for chunk in traced_stream(coalesce_turn(turn, llm), turn["prompt"]):
+                    print(chunk.content, end="", flush=True)
+                    full_bot_response += chunk.content
 
-        formatted_prompt = prompt_template.format(
-            context=context_text,
-            chat_history=format_chat_history(recent_history),
-            question=user_input
-        )
-        
-        print("RichBot: ", end="", flush=True)
-        
-        full_bot_response = ""
-        for chunk in llm.stream(formatted_prompt):
-            print(chunk.content, end="", flush=True)
-            full_bot_response += chunk.content
-        
-        print() 
-
-        chat_history.append({"user": user_input, "bot": full_bot_response.strip()})
+                print()
+                finish_turn(turn, full_bot_response.strip())
+
+        memory.add_turn(user_input, full_bot_response.strip())
+        # Turn yang keluar dari budget diringkas di background, gak nambah latency turn ini
+        memory.summarize_async(summary_llm)
 
 if __name__ == "__main__":
-    run_chatbot()
\ No newline at end of file
+    run_chatbot()
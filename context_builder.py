@@ -0,0 +1,93 @@
+import re
+from token_counter import count_tokens
+
+CONTEXT_TOKEN_BUDGET = 1024
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+MIN_USEFUL_TOKENS = 32
+
+def _words(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+ENUMERATOR_PATTERN = re.compile(r"(?:\d+|[a-zA-Z]|[ivxIVX]+)[.)]")
+
+def split_sentences(text):
+    # Per baris dulu (bullet dari load_document), lalu per kalimat
+    sentences = []
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        parts = []
+        for part in re.split(r"(?<=[.!?])\s+", line):
+            if parts and ENUMERATOR_PATTERN.fullmatch(parts[-1].strip()):
+                # "5. Pengalaman Kerja": nomor heading / list bukan kalimat sendiri
+                parts[-1] = f"{parts[-1]} {part}"
+            else:
+                parts.append(part)
+        sentences.extend(part for part in parts if part.strip())
+    return sentences
+
+def _joined_tokens(parts, separator_tokens):
+    return sum(count_tokens(part) for part in parts) + separator_tokens * max(len(parts) - 1, 0)
+
+# --- 1. SENTENCE TRIMMING: Ambil kalimat yang paling nyambung sama pertanyaan ---
+def trim_to_relevant_sentences(text, query, max_tokens):
+    lines = [line for line in text.split("\n") if line.strip()]
+    if not lines:
+        return ""
+
+    # Baris pertama = judul section, selalu disimpan utuh biar LLM tau konteksnya
+    heading, rest = lines[0], split_sentences("\n".join(lines[1:]))
+    query_words = _words(query)
+    ranked = sorted(range(len(rest)), key=lambda i: len(query_words & _words(rest[i])), reverse=True)
+
+    used = count_tokens(heading)
+    selected = set()
+    for i in ranked:
+        tokens = count_tokens(rest[i])
+        if used + tokens > max_tokens:
+            continue
+        selected.add(i)
+        used += tokens
+
+    # Urutan asli dipertahankan, bukan urutan skor
+    return "\n".join([heading] + [rest[i] for i in sorted(selected)])
+
+# --- 2. CONTEXT ASSEMBLY: Dedupe + stop kalau budget token habis ---
+def build_context(query, docs, token_budget=CONTEXT_TOKEN_BUDGET, trim_sentences=False):
+    parts = []
+    used = 0
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+
+    for doc in docs:
+        text = doc.page_content.strip()
+        if not text:
+            continue
+
+        # Hit yang isinya udah ketutup chunk lain gak perlu dimasukin lagi
+        if any(text in part for part in parts):
+            continue
+        # Chunk lama yang ketutup chunk ini baru dibuang setelah chunk ini pasti masuk budget
+        kept = [part for part in parts if part not in text]
+        remaining = token_budget - _joined_tokens(kept, separator_tokens) - (separator_tokens if kept else 0)
+        if remaining < MIN_USEFUL_TOKENS:
+            break
+
+        if trim_sentences:
+            text = trim_to_relevant_sentences(text, query, remaining)
+
+        tokens = count_tokens(text)
+        if tokens > remaining:
+            # Chunk terakhir yang kegedean dipotong per kalimat, bukan dibuang
+            text = trim_to_relevant_sentences(text, query, remaining)
+            tokens = count_tokens(text)
+            if "\n" not in text or tokens > remaining:
+                break
+
+        # Kalau di-trim, chunk lama yang isinya gak kebawa lagi tetap dipertahankan (asal masih muat)
+        kept = [part for part in parts if part not in text]
+        if _joined_tokens(kept + [text], separator_tokens) > token_budget:
+            break
+        parts = kept + [text]
+        used = _joined_tokens(parts, separator_tokens)
+
+    return CONTEXT_SEPARATOR.join(parts), used
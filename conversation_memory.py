@@ -0,0 +1,105 @@
+import os
+import threading
+from llm_gateway import get_llm
+from token_counter import count_tokens
+from tracing import span
+
+MEMORY_TOKEN_BUDGET = int(os.getenv("RICHBOT_MEMORY_TOKEN_BUDGET", "384"))  # Turn verbatim di prompt
+SUMMARY_MAX_TOKENS = 128
+SUMMARY_TEMPERATURE = 0.2
+MAX_PENDING_TURNS = 20  # Jaga-jaga kalau summarizer gagal terus: turn terlama dibuang
+MAX_DISPLAY_TURNS = 100  # Batas history yang disimpan buat ditampilkan di UI
+
+SUMMARY_PROMPT = """Ringkas percakapan antara User dan RichBot (asisten yang menceritakan profil Richard) di bawah ini.
+Gabungkan ringkasan sebelumnya dengan percakapan baru jadi satu ringkasan singkat (maksimal 3 kalimat, Bahasa Indonesia).
+Fokus ke topik yang sudah dibahas dan fakta yang sudah disebutkan. Tulis ringkasannya saja.
+
+Ringkasan sebelumnya:
+{summary}
+
+Percakapan baru:
+{turns}
+
+Ringkasan baru:"""
+
+def format_turn(turn):
+    return f"User: {turn['user']}\nRichBot: {turn['bot']}"
+
+def create_summary_llm(model):
+    return get_llm(model, temperature=SUMMARY_TEMPERATURE, max_tokens=SUMMARY_MAX_TOKENS)
+
+# --- 1. MEMORY: Turn terbaru verbatim (dibatasi token), turn lama dilipat ke rolling summary ---
+class ConversationMemory:
+    def __init__(self, token_budget=MEMORY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.summary = ""
+        self._turns = []  # (turn, tokens) yang belum masuk summary
+        self._lock = threading.Lock()
+        self._summarizing = False
+        self._generation = 0  # Naik tiap clear(), summary dari percakapan lama dibuang
+
+    def _recent_start(self):
+        # Hitung mundur dari turn terbaru sampai budget habis. Turn terakhir selalu ikut.
+        used = 0
+        start = len(self._turns)
+        while start > 0:
+            tokens = self._turns[start - 1][1]
+            if start < len(self._turns) and used + tokens > self.token_budget:
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    def recent_turns(self):
+        with self._lock:
+            return [turn for turn, _ in self._turns[self._recent_start():]]
+
+    def add_turn(self, user, bot):
+        turn = {"user": user, "bot": bot}
+        with self._lock:
+            self._turns.append((turn, count_tokens(format_turn(turn))))
+            del self._turns[:-MAX_PENDING_TURNS]
+
+    def clear(self):
+        with self._lock:
+            self._turns = []
+            self.summary = ""
+            self._generation += 1
+
+    # --- 2. ROLLING SUMMARY: Jalan di background setelah jawaban selesai di-stream ---
+    def summarize_async(self, llm):
+        with self._lock:
+            if self._summarizing:
+                # Yang lagi jalan selesai dulu; turn yang kelewat diringkas di turn berikutnya
+                return None
+            evicted = [turn for turn, _ in self._turns[:self._recent_start()]]
+            if not evicted:
+                return None
+            self._summarizing = True
+            previous, generation = self.summary, self._generation
+
+        thread = threading.Thread(
+            target=self._summarize, args=(llm, previous, evicted, generation), name="memory-summarizer", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _summarize(self, llm, previous, evicted, generation):
+        try:
+            with span("memory.summarize", turns=len(evicted)) as summary_span:
+                prompt = SUMMARY_PROMPT.format(
+                    summary=previous or "-",
+                    turns="\n".join(format_turn(turn) for turn in evicted),
+                )
+                summary = llm.invoke(prompt).content.strip()
+                summary_span.set(summary_tokens=count_tokens(summary))
+
+            with self._lock:
+                if generation == self._generation and summary:
+                    self.summary = summary
+                    self._turns = [item for item in self._turns if not any(item[0] is turn for turn in evicted)]
+        except Exception as e:
+            print(f"Warning: conversation summary failed: {e}")
+        finally:
+            with self._lock:
+                self._summarizing = False
@@ -0,0 +1,124 @@
+import io
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# Parser .docx streaming: baca word/document.xml langsung dari zip (di memory, tanpa temp file),
+# pakai iterparse jadi gak perlu bangun object tree python-docx. Gambar di word/media gak pernah dibuka.
+DOCX_PARSER = "docx-stream-v1"  # Masuk ke index key, naikkan kalau output parser berubah
+WORD_NAMESPACES = (
+    "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "http://purl.oclc.org/ooxml/wordprocessingml/main",  # Strict OOXML
+)
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+OFFICE_DOCUMENT_REL = "/officeDocument"
+BULLETS = ("•", "o", "-")  # Per level list: 0, 1, 2+
+INDENT = "    "
+CELL_SEPARATOR = " | "
+
+def _split_tag(tag):
+    # "{namespace}p" -> ("namespace", "p")
+    if not tag.startswith("{"):
+        return "", tag
+    namespace, _, name = tag[1:].partition("}")
+    return namespace, name
+
+def _main_part(archive):
+    # Lokasi document.xml diambil dari _rels/.rels (gak selalu word/document.xml)
+    try:
+        with archive.open("_rels/.rels") as rels:
+            for _, elem in iterparse(rels):
+                if _split_tag(elem.tag)[1] == "Relationship" and elem.get("Type", "").endswith(OFFICE_DOCUMENT_REL):
+                    return elem.get("Target", DEFAULT_DOCUMENT_PART).lstrip("/")
+    except KeyError:
+        pass
+    return DEFAULT_DOCUMENT_PART
+
+# --- 1. BLOCKS: ("paragraph", level, text) / ("row", None, [cell, ...]) sesuai urutan di dokumen ---
+def iter_blocks(source):
+    # source: path, bytes, atau file-like (BytesIO / UploadedFile Streamlit)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        part = _main_part(archive)
+        try:
+            stream = archive.open(part)
+        except KeyError:
+            raise ValueError(f"Not a Word document: '{part}' is missing.")
+        with stream:
+            yield from _iter_body(stream)
+
+def _iter_body(stream):
+    body = None
+    p_depth = r_depth = tbl_depth = 0
+    parts, level, numbered = [], None, False
+    row, cell = [], []
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        namespace, name = _split_tag(elem.tag)
+        if namespace not in WORD_NAMESPACES:
+            continue
+
+        if event == "start":
+            if name == "body":
+                body = elem
+            elif name == "p":
+                p_depth += 1
+                if p_depth == 1:
+                    parts, level, numbered = [], None, False
+            elif name == "r":
+                r_depth += 1
+            elif name == "tbl":
+                tbl_depth += 1
+            elif name == "tr" and tbl_depth == 1:
+                row = []
+            elif name == "tc" and tbl_depth == 1:
+                cell = []
+            continue
+
+        # Paragraf di dalam text box (p_depth > 1) di-skip, sama kayak python-docx
+        if p_depth == 1 and r_depth > 0:
+            if name == "t":
+                parts.append(elem.text or "")
+            elif name == "tab":
+                parts.append("\t")
+            elif name in ("br", "cr"):
+                parts.append("\n")
+        if p_depth == 1:
+            if name == "numPr":
+                numbered = True
+            elif name == "ilvl":
+                level = int(elem.get(f"{{{namespace}}}val", "0"))
+
+        if name == "r":
+            r_depth -= 1
+        elif name == "p":
+            if p_depth == 1:
+                text = "".join(parts)
+                if tbl_depth:
+                    # Tabel nested ikut jadi isi cell tabel terluar
+                    cell.append(text)
+                else:
+                    yield "paragraph", (level or 0) if numbered else None, text
+            p_depth -= 1
+        elif name == "tc" and tbl_depth == 1:
+            row.append(" ".join(text.strip() for text in cell if text.strip()))
+        elif name == "tr" and tbl_depth == 1:
+            yield "row", None, row
+        elif name == "tbl":
+            tbl_depth -= 1
+
+        # Block top-level yang udah selesai dibuang dari tree, biar memory gak numpuk
+        if body is not None and p_depth == 0 and tbl_depth == 0 and name in ("p", "tbl", "sdt"):
+            body.clear()
+
+# --- 2. LINES: Format teks yang sama dengan loader lama (bullet per level) + baris tabel ---
+def iter_lines(source):
+    for kind, level, content in iter_blocks(source):
+        if kind == "row":
+            if any(content):
+                yield CELL_SEPARATOR.join(content).rstrip()
+        elif level is None:
+            yield content
+        else:
+            bullet = BULLETS[min(level, len(BULLETS) - 1)]
+            yield f"{INDENT * level}{bullet} {content}"
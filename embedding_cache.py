@@ -0,0 +1,65 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+# Kosongin env-nya buat matiin cache embedding di disk
+EMBEDDING_CACHE_PATH = os.getenv("RICHBOT_EMBEDDING_CACHE", os.path.join(".index_cache", "embeddings.sqlite"))
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+# --- Content-addressed embedding cache: (model, teks ternormalisasi) -> vector float32 ---
+class EmbeddingCache:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, model_id, hashes):
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Batasan jumlah parameter SQLite -> query per batch
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model_id, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model_id, items):
+        rows = [(model_id, key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+def get_embedding_cache(path=None):
+    path = EMBEDDING_CACHE_PATH if path is None else path
+    if not path:
+        return None
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path)
+        return _caches[path]
@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from backends import create_embedding_model, embedding_model_id
+from embedding_cache import get_embedding_cache, normalize_text, text_hash
+from tracing import increment, span
+
+MICRO_BATCH_WAIT_MS = float(os.getenv("RICHBOT_EMBED_BATCH_WAIT_MS", "5"))
+MICRO_BATCH_MAX_TEXTS = int(os.getenv("RICHBOT_EMBED_BATCH_MAX_TEXTS", "64"))
+QUERY_CACHE_SIZE = int(os.getenv("RICHBOT_QUERY_CACHE_SIZE", "1024"))
+WARMUP_ENABLED = os.getenv("RICHBOT_EMBED_WARMUP", "1") == "1"
+
+# Pertanyaan yang paling sering masuk: di-embed pas startup, jadi udah ada di query cache
+WARMUP_QUESTIONS = [
+    "siapa richard?",
+    "apa saja proyeknya?",
+    "dia kuliah di mana?",
+    "skill apa yang dia punya?",
+    "ceritain pengalaman kerjanya dong",
+    "sertifikasi apa aja yang dimiliki?",
+    "apa hobinya?",
+    "gimana cara menghubungi dia?",
+]
+
+_services = {}
+_services_lock = threading.Lock()
+
+class _EmbeddingRequest:
+    def __init__(self, texts):
+        self.texts = texts
+        self.vectors = None
+        self.error = None
+        self.done = threading.Event()
+
+# --- 1. SHARED EMBEDDINGS: Satu model per proses, dipakai bareng semua dokumen & session ---
+class SharedEmbeddings(Embeddings):
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._query_cache = OrderedDict()  # query ternormalisasi -> vector, urutan = LRU
+        self._query_cache_lock = threading.Lock()
+        self._query_hits = 0
+        self._query_misses = 0
+        self._warmup = None
+
+    def _load_model(self):
+        return create_embedding_model(self.model_name)
+
+    def get_model(self):
+        # Lazy load + double-checked locking: model ~1 GB cuma di-load sekali
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def is_loaded(self):
+        return self._model is not None
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run_worker, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    # --- 2. MICRO-BATCHING: Gabungin request dari session yang barengan jadi satu forward pass ---
+    def _collect_batch(self):
+        batch = [self._requests.get()]
+        total_texts = len(batch[0].texts)
+        deadline = time.monotonic() + MICRO_BATCH_WAIT_MS / 1000
+
+        while total_texts < MICRO_BATCH_MAX_TEXTS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            total_texts += len(request.texts)
+
+        return batch
+
+    def _run_worker(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = self.get_model().embed_documents(texts)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+
+            offset = 0
+            for request in batch:
+                request.vectors = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.done.set()
+
+    def _embed_batched(self, texts):
+        self._ensure_worker()
+        request = _EmbeddingRequest(texts)
+        self._requests.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.vectors
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        cache = get_embedding_cache()
+        if cache is None:
+            return self._embed_batched(texts)
+
+        # Chunk yang isinya udah pernah di-embed (dokumen lama / versi sebelumnya) gak di-embed ulang
+        model_id = embedding_model_id(self.model_name)
+        hashes = [text_hash(text) for text in texts]
+        vectors = cache.get_many(model_id, hashes)
+
+        missing = [i for i, key in enumerate(hashes) if key not in vectors]
+        if missing:
+            new_vectors = self._embed_batched([texts[i] for i in missing])
+            cache.put_many(model_id, [(hashes[i], vector) for i, vector in zip(missing, new_vectors)])
+            for i, vector in zip(missing, new_vectors):
+                vectors[hashes[i]] = vector
+
+        return [vectors[key] for key in hashes]
+
+    # --- 3. QUERY CACHE: Pertanyaan yang sama / cuma beda spasi & huruf besar gak di-embed ulang ---
+    def embed_query(self, text):
+        key = normalize_query(text)
+        with self._query_cache_lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+                self._query_hits += 1
+            else:
+                self._query_misses += 1
+        if vector is not None:
+            increment("embedding.query_cache.hit")
+            return list(vector)
+
+        increment("embedding.query_cache.miss")
+        vector = self._embed_batched([text])[0]
+        with self._query_cache_lock:
+            self._query_cache[key] = tuple(vector)
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def query_cache_stats(self):
+        with self._query_cache_lock:
+            return {"hits": self._query_hits, "misses": self._query_misses, "size": len(self._query_cache)}
+
+    # --- 4. WARMUP: Load model + forward pass pertama di background, sebelum user pertama datang ---
+    def _run_warmup(self, questions):
+        with span("embedding.warmup", questions=len(questions)):
+            # Dummy input dulu: alokasi buffer & inisialisasi kernel kejadian di sini, bukan di query user
+            self.get_model().embed_documents(["warmup"])
+            for question in questions:
+                self.embed_query(question)
+
+    def start_warmup(self, questions=None):
+        if not WARMUP_ENABLED:
+            return None
+        with self._worker_lock:
+            if self._warmup is None:
+                self._warmup = threading.Thread(
+                    target=self._run_warmup, args=(questions or WARMUP_QUESTIONS,), name="embedding-warmup", daemon=True
+                )
+                self._warmup.start()
+        return self._warmup
+
+def normalize_query(text):
+    return normalize_text(text).lower().rstrip("?!. ")
+
+def get_embeddings(model_name):
+    with _services_lock:
+        if model_name not in _services:
+            _services[model_name] = SharedEmbeddings(model_name)
+        return _services[model_name]
@@ -0,0 +1,74 @@
+import os
+import time
+import random
+import hashlib
+import threading
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FAKE_TTFT_MS = float(os.getenv("RICHBOT_FAKE_TTFT_MS", "300"))
+FAKE_TOKENS_PER_SECOND = float(os.getenv("RICHBOT_FAKE_TOKENS_PER_SECOND", "40"))
+FAKE_PREFILL_TOKENS_PER_SECOND = float(os.getenv("RICHBOT_FAKE_PREFILL_TOKENS_PER_SECOND", "5000"))
+
+FAKE_VOCABULARY = (
+    "Oke, jadi gini. Richard punya pengalaman di bidang data dan AI, "
+    "termasuk beberapa proyek keren seperti chatbot, prediksi, dan analisis sentimen. "
+    "Mau aku ceritain lebih dalam soal salah satunya?"
+).split()
+
+# Simulasi prefix/KV cache: system prompt yang udah pernah diproses gak kena biaya prefill lagi
+_fake_prefix_cache = set()
+_fake_prefix_cache_lock = threading.Lock()
+
+# --- FAKE CHAT MODEL: Streaming token dengan TTFT & kecepatan yang bisa diatur ---
+class FakeChatModel(BaseChatModel):
+    model: str = "fake-richbot"
+    temperature: float = 0.7
+    top_p: float = 0.7
+    max_tokens: int = 256
+    ttft_ms: float = FAKE_TTFT_MS
+    tokens_per_second: float = FAKE_TOKENS_PER_SECOND
+    prefill_tokens_per_second: float = FAKE_PREFILL_TOKENS_PER_SECOND
+
+    @property
+    def _llm_type(self):
+        return "fake-richbot"
+
+    def _tokens(self, messages):
+        # Deterministik: seed dari isi prompt, jadi prompt yang sama -> jawaban yang sama
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        length = min(self.max_tokens, 24 + rng.randint(0, 40))
+        return [rng.choice(FAKE_VOCABULARY) + " " for _ in range(length)]
+
+    def _prefill_seconds(self, messages):
+        if self.prefill_tokens_per_second <= 0:
+            return 0.0
+        uncached_tokens = 0
+        for message in messages:
+            tokens = len(str(message.content).split())
+            if isinstance(message, SystemMessage):
+                key = hashlib.sha256(str(message.content).encode("utf-8")).hexdigest()
+                with _fake_prefix_cache_lock:
+                    if key in _fake_prefix_cache:
+                        continue
+                    _fake_prefix_cache.add(key)
+            uncached_tokens += tokens
+        return uncached_tokens / self.prefill_tokens_per_second
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.ttft_ms / 1000 + self._prefill_seconds(messages))
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for i, token in enumerate(self._tokens(messages)):
+            if i and delay:
+                time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
@@ -0,0 +1,203 @@
+import re
+import threading
+from functools import lru_cache
+from collections import Counter
+from langchain_core.documents import Document
+from embedding_cache import text_hash
+
+SUB_CHUNKING = "subchunk-v1"  # Masuk ke index key, naikkan kalau logika sub-chunk berubah
+PARENT_ID_PREFIX = "parent:"
+PARENT_EXPAND_MIN_HITS = 2
+TOP_BULLET = "• "
+NESTED_BULLETS = ("o ", "- ")
+
+def section_title(parent_text):
+    lines = [line.strip() for line in parent_text.split("\n") if line.strip()]
+    for line in lines:
+        if re.match(r'\d+\.\s', line):
+            return line
+    return lines[0] if lines else ""
+
+# --- 1. SUB-CHUNKING: Bullet (+ nested bullet-nya) atau kalimat jadi unit embedding sendiri ---
+def split_units(parent_text):
+    title = section_title(parent_text)
+    units = []
+    current = None
+    past_title = False
+
+    for line in parent_text.split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if not past_title:
+            past_title = stripped == title
+            continue
+
+        if stripped.startswith(TOP_BULLET):
+            current = [stripped]
+            units.append(current)
+        elif line.startswith(" ") and stripped.startswith(NESTED_BULLETS) and current is not None:
+            # Nested bullet ('o' / '-') nempel ke bullet induknya
+            current.append(line.rstrip())
+        else:
+            current = None
+            units.extend([sentence] for sentence in re.split(r"(?<=[.!?])\s+", stripped) if sentence.strip())
+
+    return title, ["\n".join(unit) for unit in units]
+
+def create_sub_chunks(parents):
+    texts, metadatas = [], []
+    for parent_id, parent_text in enumerate(parents):
+        title, units = split_units(parent_text)
+        # Section tanpa isi (cuma judul) tetap di-index pakai teks utuhnya
+        for unit in units or [parent_text]:
+            texts.append(f"{title}\n{unit}" if unit != parent_text else unit)
+            metadatas.append({"parent_id": parent_id, "section": title})
+    return texts, metadatas
+
+def sub_chunk_ids(texts):
+    # ID stabil berbasis isi: chunk yang sama di versi dokumen berikutnya dapat ID yang sama
+    seen = Counter()
+    ids = []
+    for text in texts:
+        key = text_hash(text)[:32]
+        ids.append(f"{key}-{seen[key]}")
+        seen[key] += 1
+    return ids
+
+def _parent_documents(parents):
+    return {
+        f"{PARENT_ID_PREFIX}{parent_id}": Document(page_content=parent_text, metadata={"parent_id": parent_id})
+        for parent_id, parent_text in enumerate(parents)
+    }
+
+@lru_cache(maxsize=None)
+def vector_store_class():
+    # Dibuat lazy: import langchain_community / faiss baru kejadian pas index beneran dipakai
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+
+    class SectionFAISS(FAISS):
+        # FAISS LangChain + relevance_for_docs, interface yang sama dengan shared_corpus.ProfileStore
+        _positions = None
+        _positions_lock = threading.Lock()
+
+        def _position_map(self):
+            # id(doc) -> posisi vector-nya; dibangun sekali pas query pertama (index udah gak diubah lagi)
+            if self._positions is None:
+                with self._positions_lock:
+                    if self._positions is None:
+                        self._positions = {
+                            id(self.docstore.search(doc_id)): position
+                            for position, doc_id in self.index_to_docstore_id.items()
+                        }
+            return self._positions
+
+        def relevance_for_docs(self, query_vector, docs):
+            # Skor relevance 0..1 (skala sama dengan similarity_search_with_relevance_scores) buat doc tertentu
+            import numpy as np
+
+            positions = self._position_map()
+            vector = np.asarray(query_vector, dtype=np.float32)
+            if self._normalize_L2:
+                vector = vector / np.linalg.norm(vector)
+            stored = np.stack([self.index.reconstruct(positions[id(doc)]) for doc in docs])
+            if self.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+                scores = stored @ vector
+            else:
+                # IndexFlatL2 balikin squared L2, relevance fn LangChain juga ngitung dari situ
+                scores = ((stored - vector) ** 2).sum(axis=1)
+            relevance = self._select_relevance_score_fn()
+            return [relevance(float(score)) for score in scores]
+
+    return SectionFAISS
+
+def build_vector_store(parents, embeddings):
+    texts, metadatas = create_sub_chunks(parents)
+    vector_store = vector_store_class().from_texts(texts=texts, embedding=embeddings, metadatas=metadatas, ids=sub_chunk_ids(texts))
+    # Parent section disimpan di docstore aja (gak di-embed), dipanggil kalau perlu
+    vector_store.docstore.add(_parent_documents(parents))
+    return vector_store
+
+# --- 1.1. INCREMENTAL RE-INDEX: Patch index versi sebelumnya, cuma chunk yang berubah ---
+def patch_vector_store(previous, parents, embeddings):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    # Copy dulu: index lama mungkin masih dipakai session lain
+    vector_store = vector_store_class()(
+        embedding_function=embeddings,
+        index=faiss.clone_index(previous.index),
+        docstore=InMemoryDocstore(dict(previous.docstore._dict)),
+        index_to_docstore_id=dict(previous.index_to_docstore_id),
+    )
+
+    texts, metadatas = create_sub_chunks(parents)
+    new_ids = sub_chunk_ids(texts)
+    old_ids = set(vector_store.index_to_docstore_id.values())
+
+    new_id_set = set(new_ids)
+    removed = [doc_id for doc_id in old_ids if doc_id not in new_id_set]
+    if removed:
+        vector_store.delete(ids=removed)
+
+    added = [i for i, doc_id in enumerate(new_ids) if doc_id not in old_ids]
+    if added:
+        vector_store.add_texts(
+            texts=[texts[i] for i in added],
+            metadatas=[metadatas[i] for i in added],
+            ids=[new_ids[i] for i in added],
+        )
+
+    # Chunk yang sama tapi pindah section: cukup update metadata, vector-nya tetap
+    for doc_id, text, metadata in zip(new_ids, texts, metadatas):
+        vector_store.docstore._dict[doc_id] = Document(page_content=text, metadata=metadata)
+
+    for key in [key for key in vector_store.docstore._dict if key.startswith(PARENT_ID_PREFIX)]:
+        del vector_store.docstore._dict[key]
+    vector_store.docstore.add(_parent_documents(parents))
+
+    return vector_store, len(added), len(removed)
+
+def get_parents(vector_store):
+    parents = []
+    parent_id = 0
+    while True:
+        doc = vector_store.docstore.search(f"{PARENT_ID_PREFIX}{parent_id}")
+        if not isinstance(doc, Document):
+            return parents
+        parents.append(doc.page_content)
+        parent_id += 1
+
+# --- 2. PARENT LOOKUP: Hit kecil -> section induk ---
+def expand_hits(vector_store, docs, min_hits=PARENT_EXPAND_MIN_HITS):
+    groups = {}
+    order = []
+    for doc in docs:
+        parent_id = doc.metadata.get("parent_id")
+        if parent_id is None:
+            # Index lama / non-hierarki: apa adanya
+            order.append(doc)
+            continue
+        if parent_id not in groups:
+            groups[parent_id] = []
+            order.append(parent_id)
+        groups[parent_id].append(doc)
+
+    expanded = []
+    for item in order:
+        if isinstance(item, Document):
+            expanded.append(item)
+            continue
+
+        hits = groups[item]
+        parent = vector_store.docstore.search(f"{PARENT_ID_PREFIX}{item}")
+        if len(hits) >= min_hits and isinstance(parent, Document):
+            # Banyak hit di section yang sama -> pertanyaannya soal section itu, kirim utuh
+            expanded.append(parent)
+        else:
+            title = hits[0].metadata.get("section", "")
+            bodies = [doc.page_content[len(title):].strip() if doc.page_content.startswith(title) else doc.page_content for doc in hits]
+            expanded.append(Document(page_content="\n".join([title] + bodies), metadata={"parent_id": item, "section": title}))
+
+    return expanded
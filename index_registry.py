@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from tracing import increment, set_gauge, span
+
+INDEX_REGISTRY_MAX_BYTES = int(os.getenv("RICHBOT_INDEX_REGISTRY_MAX_MB", "512")) * 1024 * 1024
+INDEX_REGISTRY_MAX_ENTRIES = int(os.getenv("RICHBOT_INDEX_REGISTRY_MAX_ENTRIES", "32"))
+SESSION_IDLE_SECONDS = int(os.getenv("RICHBOT_SESSION_IDLE_SECONDS", "1800"))
+SWEEP_INTERVAL_SECONDS = 60
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def estimate_index_bytes(value):
+    # Vector float32 di FAISS + teks di docstore; cukup buat policy eviction
+    vector_store = getattr(value, "vectorstore", value)
+    index = vector_store.index
+    text_bytes = sum(len(doc.page_content.encode("utf-8")) for doc in vector_store.docstore._dict.values())
+    # Profil corpus bersama gak punya vector sendiri (tinggal di index corpus), cuma teks
+    vector_bytes = getattr(vector_store, "vector_bytes", index.ntotal * index.d * 4)
+    return vector_bytes + text_bytes
+
+class _Loading:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = 0  # Entry _loading dihapus pas waiter terakhir selesai (termasuk kalau loader error)
+
+class _Entry:
+    def __init__(self, value, nbytes):
+        self.value = value
+        self.nbytes = nbytes
+        self.refs = 0
+
+# --- 1. INDEX REGISTRY: Satu index per dokumen per proses, di-refcount per session ---
+class IndexRegistry:
+    def __init__(self, max_bytes=INDEX_REGISTRY_MAX_BYTES, max_entries=INDEX_REGISTRY_MAX_ENTRIES,
+                 idle_seconds=SESSION_IDLE_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self._entries = OrderedDict()  # key -> _Entry, urutan = LRU
+        self._sessions = {}  # session_id -> (key, last_seen)
+        self._loading = {}  # key -> _Loading, biar index yang sama gak di-build dua kali barengan
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evictions = 0
+
+    def get(self, key, loader, session_id=None):
+        # Index yang udah di-evict di-load ulang lewat loader (disk cache / build ulang), transparan buat caller
+        with self._lock:
+            self._sweep_idle()
+            entry = self._entries.get(key)
+            if entry is not None:
+                increment("index_registry.hit")
+                return self._use(key, session_id)
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = _Loading()
+            loading.waiters += 1
+
+        try:
+            with loading.lock:
+                with self._lock:
+                    if key in self._entries:
+                        # Udah di-load caller lain selagi nunggu
+                        return self._use(key, session_id)
+                increment("index_registry.miss")
+                with span("index_registry.load"):
+                    value = loader()
+                entry = _Entry(value, estimate_index_bytes(value))
+
+                # Dimasukin selagi load lock masih dipegang: waiter berikutnya pasti nemu entry-nya
+                with self._lock:
+                    # Session yang masih nunjuk ke key ini (mis. sebelum di-evict) dihitung ulang
+                    entry.refs = sum(1 for session_key, _ in self._sessions.values() if session_key == key)
+                    self._entries[key] = entry
+                    return self._use(key, session_id)
+        finally:
+            with self._lock:
+                loading.waiters -= 1
+                if loading.waiters == 0 and self._loading.get(key) is loading:
+                    del self._loading[key]
+
+    def peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def release(self, session_id):
+        with self._lock:
+            self._drop_session(session_id)
+            self._evict()
+            self._update_gauges()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "indexes": len(self._entries),
+                "bytes": sum(entry.nbytes for entry in self._entries.values()),
+                "sessions": len(self._sessions),
+                "evictions": self.evictions,
+            }
+
+    # --- 2. REFCOUNT & EVICTION (dipanggil dengan lock dipegang) ---
+    def _use(self, key, session_id):
+        self._entries.move_to_end(key)
+        self._touch(session_id, key)
+        self._evict(keep=key)
+        self._update_gauges()
+        return self._entries[key].value
+
+    def _touch(self, session_id, key):
+        if session_id is None:
+            return
+        previous = self._sessions.get(session_id)
+        if previous is None or previous[0] != key:
+            self._drop_session(session_id)
+            if key in self._entries:
+                self._entries[key].refs += 1
+        self._sessions[session_id] = (key, time.monotonic())
+
+    def _drop_session(self, session_id):
+        previous = self._sessions.pop(session_id, None)
+        if previous is not None and previous[0] in self._entries:
+            self._entries[previous[0]].refs -= 1
+
+    def _sweep_idle(self):
+        now = time.monotonic()
+        if now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        idle = [session_id for session_id, (_, last_seen) in self._sessions.items() if now - last_seen > self.idle_seconds]
+        for session_id in idle:
+            self._drop_session(session_id)
+        if idle:
+            increment("index_registry.session_expired", len(idle))
+            self._evict()
+            self._update_gauges()
+
+    def _evict(self, keep=None):
+        total_bytes = sum(entry.nbytes for entry in self._entries.values())
+        while len(self._entries) > 1 and (total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            # Index tanpa session aktif duluan (LRU); kalau masih kelewat, yang masih dipakai pun di-evict
+            candidates = [key for key in self._entries if key != keep]
+            unused = [key for key in candidates if self._entries[key].refs <= 0]
+            if not candidates:
+                break
+            victim = (unused or candidates)[0]
+            total_bytes -= self._entries.pop(victim).nbytes
+            self.evictions += 1
+            increment("index_registry.evicted")
+
+    def _update_gauges(self):
+        set_gauge("index_registry.indexes", len(self._entries))
+        set_gauge("index_registry.bytes", sum(entry.nbytes for entry in self._entries.values()))
+        set_gauge("index_registry.sessions", len(self._sessions))
+
+def get_index_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = IndexRegistry()
+        return _registry
@@ -0,0 +1,128 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from bm25 import get_bm25_index
+from hierarchy import PARENT_ID_PREFIX, build_vector_store, get_parents, patch_vector_store, vector_store_class
+from tracing import span
+
+INDEX_CACHE_DIR = os.getenv("RICHBOT_INDEX_DIR", ".index_cache")
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+
+# --- 1. CACHE KEY ---
+def compute_index_key(doc_bytes, model_name, chunking):
+    # Key = isi dokumen + model embedding + setting chunking.
+    # Ganti salah satunya -> index lama otomatis gak kepake lagi.
+    hasher = hashlib.sha256()
+    hasher.update(doc_bytes)
+    hasher.update(b"\0" + model_name.encode("utf-8"))
+    hasher.update(b"\0" + chunking.encode("utf-8"))
+    return hasher.hexdigest()
+
+def index_path(key):
+    return os.path.join(INDEX_CACHE_DIR, key)
+
+# --- 2. LOAD ---
+def _read_faiss_index(path):
+    import faiss
+
+    # Coba memory-map dulu biar start-up gak perlu baca semua vector ke RAM
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except (RuntimeError, AttributeError):
+        return faiss.read_index(path)
+
+def load_index(key, embeddings):
+    path = index_path(key)
+    if not os.path.exists(os.path.join(path, CHUNKS_FILE)):
+        return None
+
+    # Import berat (faiss, langchain_community) baru kejadian pas index beneran dipakai
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
+
+    try:
+        with open(os.path.join(path, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        records, parents = payload["chunks"], payload["parents"]
+        index = _read_faiss_index(os.path.join(path, INDEX_FILE))
+    except (OSError, ValueError, KeyError, TypeError, RuntimeError):
+        # Cache rusak / setengah jadi -> anggap miss, nanti di-build ulang
+        return None
+
+    if index.ntotal != len(records):
+        return None
+
+    docstore = InMemoryDocstore({
+        record["id"]: Document(page_content=record["text"], metadata=record.get("metadata", {}))
+        for record in records
+    })
+    docstore.add({
+        f"{PARENT_ID_PREFIX}{parent_id}": Document(page_content=text, metadata={"parent_id": parent_id})
+        for parent_id, text in enumerate(parents)
+    })
+    index_to_docstore_id = {i: record["id"] for i, record in enumerate(records)}
+
+    return vector_store_class()(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+# --- 3. SAVE ---
+def save_index(key, vector_store):
+    import faiss
+
+    os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+
+    records = []
+    for i in range(vector_store.index.ntotal):
+        doc_id = vector_store.index_to_docstore_id[i]
+        doc = vector_store.docstore.search(doc_id)
+        records.append({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata})
+
+    # Tulis ke folder sementara dulu lalu rename, supaya replica lain
+    # gak pernah baca index yang setengah ketulis
+    tmp_path = tempfile.mkdtemp(prefix=f"{key}.", dir=INDEX_CACHE_DIR)
+    try:
+        faiss.write_index(vector_store.index, os.path.join(tmp_path, INDEX_FILE))
+        with open(os.path.join(tmp_path, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"chunks": records, "parents": get_parents(vector_store)}, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path(key))
+    except OSError:
+        # Biasanya karena proses lain udah duluan nyimpen key yang sama
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def load_or_build_index(key, embeddings, build_chunks, previous=None, job=None):
+    # job (opsional, dari ingestion queue): progress per stage & cancel di sela-sela batch embedding
+    with span("index.load"):
+        vector_store = load_index(key, embeddings)
+    if vector_store is not None:
+        get_bm25_index(vector_store)
+        return vector_store, True
+
+    parents = build_chunks()
+    build_embeddings = embeddings
+    if job is not None:
+        job.set_stage("embed")
+        build_embeddings = job.track_embeddings(embeddings)
+    with span("index.embed", sections=len(parents)) as embed_span:
+        if previous is not None:
+            # Versi dokumen sebelumnya ada -> patch (add/remove by id), bukan build dari nol
+            vector_store, added, removed = patch_vector_store(previous, parents, build_embeddings)
+            embed_span.set(incremental=True, added=added, removed=removed)
+        else:
+            vector_store = build_vector_store(parents, build_embeddings)
+        embed_span.set(chunks=vector_store.index.ntotal)
+    if job is not None:
+        # Query nanti lewat embeddings asli, bukan wrapper job
+        vector_store.embedding_function = embeddings
+        job.set_stage("index")
+    with span("index.save"):
+        save_index(key, vector_store)
+    # Inverted index BM25 dibangun di samping FAISS, dari sub-chunk yang sama
+    get_bm25_index(vector_store)
+    return vector_store, False
@@ -0,0 +1,133 @@
+import os
+import io
+import glob
+import time
+import hashlib
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from backends import create_embedding_model, embedding_model_id
+from chatbot_logic import CHUNK_PATTERN, EMBEDDING_MODEL, create_logical_chunks
+from docx_stream import DOCX_PARSER, iter_lines
+from hierarchy import SUB_CHUNKING, create_sub_chunks, sub_chunk_ids
+from shared_corpus import CORPUS_DIR, CORPUS_TRAIN_SIZE, SharedCorpus
+
+SAVE_EVERY_PROFILES = 500
+
+# --- 1. WORKER: Parse + chunk + embed satu profil (tiap proses punya model sendiri) ---
+_worker_embeddings = None
+
+def _init_worker(model_name, threads):
+    global _worker_embeddings
+    _worker_embeddings = create_embedding_model(model_name, threads=threads)
+
+def process_profile(path, profile_id, doc_hash):
+    with contextlib.redirect_stdout(io.StringIO()):
+        parents = create_logical_chunks(iter_lines(path))
+    texts, metadatas = create_sub_chunks(parents)
+    # float16 biar transfer antar proses setengah ukuran; dinormalisasi ulang di index
+    vectors = np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float16)
+    return {
+        "profile_id": profile_id,
+        "doc_hash": doc_hash,
+        "parents": parents,
+        "texts": texts,
+        "metadatas": metadatas,
+        "doc_ids": sub_chunk_ids(texts),
+        "vectors": vectors,
+    }
+
+def file_hash(path):
+    # Setting parser & chunking ikut di-hash: kalau berubah, profil di-ingest ulang
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        hasher.update(f.read())
+    hasher.update(f"\0{CHUNK_PATTERN}|{SUB_CHUNKING}|{DOCX_PARSER}".encode("utf-8"))
+    return hasher.hexdigest()
+
+def list_profiles(directory):
+    # profile_id = path relatif tanpa ekstensi, mis. "divisi-a/budi"
+    paths = sorted(glob.glob(os.path.join(directory, "**", "*.docx"), recursive=True))
+    return [(path, os.path.splitext(os.path.relpath(path, directory))[0].replace(os.sep, "/")) for path in paths]
+
+# --- 2. BULK INGEST: Index di-train sekali dari sampel, lalu semua profil di-add ---
+def ingest(directory, corpus_dir, workers, threads):
+    corpus = SharedCorpus(corpus_dir, embedding_model_id(EMBEDDING_MODEL))
+    jobs = []
+    skipped = 0
+    for path, profile_id in list_profiles(directory):
+        doc_hash = file_hash(path)
+        if corpus.is_current(profile_id, doc_hash):
+            skipped += 1
+        else:
+            jobs.append((path, profile_id, doc_hash))
+    print(f"{len(jobs)} profile(s) to ingest, {skipped} unchanged.")
+
+    pending = []  # Hasil yang nunggu index di-train
+    added = chunks = failed = 0
+    started = time.perf_counter()
+
+    def add(result):
+        nonlocal added, chunks
+        corpus.add_profile(
+            result["profile_id"], result["doc_hash"], result["parents"], result["texts"],
+            result["metadatas"], result["doc_ids"], result["vectors"],
+        )
+        added += 1
+        chunks += len(result["texts"])
+        if added % SAVE_EVERY_PROFILES == 0:
+            corpus.save()
+            elapsed = time.perf_counter() - started
+            print(f"{added}/{len(jobs)} profiles, {chunks} chunks ({chunks / elapsed:.1f} chunks/s)")
+
+    def train_and_flush():
+        if not corpus.is_trained:
+            corpus.train(np.concatenate([result["vectors"] for result in pending]))
+        for result in pending:
+            add(result)
+        pending.clear()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(EMBEDDING_MODEL, threads)) as pool:
+        futures = {pool.submit(process_profile, *job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Failed to ingest {futures[future][0]}: {e}")
+                continue
+            if not result["texts"]:
+                continue
+            if corpus.is_trained:
+                add(result)
+            else:
+                pending.append(result)
+                if sum(len(item["texts"]) for item in pending) >= CORPUS_TRAIN_SIZE:
+                    train_and_flush()
+
+    if pending:
+        train_and_flush()
+    corpus.save()
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {added} profile(s), {chunks} chunks, {failed} failed in {elapsed:.1f}s.")
+    return added, failed
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Bulk ingest folder .docx profil ke corpus bersama.")
+    parser.add_argument("directory", help="Folder berisi file .docx (di-scan rekursif)")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR or "corpus", help="Default: RICHBOT_CORPUS_DIR atau ./corpus")
+    parser.add_argument("--workers", type=int, default=max(1, cpus // 2))
+    parser.add_argument("--threads", type=int, default=0, help="Thread embedding per worker (default: CPU / workers)")
+    args = parser.parse_args()
+
+    # Biar worker gak rebutan core: total thread ~ jumlah CPU
+    threads = args.threads or max(1, cpus // args.workers)
+    _, failed = ingest(args.directory, args.corpus_dir, args.workers, threads)
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import os
+import time
+import uuid
+import queue
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from tracing import increment, observe, set_gauge
+
+INGEST_WORKERS = int(os.getenv("RICHBOT_INGEST_WORKERS", "2"))  # Dokumen yang diproses barengan per proses
+INGEST_MAX_PENDING = int(os.getenv("RICHBOT_INGEST_MAX_PENDING", "32"))  # Lebih dari ini upload baru ditolak
+INGEST_EMBED_BATCH = int(os.getenv("RICHBOT_INGEST_EMBED_BATCH", "32"))  # Progress & titik cancel per batch embedding
+INGEST_KEEP_FINISHED = 256  # Job yang udah selesai tetap bisa di-poll statusnya
+STAGES = ("parse", "chunk", "embed", "index")
+
+_ingestion_queue = None
+_ingestion_queue_lock = threading.Lock()
+
+class IngestionCancelled(RuntimeError):
+    pass
+
+class IngestionQueueFull(RuntimeError):
+    pass
+
+# --- 1. JOB: Status, progress per stage & cancel; dibaca dari thread UI / API, di-update dari worker ---
+class IngestJob:
+    def __init__(self, work, size, name=None):
+        self.id = uuid.uuid4().hex
+        self.work = work  # work(job) -> result, jalan di thread worker
+        self.size = size
+        self.name = name
+        self.state = "queued"  # queued -> running -> done / failed / cancelled
+        self.stage = None
+        self.stage_progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    @property
+    def progress(self):
+        # 0..1 keseluruhan: tiap stage dapat porsi yang sama
+        if self.state == "done":
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        return (STAGES.index(self.stage) + self.stage_progress) / len(STAGES)
+
+    def set_stage(self, stage):
+        # Batas antar stage = titik cancel
+        self.check_cancelled()
+        self.stage = stage
+        self.stage_progress = 0.0
+
+    def set_progress(self, fraction):
+        self.check_cancelled()
+        self.stage_progress = min(1.0, max(0.0, fraction))
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise IngestionCancelled("Ingestion cancelled.")
+
+    def cancel(self):
+        # Job yang masih antri langsung selesai; yang lagi jalan berhenti di titik cancel berikutnya
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._cancelled.set()
+            queued = self.state == "queued"
+        if queued:
+            self._finish("cancelled")
+        return True
+
+    def track_embeddings(self, embeddings):
+        return _TrackedEmbeddings(embeddings, self)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    async def wait_async(self):
+        # Nunggu lewat future yang di-resolve dari thread worker, gak makan thread executor
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(job):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(job))
+
+        self.add_done_callback(resolve)
+        return await future
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _start(self):
+        with self._lock:
+            if self.state != "queued" or self._cancelled.is_set():
+                return False
+            self.state = "running"
+            self.started_at = time.time()
+            return True
+
+    def _finish(self, state, result=None, error=None):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            # Closure work (doc_bytes, index versi sebelumnya) gak ikut ketahan selama job masih bisa di-poll
+            self.work = None
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        increment(f"ingest.{state}")
+        if self.started_at is not None:
+            observe("ingest.duration", (self.finished_at - self.started_at) * 1000)
+        for callback in callbacks:
+            callback(self)
+
+    def to_dict(self):
+        payload = {
+            "job_id": self.id,
+            "name": self.name,
+            "bytes": self.size,
+            "state": self.state,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+        }
+        if self.state == "done":
+            payload["result"] = self.result
+        elif self.state == "failed":
+            payload["error"] = str(self.error)
+        return payload
+
+class _TrackedEmbeddings(Embeddings):
+    # Embedding dokumen dipecah per batch: progress stage embed + titik cancel.
+    # Batch kecil juga bikin query embedding session lain gak nunggu satu forward pass segede dokumen.
+    def __init__(self, embeddings, job):
+        self.embeddings = embeddings
+        self.job = job
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = []
+        for start in range(0, len(texts), INGEST_EMBED_BATCH):
+            self.job.check_cancelled()
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + INGEST_EMBED_BATCH]))
+            self.job.set_progress(len(vectors) / len(texts))
+        return vectors
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+# --- 2. QUEUE: Worker pool terbatas, dokumen kecil duluan ---
+class IngestionQueue:
+    def __init__(self, workers=INGEST_WORKERS, max_pending=INGEST_MAX_PENDING, prioritize_small=True):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.prioritize_small = prioritize_small
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._jobs = OrderedDict()  # job_id -> job, urutan = submit
+        self._threads = []
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, work, size, name=None):
+        job = IngestJob(work, size, name)
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                increment("ingest.rejected")
+                raise IngestionQueueFull(f"Too many documents waiting to be processed ({self.max_pending}). Try again later.")
+            self._jobs[job.id] = job
+            self._prune()
+            self._ensure_workers()
+            # Profil kecil (kebanyakan upload) gak ketahan di belakang dokumen besar; urutan submit buat tie-break
+            self._queue.put((size if self.prioritize_small else 0, next(self._order), job))
+            self._update_gauges()
+        increment("ingest.submitted")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel()
+        with self._lock:
+            self._update_gauges()
+        return job
+
+    def stats(self):
+        with self._lock:
+            return {"queued": self._pending(), "running": self._running, "workers": self.workers}
+
+    def _run_worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if not job._start():
+                continue  # Udah di-cancel selagi antri
+            with self._lock:
+                self._running += 1
+                self._update_gauges()
+            observe("ingest.queue_wait", (job.started_at - job.created_at) * 1000)
+            try:
+                job._finish("done", result=job.work(job))
+            except IngestionCancelled:
+                job._finish("cancelled")
+            except Exception as e:
+                job._finish("failed", error=e)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._update_gauges()
+
+    # --- 2.1. HOUSEKEEPING (dipanggil dengan lock dipegang) ---
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if job.state == "queued")
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run_worker, name=f"ingest-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - INGEST_KEEP_FINISHED)]:
+            del self._jobs[job_id]
+
+    def _update_gauges(self):
+        set_gauge("ingest.queued", self._pending())
+        set_gauge("ingest.running", self._running)
+
+def get_ingestion_queue():
+    global _ingestion_queue
+    with _ingestion_queue_lock:
+        if _ingestion_queue is None:
+            _ingestion_queue = IngestionQueue()
+        return _ingestion_queue
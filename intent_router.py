@@ -0,0 +1,131 @@
+import re
+import threading
+import numpy as np
+from hierarchy import get_parents, section_title
+
+CENTROID_THRESHOLD = 0.80
+MAX_FAST_PATH_WORDS = 8  # Pertanyaan panjang hampir pasti pertanyaan konten -> lewat RAG
+MAX_TOPICS = 6
+
+INTENT_EXAMPLES = {
+    "meta": [
+        "kamu bisa apa?",
+        "kamu bisa kasi tau aku apa aja?",
+        "apa aja yang bisa kamu ceritain?",
+        "kamu tau apa aja?",
+        "what can you do?",
+    ],
+    "navigation": [
+        "next kita mau bahas apa?",
+        "apalagi yang menarik?",
+        "bahas apa lagi?",
+        "topik lain dong",
+        "terus apa lagi?",
+    ],
+    "acknowledgement": [
+        "menarik",
+        "hmm oke",
+        "oke sip",
+        "wah keren",
+        "mantap",
+    ],
+}
+
+KEYWORD_RULES = [
+    # Meta cuma kalau pertanyaannya utuh soal kemampuan bot; "kamu tau apa hobinya?" tetap lewat RAG
+    ("meta", re.compile(
+        r"^(kamu|km|lu|lo|kau) (bisa|tau|tahu) (apa|ngapain)( aja| saja)?$"
+        r"|^(kamu|km|lu|lo|kau) bisa (kasi|kasih) tau (aku |gue |gw |saya )?apa( aja| saja)?$"
+        r"|^apa (aja|saja) yang (bisa|kamu bisa) (kamu |km |lu |lo )?(ceritain|ceritakan|jelasin|bahas)$"
+        r"|^what can you (do|tell me)$"
+    )),
+    # Navigasi juga harus utuh: "ceritain apa lagi soal proyeknya" nyebut topik -> pertanyaan konten, lewat RAG
+    ("navigation", re.compile(
+        r"^(next |terus |trus |lalu |abis ini |habis ini )?(kita )?(mau |bisa )?(bahas|ngobrol|ngobrolin|cerita|ceritain) apa( ?lagi)?( nih| dong| ya)?$"
+        r"|^(terus |trus |lalu )?apa ?lagi( yang menarik| yang seru)?( nih| dong| ya)?$"
+        r"|^(ada )?topik lain( dong| nih| ya| gak| ga| nggak)?$"
+    )),
+    ("acknowledgement", re.compile(
+        r"^(hmm+|hm+|oke+|ok|okay|sip|mantap|menarik|keren|wow|wah|nice|oh|oalah|siap|asik)"
+        r"( (hmm+|oke+|ok|deh|sih|banget|juga|ya|keren|menarik|sip|mantap))*$"
+    )),
+]
+
+TEMPLATES = {
+    "meta": "Aku bisa ceritain banyak hal dari profil ini. Mulai dari {topics}. Kita mulai dari mana enaknya?",
+    "navigation": "Masih banyak lho yang bisa kita bahas! Ada topik soal {topics}. Kamu tertarik sama yang mana?",
+    "acknowledgement": "Asiik, kalau kamu tertarik! Mau lanjut liat bagian lain dari profilnya, atau ada pertanyaan spesifik mungkin?",
+}
+
+_centroids = {}
+_centroids_lock = threading.Lock()
+
+def _normalize_question(question):
+    return re.sub(r"[^\w\s]", " ", question.lower()).split()
+
+# --- 1. CLASSIFIER: Keyword rules dulu, baru nearest-centroid pakai embedding yang udah ada ---
+def match_rules(question):
+    words = _normalize_question(question)
+    if not words or len(words) > MAX_FAST_PATH_WORDS:
+        return None
+    text = " ".join(words)
+    for intent, pattern in KEYWORD_RULES:
+        if pattern.search(text):
+            return intent
+    return None
+
+def _get_centroids(embeddings):
+    # Contoh kalimat per intent cuma di-embed sekali per model
+    key = id(embeddings)
+    if key not in _centroids:
+        with _centroids_lock:
+            if key not in _centroids:
+                centroids = {}
+                for intent, examples in INTENT_EXAMPLES.items():
+                    vectors = np.asarray(embeddings.embed_documents(examples), dtype=np.float32)
+                    centroid = vectors.mean(axis=0)
+                    centroids[intent] = centroid / (np.linalg.norm(centroid) or 1.0)
+                _centroids[key] = centroids
+    return _centroids[key]
+
+def match_centroid(question, query_vector, embeddings, threshold=CENTROID_THRESHOLD):
+    if len(_normalize_question(question)) > MAX_FAST_PATH_WORDS:
+        return None
+
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+
+    best_intent, best_score = None, threshold
+    for intent, centroid in _get_centroids(embeddings).items():
+        score = float(np.dot(centroid, query_vector))
+        if score >= best_score:
+            best_intent, best_score = intent, score
+    return best_intent
+
+# --- 2. TEMPLATE ANSWER: Diisi judul section dari create_logical_chunks ---
+def section_topics(vector_store):
+    topics = []
+    for parent in get_parents(vector_store):
+        title = re.sub(r'^\d+\.\s*', '', section_title(parent)).strip()
+        if title and title not in topics:
+            topics.append(title)
+    return topics
+
+def _join_topics(topics):
+    if len(topics) <= 1:
+        return "".join(topics)
+    return ", ".join(topics[:-1]) + ", sampai " + topics[-1]
+
+def answer_intent(intent, vector_store, recent_history):
+    topics = section_topics(vector_store)
+    if intent == "navigation":
+        # Tawarkan topik yang belum kesebut di percakapan terakhir
+        discussed = " ".join(turn["user"] + " " + turn["bot"] for turn in recent_history).lower()
+        fresh = [topic for topic in topics if topic.lower() not in discussed]
+        topics = (fresh or topics)[:3]
+    else:
+        topics = topics[:MAX_TOPICS]
+
+    if "{topics}" in TEMPLATES[intent] and not topics:
+        return None
+    return TEMPLATES[intent].format(topics=_join_topics(topics))
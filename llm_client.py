@@ -0,0 +1,97 @@
+import os
+import json
+import threading
+
+# Endpoint OpenAI-compatible (NVIDIA API Catalog, NIM lokal, atau stub server buat testing)
+LLM_BASE_URL = os.getenv("RICHBOT_LLM_BASE_URL", "https://integrate.api.nvidia.com/v1")
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("RICHBOT_LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_READ_TIMEOUT_S = float(os.getenv("RICHBOT_LLM_READ_TIMEOUT_S", "60"))
+LLM_POOL_SIZE = int(os.getenv("RICHBOT_LLM_POOL_SIZE", "32"))
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+_session = None
+_session_lock = threading.Lock()
+
+class LLMHTTPError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"LLM endpoint returned HTTP {status}: {body[:200]}")
+        self.status = status
+        self.retryable = status in RETRYABLE_STATUS
+
+def get_session():
+    # Satu session per proses: koneksi keep-alive (TLS) dipakai ulang semua request & session user
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=LLM_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+def to_openai_messages(prompt):
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return [{"role": MESSAGE_ROLES.get(message.type, "user"), "content": str(message.content)} for message in prompt]
+
+# --- CHAT COMPLETIONS CLIENT: Streaming SSE lewat connection pool bersama ---
+class ChatCompletionsClient:
+    def __init__(self, model, temperature=0.7, top_p=0.7, max_tokens=256, base_url=None, api_key=None):
+        self.model = model
+        self.temperature = temperature
+        self.top_p = top_p
+        self.max_tokens = max_tokens
+        self.base_url = (base_url or LLM_BASE_URL).rstrip("/")
+        self.api_key = api_key or os.getenv("NVIDIA_API_KEY")
+
+    def _headers(self):
+        headers = {"Accept": "text/event-stream", "Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def open_stream(self, prompt):
+        # Dipisah dari read_stream biar gateway bisa nutup response dari thread lain (attempt di-cancel)
+        payload = {
+            "model": self.model,
+            "messages": to_openai_messages(prompt),
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens,
+            "stream": True,
+        }
+        response = get_session().post(
+            f"{self.base_url}/chat/completions", json=payload, headers=self._headers(),
+            stream=True, timeout=(LLM_CONNECT_TIMEOUT_S, LLM_READ_TIMEOUT_S),
+        )
+        return response
+
+    def read_stream(self, response):
+        from langchain_core.messages import AIMessageChunk
+
+        # Close response = koneksi balik ke pool (atau diputus kalau stream belum habis)
+        with response:
+            if response.status_code >= 400:
+                raise LLMHTTPError(response.status_code, response.text)
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield AIMessageChunk(content=content)
+
+    def stream(self, prompt):
+        yield from self.read_stream(self.open_stream(prompt))
+
+    def invoke(self, prompt):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content="".join(chunk.content for chunk in self.stream(prompt)))
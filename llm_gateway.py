@@ -0,0 +1,272 @@
+import os
+import time
+import queue
+import random
+import threading
+from backends import create_chat_model
+from tracing import increment, observe, set_gauge
+
+LLM_MAX_CONCURRENCY = int(os.getenv("RICHBOT_LLM_MAX_CONCURRENCY", "16"))  # Request LLM in-flight per proses
+LLM_TTFT_DEADLINE_S = float(os.getenv("RICHBOT_LLM_TTFT_DEADLINE_S", "8"))
+LLM_TOTAL_DEADLINE_S = float(os.getenv("RICHBOT_LLM_TOTAL_DEADLINE_S", "60"))
+LLM_MAX_RETRIES = int(os.getenv("RICHBOT_LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_S = 0.5
+LLM_RETRY_MAX_S = 4.0
+# Kalau primary kelewat TTFT deadline, request yang sama dikirim juga ke model ini; yang duluan jawab dipakai
+LLM_FALLBACK_MODEL = os.getenv("RICHBOT_LLM_FALLBACK_MODEL") or None
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+class LLMTimeoutError(TimeoutError):
+    pass
+
+class LLMOverloadedError(RuntimeError):
+    pass
+
+class _RetryableError(Exception):
+    def __init__(self, cause):
+        super().__init__(str(cause))
+        self.cause = cause
+
+def is_retryable(error):
+    # Error HTTP punya flag sendiri; error koneksi / timeout (OSError, termasuk requests) di-retry
+    return getattr(error, "retryable", isinstance(error, OSError))
+
+def backoff_seconds(attempt):
+    # Exponential backoff + full jitter, biar retry dari banyak session gak barengan
+    return random.uniform(0, min(LLM_RETRY_MAX_S, LLM_RETRY_BASE_S * 2 ** attempt))
+
+# --- 1. ATTEMPT: Satu request ke satu model, jalan di thread sendiri, chunk dikirim lewat queue ---
+class _Attempt:
+    def __init__(self, gateway, client, prompt, events):
+        self.gateway = gateway
+        self.client = client
+        self.prompt = prompt
+        self.events = events
+        self.cancelled = threading.Event()
+        self.response = None  # Response HTTP yang lagi dibaca (kalau client-nya expose), ditutup pas cancel
+        self.released = False
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"llm-{client.model}", daemon=True)
+
+    def _chunks(self):
+        open_stream = getattr(self.client, "open_stream", None)
+        if open_stream is None:
+            return self.client.stream(self.prompt)
+        response = open_stream(self.prompt)
+        with self._lock:
+            self.response = response
+        if self.cancelled.is_set():
+            response.close()
+        return self.client.read_stream(response)
+
+    def _run(self):
+        try:
+            for chunk in self._chunks():
+                if self.cancelled.is_set():
+                    return
+                self.events.put((self, "chunk", chunk))
+            self.events.put((self, "done", None))
+        except Exception as e:
+            self.events.put((self, "error", e))
+        finally:
+            self._release()
+
+    def _release(self):
+        # Slot dilepas sekali per attempt: pas di-cancel (walau thread-nya masih nyangkut di upstream) atau pas selesai
+        with self._lock:
+            if self.released:
+                return
+            self.released = True
+        self.gateway._release()
+
+    def cancel(self):
+        # Attempt yang ditinggal (TTFT miss, kalah hedge, caller berhenti) langsung balikin slot-nya;
+        # response ditutup biar thread yang nunggu token berhenti & koneksinya gak nganggur
+        self.cancelled.set()
+        with self._lock:
+            response = self.response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+        self._release()
+
+# --- 2. GATEWAY: Client di-pool, semaphore global, deadline TTFT/total, retry & hedging ---
+class LLMGateway:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, ttft_deadline=LLM_TTFT_DEADLINE_S,
+                 total_deadline=LLM_TOTAL_DEADLINE_S, max_retries=LLM_MAX_RETRIES, fallback_model=LLM_FALLBACK_MODEL,
+                 client_factory=create_chat_model):
+        self.client_factory = client_factory  # (model, temperature=, top_p=, max_tokens=) -> client dengan .stream()
+        self.max_concurrency = max_concurrency
+        self.ttft_deadline = ttft_deadline
+        self.total_deadline = total_deadline
+        self.max_retries = max_retries
+        self.fallback_model = fallback_model
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+
+    def llm(self, model, temperature=0.7, top_p=0.7, max_tokens=256):
+        return GatewayLLM(self, model, temperature, top_p, max_tokens)
+
+    def client(self, model, temperature, top_p, max_tokens):
+        # Client dipakai ulang per (model, sampling), bukan dibuat ulang tiap rerun / request
+        key = (model, float(temperature), float(top_p), int(max_tokens))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self.client_factory(model, temperature=key[1], top_p=key[2], max_tokens=key[3])
+                self._clients[key] = client
+            return client
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": self._in_flight, "queued": self._queued, "max_concurrency": self.max_concurrency}
+
+    # --- 2.1. CONCURRENCY LIMIT ---
+    def _acquire(self, deadline, blocking=True):
+        with self._lock:
+            self._queued += 1
+            self._update_gauges()
+        started = time.monotonic()
+        acquired = False
+        try:
+            acquired = self._semaphore.acquire(timeout=max(0.0, deadline - started)) if blocking else self._semaphore.acquire(blocking=False)
+        finally:
+            with self._lock:
+                self._queued -= 1
+                if acquired:
+                    self._in_flight += 1
+                self._update_gauges()
+        if blocking:
+            observe("llm.queue_wait", (time.monotonic() - started) * 1000)
+        return acquired
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._update_gauges()
+        self._semaphore.release()
+
+    def _update_gauges(self):
+        set_gauge("llm.in_flight", self._in_flight)
+        set_gauge("llm.queued", self._queued)
+
+    def _launch(self, model, handle, prompt, events, deadline, hedge=False):
+        if not self._acquire(deadline, blocking=not hedge):
+            if hedge:
+                # Lagi penuh: hedge malah nambah beban, jadi di-skip
+                increment("llm.hedge_skipped")
+                return None
+            increment("llm.rejected")
+            raise LLMOverloadedError(f"No LLM slot available within the deadline ({self.max_concurrency} in flight).")
+        attempt = _Attempt(self, self.client(model, handle.temperature, handle.top_p, handle.max_tokens), prompt, events)
+        attempt.thread.start()
+        return attempt
+
+    # --- 2.2. RACE: Primary (+ hedge ke fallback kalau TTFT kelewat), yang token pertamanya duluan menang ---
+    def _race(self, handle, prompt, deadline):
+        events = queue.Queue()
+        running = [self._launch(handle.model, handle, prompt, events, deadline)]
+        started = time.monotonic()
+        ttft_at = started + self.ttft_deadline
+        winner = None
+        ttft_missed = False
+
+        try:
+            while True:
+                now = time.monotonic()
+                wait_until = deadline if winner is not None or ttft_missed else min(ttft_at, deadline)
+                try:
+                    source, kind, payload = events.get(timeout=max(0.0, wait_until - now))
+                except queue.Empty:
+                    if time.monotonic() >= deadline:
+                        increment("llm.deadline_exceeded")
+                        if winner is None:
+                            raise LLMTimeoutError(f"No response from the LLM within {self.total_deadline:g}s.")
+                        raise LLMTimeoutError(f"LLM response exceeded the {self.total_deadline:g}s deadline.")
+                    ttft_missed = True
+                    increment("llm.ttft_deadline_missed")
+                    if self.fallback_model is None or self.fallback_model == handle.model:
+                        # Tanpa fallback: request lambat dibatalin & di-retry
+                        raise _RetryableError(LLMTimeoutError(f"No first token within {self.ttft_deadline:g}s."))
+                    hedge = self._launch(self.fallback_model, handle, prompt, events, deadline, hedge=True)
+                    if hedge is not None:
+                        increment("llm.hedge")
+                        running.append(hedge)
+                    continue
+
+                if winner is not None and source is not winner:
+                    continue  # Sisa chunk dari request yang kalah
+                if kind == "error":
+                    if source is winner:
+                        raise payload  # Udah ada token yang terkirim, gak bisa di-retry
+                    running.remove(source)
+                    if running:
+                        continue  # Masih ada request lain (hedge / primary) yang jalan
+                    raise _RetryableError(payload) if is_retryable(payload) else payload
+
+                if winner is None:
+                    winner = source
+                    for attempt in running:
+                        if attempt is not winner:
+                            attempt.cancel()
+                    # TTFT upstream per race (setelah dapat slot); llm.ttft end-to-end dicatat caller
+                    observe("llm.gateway.ttft", (time.monotonic() - started) * 1000)
+                    if source.client.model != handle.model:
+                        increment("llm.hedge_won")
+                if kind == "done":
+                    return
+                yield payload
+        finally:
+            # Caller berhenti baca (mis. client disconnect) / error -> semua request dibatalin
+            for attempt in running:
+                attempt.cancel()
+
+    def stream(self, handle, prompt):
+        deadline = time.monotonic() + self.total_deadline
+        attempt = 0
+        while True:
+            try:
+                yield from self._race(handle, prompt, deadline)
+                return
+            except _RetryableError as e:
+                delay = backoff_seconds(attempt)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    increment("llm.failed")
+                    raise e.cause
+                attempt += 1
+                increment("llm.retry")
+                time.sleep(delay)
+
+# --- 3. HANDLE: Interface yang sama dengan chat model LangChain (stream / invoke) ---
+class GatewayLLM:
+    def __init__(self, gateway, model, temperature, top_p, max_tokens):
+        self.gateway = gateway
+        self.model = model
+        self.temperature = temperature
+        self.top_p = top_p
+        self.max_tokens = max_tokens
+
+    def stream(self, prompt):
+        return self.gateway.stream(self, prompt)
+
+    def invoke(self, prompt):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content="".join(chunk.content for chunk in self.stream(prompt)))
+
+def get_llm_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+def get_llm(model, temperature=0.7, top_p=0.7, max_tokens=256):
+    return get_llm_gateway().llm(model, temperature, top_p, max_tokens)
@@ -0,0 +1,59 @@
+from bm25 import get_bm25_index, is_decisive, reciprocal_rank_fusion
+from hierarchy import expand_hits
+from tracing import span
+
+# Index (FAISS + BM25) di-share antar session & gak pernah diubah per request.
+# Opsi per request (k, score_threshold) selalu dikirim per call, bukan disimpan di object yang di-share.
+
+# --- 1. RETRIEVAL: Pisahin embedding query & FAISS search biar latency-nya kelihatan per stage ---
+def embed_query(vector_store, query):
+    with span("retrieval.embed_query"):
+        return vector_store.embeddings.embed_query(query)
+
+def lexical_search(vector_store, query, k):
+    # Return (docs, decisive). Decisive = exact match jelas, hasil BM25 langsung dipakai tanpa embedding
+    with span("retrieval.bm25", k=k) as bm25_span:
+        hits = get_bm25_index(vector_store).search(query, k)
+        decisive = is_decisive(hits, k)
+        bm25_span.set(hits=len(hits), decisive=decisive)
+    return [doc for doc, _ in hits], decisive
+
+def vector_search(vector_store, query_vector, k, score_threshold=None):
+    with span("retrieval.faiss_search", k=k) as search_span:
+        if score_threshold is None:
+            docs = vector_store.similarity_search_by_vector(query_vector, k=k)
+        else:
+            # Skor relevance 0..1 (sesuai distance strategy index), hit di bawah threshold dibuang
+            relevance = vector_store._select_relevance_score_fn()
+            docs = [
+                doc for doc, score in vector_store.similarity_search_with_score_by_vector(query_vector, k=k)
+                if relevance(score) >= score_threshold
+            ]
+        search_span.set(hits=len(docs))
+    return docs
+
+def retrieve(vector_store, query, k, score_threshold=None, query_vector=None, lexical=None):
+    lexical_docs, decisive = lexical if lexical is not None else lexical_search(vector_store, query, k)
+    if decisive and score_threshold is None:
+        docs = lexical_docs
+    else:
+        # Threshold diukur pakai relevance vector, jadi kalau di-set jalur decisive tetap butuh embedding query
+        if query_vector is None:
+            query_vector = embed_query(vector_store, query)
+        vector_docs = vector_search(vector_store, query_vector, k, score_threshold)
+        if score_threshold is not None and lexical_docs:
+            # Hit BM25 juga harus lolos threshold yang sama, jangan nyelonong lewat fusion
+            # relevance_for_docs disediain tiap store (FAISS per dokumen & profil corpus bersama)
+            relevance = vector_store.relevance_for_docs(query_vector, lexical_docs)
+            lexical_docs = [doc for doc, score in zip(lexical_docs, relevance) if score >= score_threshold]
+
+        # Hybrid: gabung ranking vector & BM25 pakai reciprocal-rank fusion
+        with span("retrieval.fuse"):
+            docs = reciprocal_rank_fusion([vector_docs, lexical_docs], k)
+
+    # Hit sub-chunk -> dikelompokkan per section induk (section utuh cuma kalau perlu)
+    with span("retrieval.expand_parents") as expand_span:
+        docs = expand_hits(vector_store, docs)
+        expand_span.set(sections=len(docs))
+
+    return docs
@@ -0,0 +1,307 @@
+import os
+import json
+import math
+import sqlite3
+import threading
+import numpy as np
+from tracing import increment, span
+
+# Mode corpus bersama: semua profil di satu index IVF terkompresi + filter per profil.
+# Kosong = mati (tiap dokumen punya index FAISS sendiri).
+CORPUS_DIR = os.getenv("RICHBOT_CORPUS_DIR")
+CORPUS_ENCODING = os.getenv("RICHBOT_CORPUS_ENCODING", "SQ8")  # SQ8 (int8) / SQfp16 (float16) / PQ<m>
+# Kosong = otomatis (nlist / CORPUS_NPROBE_DIVISOR, fallback ke semua list kalau hit profilnya kurang); 0 = selalu semua list
+CORPUS_NPROBE = int(os.getenv("RICHBOT_CORPUS_NPROBE")) if os.getenv("RICHBOT_CORPUS_NPROBE") else None
+CORPUS_NPROBE_DIVISOR = 16
+CORPUS_TRAIN_SIZE = int(os.getenv("RICHBOT_CORPUS_TRAIN_SIZE", "50000"))
+CORPUS_KEY_PREFIX = "corpus:"
+INDEX_FILE = "corpus.faiss"  # Corpus lama (sebelum ada generation)
+DB_FILE = "corpus.sqlite"
+
+def index_factory_string(n_vectors, encoding=CORPUS_ENCODING):
+    # nlist ~ 4 * sqrt(N), tapi tiap list butuh cukup vector training (~39 per centroid)
+    nlist = max(1, min(65536, int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39))
+    if encoding.startswith("PQ") and n_vectors < 256:
+        # PQ 8-bit butuh minimal 256 vector buat training codebook
+        encoding = "SQ8"
+    return f"IVF{nlist},{encoding}"
+
+def default_nprobe(nlist):
+    return max(1, nlist // CORPUS_NPROBE_DIVISOR)
+
+def index_file_name(generation):
+    # Tiap save nulis file baru; metadata SQLite nunjuk ke generation yang index-nya cocok
+    return f"corpus.{generation}.faiss" if generation is not None else INDEX_FILE
+
+def normalize_vectors(vectors):
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+# --- 1. SHARED CORPUS: Satu index IVF untuk semua profil, teks & metadata di SQLite (bukan di RAM) ---
+class SharedCorpus:
+    def __init__(self, path, model_id, embeddings=None):
+        self.path = path
+        self.model_id = model_id
+        self.embeddings = embeddings
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(path, DB_FILE), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " profile_id TEXT PRIMARY KEY, doc_hash TEXT NOT NULL, id_start INTEGER NOT NULL, id_end INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " id INTEGER PRIMARY KEY, profile_id TEXT NOT NULL, doc_id TEXT NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS chunks_profile ON chunks (profile_id);"
+            "CREATE TABLE IF NOT EXISTS parents ("
+            " profile_id TEXT NOT NULL, parent_id INTEGER NOT NULL, text TEXT NOT NULL, PRIMARY KEY (profile_id, parent_id));"
+        )
+
+        stored_model = self._meta("model_id")
+        if stored_model is None:
+            self._set_meta("model_id", model_id)
+            self._db.commit()
+        elif stored_model != model_id:
+            # Vector dari model lain gak bisa dicampur di index yang sama
+            raise ValueError(f"Corpus at {path} was built with '{stored_model}', not '{model_id}'.")
+
+        self.index = None
+        self.generation = False  # Belum pernah di-load (None = corpus lama tanpa generation)
+        self._refresh()
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _refresh(self):
+        # Dipanggil dengan lock dipegang (atau dari __init__). Proses lain (ingest_corpus.py) yang nge-save
+        # naikin generation -> index di-load ulang, jadi index & metadata SQLite yang dibaca selalu sepasang
+        generation = self._meta("generation")
+        if generation == self.generation:
+            return
+        index_path = os.path.join(self.path, index_file_name(generation))
+        if os.path.exists(index_path):
+            import faiss
+            try:
+                self.index = faiss.read_index(index_path)
+            except RuntimeError:
+                # File generation ini barusan diganti writer; coba lagi di call berikutnya
+                return
+            increment("corpus.reload")
+        self.generation = generation
+
+    # --- 2. INGESTION ---
+    @property
+    def is_trained(self):
+        return self.index is not None
+
+    @property
+    def factory(self):
+        return self._meta("factory")
+
+    def train(self, vectors, encoding=CORPUS_ENCODING):
+        import faiss
+
+        vectors = normalize_vectors(vectors)
+        factory = index_factory_string(len(vectors), encoding)
+        with span("corpus.train", vectors=len(vectors), factory=factory):
+            index = faiss.index_factory(vectors.shape[1], factory, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        with self._lock:
+            self.index = index
+            self._set_meta("factory", factory)
+
+    def profile_hash(self, profile_id):
+        with self._lock:
+            self._refresh()
+            row = self._db.execute("SELECT doc_hash FROM profiles WHERE profile_id = ?", (profile_id,)).fetchone()
+        return row[0] if row else None
+
+    def is_current(self, profile_id, doc_hash):
+        return self.profile_hash(profile_id) == doc_hash
+
+    def has_profile(self, profile_id):
+        return self.profile_hash(profile_id) is not None
+
+    def add_profile(self, profile_id, doc_hash, parents, texts, metadatas, doc_ids, vectors):
+        import faiss
+
+        if self.index is None:
+            raise RuntimeError("Corpus index is not trained yet.")
+        vectors = normalize_vectors(vectors)
+
+        with self._lock:
+            # ID chunk satu profil selalu berurutan -> filter per profil cukup pakai IDSelectorRange
+            id_start = self._db.execute("SELECT COALESCE(MAX(id_end), 0) FROM profiles").fetchone()[0]
+            id_end = id_start + len(texts)
+
+            previous = self._db.execute(
+                "SELECT id_start, id_end FROM profiles WHERE profile_id = ?", (profile_id,)
+            ).fetchone()
+            if previous is not None:
+                self.index.remove_ids(faiss.IDSelectorRange(previous[0], previous[1]))
+                self._db.execute("DELETE FROM chunks WHERE profile_id = ?", (profile_id,))
+                self._db.execute("DELETE FROM parents WHERE profile_id = ?", (profile_id,))
+
+            self.index.add_with_ids(vectors, np.arange(id_start, id_end, dtype=np.int64))
+            self._db.executemany(
+                "INSERT INTO chunks (id, profile_id, doc_id, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (id_start + i, profile_id, doc_id, text, json.dumps(metadata, ensure_ascii=False))
+                    for i, (doc_id, text, metadata) in enumerate(zip(doc_ids, texts, metadatas))
+                ],
+            )
+            self._db.executemany(
+                "INSERT INTO parents (profile_id, parent_id, text) VALUES (?, ?, ?)",
+                [(profile_id, parent_id, text) for parent_id, text in enumerate(parents)],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO profiles (profile_id, doc_hash, id_start, id_end) VALUES (?, ?, ?, ?)",
+                (profile_id, doc_hash, id_start, id_end),
+            )
+        return id_start, id_end
+
+    def save(self):
+        import faiss
+
+        # Index ditulis ke file generation baru, baru metadata + generation di-commit bareng.
+        # Reader yang belum lihat commit-nya tetap pakai pasangan index & metadata lama.
+        with self._lock:
+            with span("corpus.save", vectors=self.index.ntotal if self.index is not None else 0):
+                previous = self.generation
+                if self.index is not None:
+                    generation = str(int(self._meta("generation") or 0) + 1)
+                    tmp_path = os.path.join(self.path, f"{index_file_name(generation)}.tmp")
+                    faiss.write_index(self.index, tmp_path)
+                    os.replace(tmp_path, os.path.join(self.path, index_file_name(generation)))
+                    self._set_meta("generation", generation)
+                    self.generation = generation
+                self._db.commit()
+            if self.generation != previous and previous is not False:
+                # Reader yang masih load file lama bakal gagal sekali lalu ambil generation baru
+                try:
+                    os.remove(os.path.join(self.path, index_file_name(previous)))
+                except OSError:
+                    pass
+
+    # --- 3. QUERY: Filter ke satu profil di dalam index bersama ---
+    def search(self, id_start, id_end, query_vector, k, nprobe=CORPUS_NPROBE):
+        import faiss
+
+        with self._lock:
+            self._refresh()
+            index = self.index
+        query = normalize_vectors(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))
+        nlist = faiss.extract_index_ivf(index).nlist
+        probes = default_nprobe(nlist) if nprobe is None else (nprobe if nprobe > 0 else nlist)
+
+        with span("corpus.search", k=k, nprobe=probes) as search_span:
+            hits = self._search(index, id_start, id_end, query, k, probes)
+            if nprobe is None and probes < nlist and len(hits) < min(k, id_end - id_start):
+                # Chunk profil ini kebanyakan di list yang gak di-probe -> ulang dengan semua list
+                increment("corpus.nprobe_fallback")
+                search_span.set(fallback=True)
+                hits = self._search(index, id_start, id_end, query, k, nlist)
+        return hits
+
+    def score_ids(self, query_vector, ids):
+        # Skor inner product query ke chunk tertentu (mis. hit BM25), dari vector terkompresi yang sama dengan search
+        import faiss
+
+        with self._lock:
+            self._refresh()
+            index = self.index
+        query = normalize_vectors(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))
+        ids = np.asarray(ids, dtype=np.int64)
+        selector = faiss.IDSelectorBatch(ids)
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=faiss.extract_index_ivf(index).nlist)
+        with span("corpus.score_ids", ids=len(ids)):
+            scores, found = index.search(query, len(ids), params=params)
+        by_id = {int(chunk_id): float(score) for chunk_id, score in zip(found[0], scores[0]) if chunk_id >= 0}
+        return [by_id.get(int(chunk_id)) for chunk_id in ids]
+
+    def _search(self, index, id_start, id_end, query, k, nprobe):
+        import faiss
+
+        # Chunk satu profil tersebar di banyak list; selector bikin chunk profil lain di-skip tanpa hitung distance
+        params = faiss.SearchParametersIVF(sel=faiss.IDSelectorRange(id_start, id_end), nprobe=nprobe)
+        scores, ids = index.search(query, k, params=params)
+        return [(int(chunk_id), float(score)) for chunk_id, score in zip(ids[0], scores[0]) if chunk_id >= 0]
+
+    def profile_store(self, profile_id):
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_core.documents import Document
+        from hierarchy import PARENT_ID_PREFIX
+
+        with self._lock:
+            self._refresh()
+            profile = self._db.execute(
+                "SELECT id_start, id_end FROM profiles WHERE profile_id = ?", (profile_id,)
+            ).fetchone()
+            if profile is None:
+                raise LookupError(f"Profile '{profile_id}' not found in corpus.")
+            chunks = self._db.execute(
+                "SELECT id, doc_id, text, metadata FROM chunks WHERE profile_id = ? ORDER BY id", (profile_id,)
+            ).fetchall()
+            parents = self._db.execute(
+                "SELECT parent_id, text FROM parents WHERE profile_id = ? ORDER BY parent_id", (profile_id,)
+            ).fetchall()
+
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=text, metadata=json.loads(metadata)) for _, doc_id, text, metadata in chunks
+        })
+        docstore.add({
+            f"{PARENT_ID_PREFIX}{parent_id}": Document(page_content=text, metadata={"parent_id": parent_id})
+            for parent_id, text in parents
+        })
+        return ProfileStore(self, profile[0], profile[1], docstore, {chunk_id: doc_id for chunk_id, doc_id, _, _ in chunks})
+
+class _ProfileIndexInfo:
+    def __init__(self, ntotal, d):
+        self.ntotal = ntotal
+        self.d = d
+
+# --- 4. PROFILE VIEW: Interface yang sama dengan vector store FAISS yang dipakai retrieval.py & hierarchy.py ---
+class ProfileStore:
+    def __init__(self, corpus, id_start, id_end, docstore, faiss_id_to_doc_id):
+        self.corpus = corpus
+        self.embeddings = corpus.embeddings
+        self.id_start = id_start
+        self.id_end = id_end
+        self.docstore = docstore
+        self._faiss_id_to_doc_id = faiss_id_to_doc_id
+        self.index_to_docstore_id = dict(enumerate(faiss_id_to_doc_id.values()))
+        self.index = _ProfileIndexInfo(id_end - id_start, corpus.index.d)
+        self.vector_bytes = 0  # Vector-nya di index corpus bersama, bukan punya view ini
+        self._chunk_ids = {
+            id(docstore.search(doc_id)): chunk_id for chunk_id, doc_id in faiss_id_to_doc_id.items()
+        }
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        hits = self.corpus.search(self.id_start, self.id_end, embedding, k)
+        return [(self.docstore.search(self._faiss_id_to_doc_id[chunk_id]), score) for chunk_id, score in hits]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def _select_relevance_score_fn(self):
+        # Inner product vector ternormalisasi = cosine similarity
+        return lambda score: max(0.0, score)
+
+    def relevance_for_docs(self, query_vector, docs):
+        # Sama dengan hierarchy.SectionFAISS.relevance_for_docs: skala relevance yang sama dengan search
+        relevance = self._select_relevance_score_fn()
+        scores = self.corpus.score_ids(query_vector, [self._chunk_ids[id(doc)] for doc in docs])
+        return [relevance(score) if score is not None else 0.0 for score in scores]
+
+def open_corpus(embeddings, model_id, path=None):
+    path = path or CORPUS_DIR
+    return SharedCorpus(path, model_id, embeddings) if path else None
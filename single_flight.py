@@ -0,0 +1,166 @@
+import asyncio
+import threading
+from tracing import increment, set_gauge
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+class FlightCancelled(RuntimeError):
+    pass
+
+class _Flight:
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.waiters = set()  # (loop, asyncio.Event) subscriber async
+        self.condition = threading.Condition()
+
+    def _notify(self):
+        # Dipanggil dengan condition dipegang
+        self.condition.notify_all()
+        for loop, event in self.waiters:
+            loop.call_soon_threadsafe(event.set)
+
+# --- 1. SINGLE FLIGHT: Request identik yang lagi jalan barengan share satu generation upstream ---
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, key, start):
+        # start() -> iterator chunk upstream, cuma dipanggil sekali per flight (oleh leader).
+        # Return (flight, leader); chunk dibaca lewat read() / aread().
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            with flight.condition:
+                flight.subscribers += 1
+            set_gauge("single_flight.in_flight", len(self._flights))
+
+        if leader:
+            increment("single_flight.leader")
+            threading.Thread(target=self._produce, args=(key, flight, start), name="single-flight", daemon=True).start()
+        else:
+            increment("single_flight.coalesced")
+        return flight, leader
+
+    def _finish(self, key, flight, error=None):
+        # Lock registry dulu baru condition (urutan sama dengan subscribe)
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            set_gauge("single_flight.in_flight", len(self._flights))
+            with flight.condition:
+                flight.done = True
+                flight.error = error
+                flight._notify()
+
+    def _produce(self, key, flight, start):
+        upstream = None
+        try:
+            upstream = start()
+            for chunk in upstream:
+                with self._lock, flight.condition:
+                    if flight.subscribers == 0:
+                        # Semua subscriber udah pergi (mis. disconnect): generation dihentikan
+                        increment("single_flight.abandoned")
+                        if self._flights.get(key) is flight:
+                            del self._flights[key]
+                        set_gauge("single_flight.in_flight", len(self._flights))
+                        flight.done = True
+                        flight.error = FlightCancelled("All subscribers left.")
+                        return
+                    flight.chunks.append(chunk)
+                    flight._notify()
+            self._finish(key, flight)
+        except Exception as e:
+            self._finish(key, flight, e)
+        finally:
+            close = getattr(upstream, "close", None)
+            if close is not None:
+                close()
+
+    # --- 2. READERS: Tiap subscriber dapat stream utuh dari awal (buffer di-replay, lalu live) ---
+    def read(self, flight):
+        index = 0
+        try:
+            while True:
+                with flight.condition:
+                    while index >= len(flight.chunks) and not flight.done:
+                        flight.condition.wait()
+                    ready = flight.chunks[index:]
+                    done, error = flight.done, flight.error
+                index += len(ready)
+                yield from ready
+                if done and index >= len(flight.chunks):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            self._leave(flight)
+
+    async def aread(self, flight):
+        # Nunggu pakai asyncio.Event (di-set dari thread producer), jadi gak makan thread executor per subscriber
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with flight.condition:
+            flight.waiters.add(waiter)
+        index = 0
+        try:
+            while True:
+                with flight.condition:
+                    event.clear()
+                    ready = flight.chunks[index:]
+                    done, error = flight.done, flight.error
+                index += len(ready)
+                for chunk in ready:
+                    yield chunk
+                if done and index >= len(flight.chunks):
+                    if error is not None:
+                        raise error
+                    return
+                if not ready:
+                    await event.wait()
+        finally:
+            with flight.condition:
+                flight.waiters.discard(waiter)
+            self._leave(flight)
+
+    def _leave(self, flight):
+        with flight.condition:
+            flight.subscribers -= 1
+
+def get_single_flight():
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
+
+# --- 3. COALESCED LLM: Interface stream / astream kayak chat model, generation-nya lewat single flight ---
+class CoalescedLLM:
+    def __init__(self, llm, key, single_flight=None):
+        self.llm = llm
+        self.key = key
+        self.single_flight = single_flight or get_single_flight()
+        self.leader = None  # Di-set pas stream dimulai; follower gak perlu nyimpen hasil ke cache
+
+    def __getattr__(self, name):
+        # model / temperature / top_p / max_tokens diambil dari LLM aslinya
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def stream(self, prompt):
+        flight, self.leader = self.single_flight.subscribe(self.key, lambda: self.llm.stream(prompt))
+        return self.single_flight.read(flight)
+
+    def astream(self, prompt):
+        flight, self.leader = self.single_flight.subscribe(self.key, lambda: self.llm.stream(prompt))
+        return self.single_flight.aread(flight)
@@ -0,0 +1,74 @@
+import os
+import time
+import threading
+import requests
+
+TEMPLATE_REFRESH_SECONDS = 6 * 60 * 60
+TEMPLATE_FETCH_TIMEOUT = (3, 10)  # (connect, read) detik
+# Fetch gagal gak nunggu 6 jam: dicoba lagi dengan backoff 30 detik, 1 menit, ... maks 10 menit
+TEMPLATE_RETRY_SECONDS = 30
+TEMPLATE_RETRY_MAX_SECONDS = 10 * 60
+
+# --- Template .docx: file lokal dulu, fallback ke GitHub (fetch di background + ETag) ---
+class TemplateSource:
+    def __init__(self, url, local_path, refresh_seconds=TEMPLATE_REFRESH_SECONDS, retry_seconds=TEMPLATE_RETRY_SECONDS):
+        self.url = url
+        self.local_path = local_path
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.content = None
+        self.etag = None
+        self.fetched_at = 0.0  # Fetch terakhir yang sukses
+        self.retry_at = 0.0
+        self.failures = 0
+        self.last_error = None
+        self._fetching = False
+        self._lock = threading.Lock()
+
+    def _load_local(self):
+        if self.content is None and os.path.exists(self.local_path):
+            with open(self.local_path, "rb") as f:
+                self.content = f.read()
+            self.fetched_at = float("inf")  # File lokal gak perlu di-refresh
+        return self.content
+
+    def _refresh(self):
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        succeeded = False
+        try:
+            response = requests.get(self.url, headers=headers, timeout=TEMPLATE_FETCH_TIMEOUT)
+            if response.status_code == 200:
+                self.content = response.content
+                self.etag = response.headers.get("ETag")
+                succeeded = True
+            elif response.status_code == 304:
+                # Template gak berubah, cukup perpanjang umur cache
+                succeeded = True
+            else:
+                self.last_error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            self.last_error = str(e)
+        finally:
+            with self._lock:
+                now = time.time()
+                if succeeded:
+                    self.fetched_at = now
+                    self.failures = 0
+                    self.last_error = None
+                else:
+                    # Template lama (kalau ada) tetap dipakai; retry lebih cepat dari refresh biasa
+                    self.failures += 1
+                    self.retry_at = now + min(TEMPLATE_RETRY_MAX_SECONDS, self.retry_seconds * 2 ** (self.failures - 1))
+                self._fetching = False
+
+    def get(self):
+        # Gak pernah nunggu network: balikin yang ada sekarang, refresh jalan di thread lain
+        with self._lock:
+            if self._load_local() is not None and self.fetched_at == float("inf"):
+                return self.content
+            now = time.time()
+            is_stale = now - self.fetched_at > self.refresh_seconds and now >= self.retry_at
+            if is_stale and not self._fetching:
+                self._fetching = True
+                threading.Thread(target=self._refresh, name="template-fetch", daemon=True).start()
+            return self.content
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Test jalan offline: backend lokal (fake LLM + hashing embedder), cache di folder sementara
+# biar gak nyentuh .index_cache punya app. Harus di-set sebelum modul app ke-import.
+os.environ.setdefault("RICHBOT_LLM_BACKEND", "fake")
+os.environ.setdefault("RICHBOT_EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("RICHBOT_EMBED_WARMUP", "0")
+_cache_dir = tempfile.mkdtemp(prefix="richbot-tests-")
+os.environ.setdefault("RICHBOT_INDEX_DIR", os.path.join(_cache_dir, "index"))
+os.environ.setdefault("RICHBOT_EMBEDDING_CACHE", os.path.join(_cache_dir, "embeddings.sqlite"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,17 @@
+from answer_cache import SemanticAnswerCache, history_digest
+
+HISTORY = [{"user": "dia kerja di mana?", "bot": "Di perusahaan fintech."}]
+PARAMS = {"model": "m", "temperature": 0.7, "k": 5}
+
+def test_answers_are_scoped_to_the_conversation_summary():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("doc", PARAMS, HISTORY, [1.0, 0.0], "jawaban A", summary="Lagi bahas pengalaman kerja.")
+
+    assert cache.lookup("doc", PARAMS, HISTORY, [1.0, 0.0], summary="Lagi bahas pengalaman kerja.") == "jawaban A"
+    assert cache.lookup("doc", PARAMS, HISTORY, [1.0, 0.0], summary="Lagi bahas pendidikan.") is None
+    assert cache.lookup("doc", PARAMS, HISTORY, [1.0, 0.0]) is None
+
+def test_history_digest_includes_summary():
+    assert history_digest([]) == ""
+    assert history_digest(HISTORY) != history_digest(HISTORY, "ringkasan")
+    assert history_digest([], "ringkasan") != ""
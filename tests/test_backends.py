@@ -0,0 +1,39 @@
+import os
+import sys
+import types
+import pytest
+import backends
+
+def _fake_sentence_transformers(monkeypatch, export):
+    class FakeModel:
+        def __init__(self, name, backend=None):
+            self.name = name
+        def save(self, path):
+            os.makedirs(os.path.join(path, "onnx"), exist_ok=True)
+
+    module = types.SimpleNamespace(SentenceTransformer=FakeModel, export_dynamic_quantized_onnx_model=export)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+def test_quantization_failure_surfaces(tmp_path, monkeypatch):
+    def export(model, quantization, path):
+        raise OSError("disk full")
+    _fake_sentence_transformers(monkeypatch, export)
+    monkeypatch.setattr(backends, "ONNX_MODEL_DIR", str(tmp_path))
+
+    with pytest.raises(OSError, match="disk full"):
+        backends._quantized_onnx_model("org/model", "avx2")
+    assert os.listdir(tmp_path) == []  # Folder export sementara dibersihin
+
+def test_quantized_model_exported_once(tmp_path, monkeypatch):
+    exports = []
+    def export(model, quantization, path):
+        exports.append(quantization)
+        with open(os.path.join(path, "onnx", f"model_qint8_{quantization}.onnx"), "wb") as f:
+            f.write(b"onnx")
+    _fake_sentence_transformers(monkeypatch, export)
+    monkeypatch.setattr(backends, "ONNX_MODEL_DIR", str(tmp_path))
+
+    first = backends._quantized_onnx_model("org/model", "avx2")
+    second = backends._quantized_onnx_model("org/model", "avx2")
+    assert first == second == (str(tmp_path / "org--model"), "onnx/model_qint8_avx2.onnx")
+    assert exports == ["avx2"]
@@ -0,0 +1,38 @@
+from langchain_core.documents import Document
+from context_builder import CONTEXT_SEPARATOR, build_context, split_sentences, trim_to_relevant_sentences
+
+SECTION = (
+    "5. Pengalaman Kerja\n"
+    "• Magang di PT ABC sebagai data analyst. Bikin dashboard penjualan.\n"
+    "• Freelance bikin chatbot RAG untuk UMKM.\n"
+    "• Asisten dosen mata kuliah basis data."
+)
+
+def test_split_keeps_numbered_heading():
+    sentences = split_sentences(SECTION)
+    assert sentences[0] == "5. Pengalaman Kerja"
+    assert "Magang di PT ABC sebagai data analyst." in sentences[1]
+    assert "Bikin dashboard penjualan." in sentences
+
+def test_split_keeps_list_enumerators():
+    assert split_sentences("a. Python dasar. Lanjut ke pandas.") == ["a. Python dasar.", "Lanjut ke pandas."]
+
+def test_trim_keeps_section_title():
+    trimmed = trim_to_relevant_sentences(SECTION, "chatbot rag", max_tokens=30)
+    lines = trimmed.split("\n")
+    assert lines[0] == "5. Pengalaman Kerja"
+    assert any("chatbot RAG" in line for line in lines[1:])
+
+def test_subsumed_part_survives_when_superset_does_not_fit():
+    small = "• Freelance bikin chatbot RAG untuk UMKM."
+    # Satu baris panjang yang isinya nutupin chunk kecil, tapi gak muat & gak bisa di-trim per baris
+    big = " ".join(["Richard juga aktif di banyak organisasi kampus"] * 40) + " " + small
+    context, used = build_context("chatbot", [Document(page_content=small), Document(page_content=big)], token_budget=120)
+    assert context == small
+    assert used > 0
+
+def test_subsumed_part_replaced_when_superset_fits():
+    small = "• Freelance bikin chatbot RAG untuk UMKM."
+    context, _ = build_context("chatbot", [Document(page_content=small), Document(page_content=SECTION)], token_budget=512)
+    assert context == SECTION
+    assert CONTEXT_SEPARATOR not in context
@@ -0,0 +1,12 @@
+import os
+import pytest
+from benchmarks.import_time import DEFAULT_MODULES, measure
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("module", DEFAULT_MODULES)
+def test_no_heavy_modules_imported_eagerly(module, monkeypatch):
+    # Proses Python baru per modul (sama dengan benchmarks/import_time.py); budget waktunya tetap dicek manual
+    monkeypatch.chdir(REPO_ROOT)
+    result = measure(module, samples=1, top=0)
+    assert result["heavy_loaded"] == []
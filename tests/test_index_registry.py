@@ -0,0 +1,101 @@
+import threading
+import time
+from types import SimpleNamespace
+from index_registry import IndexRegistry
+
+def fake_store(nbytes):
+    # Cukup buat estimate_index_bytes: vector_bytes + teks docstore (kosong)
+    return SimpleNamespace(index=SimpleNamespace(ntotal=0, d=0), docstore=SimpleNamespace(_dict={}), vector_bytes=nbytes)
+
+def test_concurrent_gets_load_once():
+    registry = IndexRegistry(max_bytes=1000, max_entries=4)
+    loads = []
+    gate = threading.Event()
+
+    def loader():
+        loads.append(1)
+        gate.wait(5)
+        return fake_store(10)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("doc", loader))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(loads) == 1
+    assert len({id(value) for value in results}) == 1
+
+def test_eviction_prefers_indexes_without_sessions():
+    registry = IndexRegistry(max_bytes=1000, max_entries=2)
+    registry.get("a", lambda: fake_store(10), session_id="s1")
+    registry.get("b", lambda: fake_store(10))
+    registry.get("c", lambda: fake_store(10))
+
+    # "a" paling lama tapi masih dipakai session s1 -> "b" yang di-evict
+    assert registry.peek("a") is not None
+    assert registry.peek("b") is None
+    assert registry.stats()["evictions"] == 1
+
+def test_released_session_makes_index_evictable_and_reloads_transparently():
+    registry = IndexRegistry(max_bytes=25, max_entries=4)
+    registry.get("a", lambda: fake_store(10), session_id="s1")
+    registry.get("b", lambda: fake_store(10), session_id="s2")
+    registry.release("s1")
+    registry.get("c", lambda: fake_store(10), session_id="s3")
+
+    assert registry.peek("a") is None
+    assert registry.peek("b") is not None
+    reloaded = fake_store(10)
+    assert registry.get("a", lambda: reloaded, session_id="s1") is reloaded
+
+def test_session_switching_index_moves_its_reference():
+    registry = IndexRegistry(max_bytes=1000, max_entries=2)
+    registry.get("a", lambda: fake_store(10), session_id="s1")
+    registry.get("b", lambda: fake_store(10), session_id="s1")
+    registry.get("c", lambda: fake_store(10))
+
+    # s1 pindah ke "b": "a" udah gak ada session-nya, jadi dia yang di-evict
+    assert registry.peek("a") is None
+    assert registry.peek("b") is not None
+    assert registry.stats()["sessions"] == 1
+
+def test_failed_load_is_retried_and_cleaned_up():
+    registry = IndexRegistry(max_bytes=1000, max_entries=4)
+
+    def failing():
+        raise OSError("index missing")
+
+    try:
+        registry.get("doc", failing)
+    except OSError:
+        pass
+    assert registry._loading == {}
+    value = fake_store(10)
+    assert registry.get("doc", lambda: value) is value
+    assert registry._loading == {}
+
+def test_waiters_never_load_twice():
+    registry = IndexRegistry(max_bytes=10_000, max_entries=64)
+    loads = []
+    barrier = threading.Barrier(8)
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.01)
+        return fake_store(10)
+
+    def worker():
+        barrier.wait(5)
+        for _ in range(50):
+            registry.get("doc", loader)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(loads) == 1
@@ -0,0 +1,71 @@
+import threading
+import pytest
+import ingestion_queue
+from ingestion_queue import IngestionQueue, IngestionQueueFull
+
+def blocking_work(gate, started=None, result=None):
+    def work(job):
+        if started is not None:
+            started.set()
+        gate.wait(5)
+        return result
+    return work
+
+def test_small_documents_run_first():
+    queue = IngestionQueue(workers=1, max_pending=8)
+    gate, started = threading.Event(), threading.Event()
+    blocker = queue.submit(blocking_work(gate, started), size=1)
+    assert started.wait(5)
+
+    order = []
+    record = lambda name: lambda job: order.append(name)
+    jobs = [queue.submit(record("large"), size=1000), queue.submit(record("small"), size=10)]
+    gate.set()
+    for job in [blocker] + jobs:
+        assert job.wait(5)
+    assert order == ["small", "large"]
+
+def test_cancel_queued_and_running_jobs():
+    queue = IngestionQueue(workers=1, max_pending=8)
+    gate, started = threading.Event(), threading.Event()
+
+    def work(job):
+        started.set()
+        gate.wait(5)
+        job.set_stage("embed")  # Titik cancel berikutnya
+        return "done"
+
+    running = queue.submit(work, size=1)
+    assert started.wait(5)
+    queued = queue.submit(lambda job: "never", size=1)
+
+    assert queue.cancel(queued.id).state == "cancelled"
+    assert queue.stats()["queued"] == 0
+    queue.cancel(running.id)
+    gate.set()
+    assert running.wait(5)
+    assert running.state == "cancelled"
+    assert not queued.cancel()  # Udah selesai, cancel kedua no-op
+
+def test_rejects_when_too_many_pending():
+    queue = IngestionQueue(workers=1, max_pending=1)
+    gate, started = threading.Event(), threading.Event()
+    queue.submit(blocking_work(gate, started), size=1)
+    assert started.wait(5)
+    queue.submit(lambda job: None, size=1)
+    with pytest.raises(IngestionQueueFull):
+        queue.submit(lambda job: None, size=1)
+    gate.set()
+
+def test_finished_jobs_release_work_and_are_pruned(monkeypatch):
+    monkeypatch.setattr(ingestion_queue, "INGEST_KEEP_FINISHED", 2)
+    queue = IngestionQueue(workers=1, max_pending=8)
+    jobs = []
+    for i in range(4):
+        jobs.append(queue.submit(lambda job, i=i: {"chunks": i}, size=1))
+        assert jobs[-1].wait(5)
+
+    assert all(job.work is None for job in jobs)
+    assert jobs[-1].result == {"chunks": 3}
+    # Pas submit terakhir, 3 job udah selesai -> yang paling lama di-prune, sisanya tetap bisa di-poll
+    assert [queue.get(job.id) is not None for job in jobs] == [False, True, True, True]
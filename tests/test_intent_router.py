@@ -0,0 +1,54 @@
+import pytest
+from intent_router import INTENT_EXAMPLES, match_rules
+
+@pytest.mark.parametrize("question", INTENT_EXAMPLES["meta"] + [
+    "Kamu bisa apa aja?",
+    "lu tau apa?",
+    "km bisa ngapain aja",
+    "kamu bisa kasih tau gue apa saja?",
+])
+def test_meta_questions(question):
+    assert match_rules(question) == "meta"
+
+@pytest.mark.parametrize("question", [
+    "kamu tahu apa hobinya?",
+    "kamu tau apa tentang proyek chatbotnya?",
+    "kamu bisa jelasin apa itu RAG?",
+    "lu tau apa aja soal pendidikannya",
+    "what can you tell me about his projects?",
+    "apa saja proyeknya?",
+])
+def test_content_questions_are_not_meta(question):
+    assert match_rules(question) != "meta"
+
+@pytest.mark.parametrize("question", [
+    "next kita mau bahas apa?",
+    "apalagi yang menarik?",
+    "bahas apa lagi?",
+    "topik lain dong",
+    "terus apa lagi?",
+    "ada topik lain gak?",
+])
+def test_navigation_questions(question):
+    assert match_rules(question) == "navigation"
+
+@pytest.mark.parametrize("question", [
+    "next bahas pendidikannya dong",
+    "ceritain apa lagi soal proyeknya",
+    "cerita apa lagi tentang sertifikasinya",
+    "apalagi yang menarik dari proyek chatbot?",
+    "topik lain selain proyek ada?",
+])
+def test_content_questions_are_not_navigation(question):
+    assert match_rules(question) != "navigation"
+
+@pytest.mark.parametrize("question", INTENT_EXAMPLES["acknowledgement"] + ["oke deh", "wah keren banget"])
+def test_acknowledgements(question):
+    assert match_rules(question) == "acknowledgement"
+
+@pytest.mark.parametrize("question", [
+    "menarik, terus dia kuliah di mana?",
+    "oke jelasin proyek chatbotnya",
+])
+def test_acknowledgement_with_question_goes_to_rag(question):
+    assert match_rules(question) is None
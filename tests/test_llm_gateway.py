@@ -0,0 +1,92 @@
+import threading
+import time
+import pytest
+from langchain_core.messages import AIMessageChunk
+from llm_gateway import LLMGateway, LLMTimeoutError
+
+class StallingClient:
+    # Primary gak pernah kirim token (kayak upstream yang nyangkut), fallback langsung jawab
+    def __init__(self, model, release, **params):
+        self.model = model
+        self.release = release
+        self.closed = []
+
+    def stream(self, prompt):
+        if self.model == "fallback":
+            yield AIMessageChunk(content="fallback answer")
+            return
+        if self.model == "trickle":
+            # Token pertama cepat, sisanya nyangkut
+            yield AIMessageChunk(content="first")
+        self.release.wait(5)
+        yield AIMessageChunk(content="late answer")
+
+class ClosableResponse:
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+class ResponseClient:
+    # Client yang expose response HTTP-nya (kayak ChatCompletionsClient)
+    def __init__(self, model, **params):
+        self.model = model
+        self.responses = []
+
+    def open_stream(self, prompt):
+        response = ClosableResponse()
+        self.responses.append(response)
+        return response
+
+    def read_stream(self, response):
+        response.closed.wait(5)
+        raise OSError("connection closed")
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+def make_gateway(release, **kwargs):
+    params = dict(max_concurrency=4, ttft_deadline=0.1, total_deadline=5, max_retries=2)
+    params.update(kwargs)
+    return LLMGateway(client_factory=lambda model, **p: StallingClient(model, release, **p), **params)
+
+def test_ttft_misses_and_retries_release_slots(release, monkeypatch):
+    monkeypatch.setattr("llm_gateway.backoff_seconds", lambda attempt: 0)
+    gateway = make_gateway(release)
+    handle = gateway.llm("primary")
+
+    with pytest.raises(LLMTimeoutError):
+        list(handle.stream("hi"))
+    # Tiga attempt masih nyangkut di upstream, tapi slot-nya udah balik
+    assert gateway.stats()["in_flight"] == 0
+    assert all(gateway._acquire(time.monotonic() + 0.1) for _ in range(4))
+
+def test_lost_hedge_releases_slot(release):
+    gateway = make_gateway(release, fallback_model="fallback")
+    assert "".join(chunk.content for chunk in gateway.llm("primary").stream("hi")) == "fallback answer"
+    assert gateway.stats()["in_flight"] == 0
+
+def test_consumer_close_releases_slot(release):
+    gateway = make_gateway(release)
+    stream = gateway.llm("trickle").stream("hi")
+    assert next(stream).content == "first"
+    assert gateway.stats()["in_flight"] == 1
+    stream.close()
+    assert gateway.stats()["in_flight"] == 0
+
+def test_cancel_closes_response(release):
+    clients = []
+
+    def factory(model, **params):
+        clients.append(ResponseClient(model, **params))
+        return clients[-1]
+
+    gateway = LLMGateway(client_factory=factory, max_concurrency=1, ttft_deadline=0.1, total_deadline=5, max_retries=0)
+    with pytest.raises(LLMTimeoutError):
+        list(gateway.llm("primary").stream("hi"))
+    assert clients[0].responses[0].closed.is_set()
+    assert gateway.stats()["in_flight"] == 0
@@ -0,0 +1,18 @@
+import chatbot_logic
+from chatbot_logic import PRIMARY_LLM_MODEL, SYSTEM_PROMPT, format_prompt, merge_system_prompt
+
+def test_gemma_models_merge_system_prompt_by_default():
+    assert merge_system_prompt(PRIMARY_LLM_MODEL, "auto")
+    assert merge_system_prompt("google/gemma-2-9b-it", "auto")
+    assert not merge_system_prompt("meta/llama-3.1-8b-instruct", "auto")
+
+def test_env_override_wins():
+    assert not merge_system_prompt(PRIMARY_LLM_MODEL, "0")
+    assert merge_system_prompt("meta/llama-3.1-8b-instruct", "1")
+
+def test_primary_prompt_has_no_system_role():
+    messages, _ = format_prompt("context", [], "siapa richard?")
+    assert chatbot_logic.MERGE_SYSTEM_PROMPT
+    assert [message.type for message in messages] == ["human"]
+    # Prefix statis tetap paling depan biar prefix cache backend tetap kena
+    assert messages[0].content.startswith(SYSTEM_PROMPT)
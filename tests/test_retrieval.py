@@ -0,0 +1,53 @@
+import pytest
+from embedding_service import get_embeddings
+from hierarchy import build_vector_store, create_sub_chunks, sub_chunk_ids
+from retrieval import embed_query, lexical_search, retrieve
+from shared_corpus import SharedCorpus
+
+PARENTS = [
+    "Certifications\n- AWS Solutions Architect Associate 2022\n- Kubernetes CKAD 2023",
+    "Projects\n- Payment gateway migration to microservices\n- Realtime fraud scoring pipeline",
+    "Education\n- Bachelor of Computer Science, Universitas Indonesia",
+]
+
+@pytest.fixture(scope="module")
+def vector_store():
+    return build_vector_store(PARENTS, get_embeddings("hashing-test"))
+
+@pytest.fixture(scope="module")
+def profile_store(tmp_path_factory):
+    embeddings = get_embeddings("hashing-test")
+    corpus = SharedCorpus(str(tmp_path_factory.mktemp("corpus")), "hashing-test", embeddings)
+    texts, metadatas = create_sub_chunks(PARENTS)
+    vectors = embeddings.embed_documents(texts)
+    corpus.train(vectors)
+    corpus.add_profile("richard", "v1", PARENTS, texts, metadatas, sub_chunk_ids(texts), vectors)
+    corpus.save()
+    return corpus.profile_store("richard")
+
+@pytest.mark.parametrize("store", ["vector_store", "profile_store"])
+def test_relevance_for_docs_matches_vector_search(store, request):
+    store = request.getfixturevalue(store)
+    query_vector = embed_query(store, "fraud scoring pipeline")
+    relevance = store._select_relevance_score_fn()
+    hits = store.similarity_search_with_score_by_vector(query_vector, k=3)
+    expected = [relevance(score) for _, score in hits]
+    assert store.relevance_for_docs(query_vector, [doc for doc, _ in hits]) == pytest.approx(expected, abs=1e-5)
+
+@pytest.mark.parametrize("store", ["vector_store", "profile_store"])
+def test_threshold_applies_to_bm25_hits(store, request):
+    vector_store = request.getfixturevalue(store)
+    query = "kubernetes ckad 2023"
+    docs, decisive = lexical_search(vector_store, query, 3)
+    assert decisive and "Kubernetes" in docs[0].page_content
+
+    # Threshold di atas relevance semua hit -> gak ada yang lolos, termasuk hit BM25 dari jalur decisive
+    assert retrieve(vector_store, query, 3, score_threshold=1.01) == []
+    assert retrieve(vector_store, query, 3, score_threshold=None)
+
+def test_threshold_keeps_relevant_bm25_hits(vector_store):
+    query = "kubernetes ckad 2023"
+    query_vector = embed_query(vector_store, query)
+    docs, _ = lexical_search(vector_store, query, 3)
+    threshold = vector_store.relevance_for_docs(query_vector, docs[:1])[0]
+    assert any("Kubernetes" in doc.page_content for doc in retrieve(vector_store, query, 3, score_threshold=threshold))
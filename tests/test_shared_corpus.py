@@ -0,0 +1,48 @@
+import numpy as np
+from shared_corpus import SharedCorpus
+
+DIM = 16
+
+def add_profile(corpus, profile_id, vectors, doc_hash="v1"):
+    texts = [f"{profile_id} chunk {i}" for i in range(len(vectors))]
+    return corpus.add_profile(
+        profile_id, doc_hash, [f"{profile_id} section"], texts, [{"parent_id": 0}] * len(texts),
+        [f"{profile_id}-{i}" for i in range(len(texts))], vectors,
+    )
+
+def build_corpus(path, rng):
+    corpus = SharedCorpus(str(path), "test-model")
+    corpus.train(rng.standard_normal((800, DIM)))
+    add_profile(corpus, "bulk", rng.standard_normal((800, DIM)))
+    add_profile(corpus, "alice", rng.standard_normal((5, DIM)))
+    corpus.save()
+    return corpus
+
+def test_reader_reloads_after_writer_saves(tmp_path):
+    rng = np.random.default_rng(0)
+    writer = build_corpus(tmp_path, rng)
+    reader = SharedCorpus(str(tmp_path), "test-model")
+    assert not reader.has_profile("bob")
+
+    # Profil di-ingest ulang (range ID baru) + profil baru, ditulis proses lain
+    alice_vectors = rng.standard_normal((3, DIM))
+    alice_range = add_profile(writer, "alice", alice_vectors, doc_hash="v2")
+    add_profile(writer, "bob", rng.standard_normal((4, DIM)))
+    writer.save()
+
+    assert reader.has_profile("bob")
+    assert reader.is_current("alice", "v2")
+    store = reader.profile_store("alice")
+    assert (store.id_start, store.id_end) == alice_range
+    hits = reader.search(*alice_range, alice_vectors[0], k=3)
+    assert [chunk_id for chunk_id, _ in hits][0] == alice_range[0]
+    assert len(list(tmp_path.glob("corpus.*.faiss"))) == 1  # File generation lama dihapus
+
+def test_default_nprobe_falls_back_for_small_profiles(tmp_path):
+    rng = np.random.default_rng(1)
+    corpus = build_corpus(tmp_path, rng)
+    id_start, id_end = corpus.profile_store("alice").id_start, corpus.profile_store("alice").id_end
+
+    # Profil kecil tersebar di banyak list: nprobe otomatis tetap balikin semua chunk-nya
+    hits = corpus.search(id_start, id_end, rng.standard_normal(DIM), k=10)
+    assert sorted(chunk_id for chunk_id, _ in hits) == list(range(id_start, id_end))
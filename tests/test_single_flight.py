@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import pytest
+from single_flight import CoalescedLLM, FlightCancelled, SingleFlight
+
+class Upstream:
+    # Generator upstream yang nunggu sinyal sebelum tiap chunk, biar subscriber bisa gabung di tengah jalan
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.starts = 0
+        self.closed = threading.Event()
+        self.step = threading.Semaphore(0)
+
+    def start(self):
+        self.starts += 1
+        return self._generate()
+
+    def _generate(self):
+        try:
+            for chunk in self.chunks:
+                self.step.acquire(timeout=5)
+                yield chunk
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.closed.set()
+
+    def advance(self, n=1):
+        for _ in range(n):
+            self.step.release()
+
+def read_all(single_flight, flight, results, index):
+    try:
+        results[index] = list(single_flight.read(flight))
+    except Exception as e:
+        results[index] = e
+
+def test_followers_share_one_upstream_call():
+    single_flight = SingleFlight()
+    upstream = Upstream(["a", "b", "c"])
+    subscriptions = [single_flight.subscribe("key", upstream.start) for _ in range(3)]
+    assert [leader for _, leader in subscriptions] == [True, False, False]
+
+    results = [None] * 3
+    threads = [
+        threading.Thread(target=read_all, args=(single_flight, flight, results, i))
+        for i, (flight, _) in enumerate(subscriptions)
+    ]
+    for thread in threads:
+        thread.start()
+    upstream.advance(3)
+    for thread in threads:
+        thread.join(5)
+
+    assert upstream.starts == 1
+    assert results == [["a", "b", "c"]] * 3
+    # Flight yang udah selesai gak dipakai lagi: request berikutnya jadi leader baru
+    assert single_flight.subscribe("key", Upstream(["x"]).start)[1]
+
+def test_late_subscriber_gets_replayed_chunks():
+    single_flight = SingleFlight()
+    upstream = Upstream(["a", "b"])
+    flight, _ = single_flight.subscribe("key", upstream.start)
+    reader = single_flight.read(flight)
+    upstream.advance()
+    assert next(reader) == "a"
+
+    late, leader = single_flight.subscribe("key", upstream.start)
+    assert not leader
+    upstream.advance()
+    assert list(reader) == ["b"]
+    assert list(single_flight.read(late)) == ["a", "b"]
+
+def test_leader_failure_reaches_every_subscriber():
+    single_flight = SingleFlight()
+    upstream = Upstream(["a"], error=ConnectionError("upstream down"))
+    flights = [single_flight.subscribe("key", upstream.start)[0] for _ in range(2)]
+    upstream.advance()
+
+    for flight in flights:
+        with pytest.raises(ConnectionError, match="upstream down"):
+            list(single_flight.read(flight))
+    assert single_flight.subscribe("key", Upstream(["x"]).start)[1]
+
+def test_upstream_stops_when_all_subscribers_leave():
+    single_flight = SingleFlight()
+    upstream = Upstream(["a", "b", "c"])
+    flights = [single_flight.subscribe("key", upstream.start)[0] for _ in range(2)]
+    readers = [single_flight.read(flight) for flight in flights]
+    upstream.advance()
+    for reader in readers:
+        assert next(reader) == "a"
+        reader.close()
+
+    upstream.advance(2)
+    assert upstream.closed.wait(5)
+    assert isinstance(flights[0].error, FlightCancelled)
+    assert single_flight.subscribe("key", Upstream(["x"]).start)[1]
+
+def test_async_subscribers_share_one_upstream_call():
+    class FakeLLM:
+        def __init__(self, upstream):
+            self.upstream = upstream
+
+        def stream(self, prompt):
+            return self.upstream.start()
+
+    single_flight = SingleFlight()
+    upstream = Upstream(["a", "b"])
+
+    async def consume(llm):
+        return [chunk async for chunk in llm.astream("prompt")]
+
+    async def main():
+        llms = [CoalescedLLM(FakeLLM(upstream), "key", single_flight) for _ in range(2)]
+        tasks = [asyncio.ensure_future(consume(llm)) for llm in llms]
+        await asyncio.sleep(0.05)
+        upstream.advance(2)
+        return await asyncio.wait_for(asyncio.gather(*tasks), 5), [llm.leader for llm in llms]
+
+    results, leaders = asyncio.run(main())
+    assert results == [["a", "b"], ["a", "b"]]
+    assert leaders == [True, False]
+    assert upstream.starts == 1
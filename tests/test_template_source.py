@@ -0,0 +1,58 @@
+import time
+import requests
+import template_source
+from template_source import TemplateSource
+
+class _Response:
+    def __init__(self, status_code, content=b"", etag=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"ETag": etag} if etag else {}
+
+def _source(tmp_path, **kwargs):
+    return TemplateSource("https://example.invalid/template.docx", str(tmp_path / "missing.docx"), **kwargs)
+
+def test_failed_fetch_retries_soon_and_keeps_last_good_template(tmp_path, monkeypatch):
+    responses = [_Response(200, b"v1", etag="a"), requests.ConnectionError("down"), _Response(304)]
+    def fake_get(url, headers=None, timeout=None):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+    monkeypatch.setattr(template_source.requests, "get", fake_get)
+
+    source = _source(tmp_path, refresh_seconds=0, retry_seconds=60)
+    source._refresh()
+    assert source.content == b"v1" and source.last_error is None
+    fetched_at = source.fetched_at
+
+    source._refresh()
+    assert source.content == b"v1"  # Template terakhir yang bagus tetap dilayani
+    assert source.last_error == "down"
+    assert source.fetched_at == fetched_at  # Gagal bukan "fetch terbaru"
+    assert source.failures == 1 and source.retry_at > time.time() + 30
+
+    source._refresh()
+    assert source.last_error is None and source.failures == 0 and source.fetched_at > fetched_at
+
+def test_get_waits_for_retry_backoff_not_refresh_interval(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(template_source.requests, "get", lambda *args, **kwargs: calls.append(1) or _Response(503))
+    source = _source(tmp_path, retry_seconds=60)
+
+    source.get()
+    deadline = time.time() + 2
+    while source.failures == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert source.failures == 1 and source.last_error == "HTTP 503"
+
+    source.get()  # Masih dalam backoff: gak fetch lagi
+    time.sleep(0.05)
+    assert len(calls) == 1
+
+    source.retry_at = time.time() - 1  # Backoff lewat -> dicoba lagi, gak nunggu 6 jam
+    source.get()
+    deadline = time.time() + 2
+    while source.failures == 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2 and source.failures == 2
@@ -0,0 +1,32 @@
+import os
+import threading
+from tracing import estimate_tokens
+
+# Default pakai tokenizer model embedding (SentencePiece multilingual, publik & udah ke-download).
+# Bisa diganti ke tokenizer LLM-nya lewat env kalau punya akses.
+TOKENIZER_NAME = os.getenv("RICHBOT_TOKENIZER", "sentence-transformers/paraphrase-multilingual-mpnet-base-v2")
+
+_tokenizer = None
+_tokenizer_failed = False
+_tokenizer_lock = threading.Lock()
+
+def get_tokenizer():
+    global _tokenizer, _tokenizer_failed
+    if _tokenizer is None and not _tokenizer_failed:
+        with _tokenizer_lock:
+            if _tokenizer is None and not _tokenizer_failed:
+                try:
+                    from transformers import AutoTokenizer
+                    _tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+                except Exception:
+                    # Offline / transformers gak ada -> fallback ke estimasi kasar
+                    _tokenizer_failed = True
+    return _tokenizer
+
+def count_tokens(text):
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode(text, add_special_tokens=False))
@@ -0,0 +1,230 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_FILE = os.getenv("RICHBOT_TRACE_FILE")  # Kosong = gak export JSONL
+METRICS_PORT = os.getenv("RICHBOT_METRICS_PORT")  # Kosong = gak buka endpoint /metrics
+HISTOGRAM_WINDOW = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+_histograms = {}
+_histograms_lock = threading.Lock()
+_counters = {}
+_counters_lock = threading.Lock()
+_gauges = {}
+_export_lock = threading.Lock()
+_metrics_server = None
+
+def estimate_tokens(text):
+    # Perkiraan kasar (kata + tanda baca), cukup buat monitoring ukuran prompt
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+# --- 1. SPAN TREE ---
+class Span:
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.children = []
+        self.start = time.perf_counter()
+        self.end = None
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+@contextmanager
+def start_trace(name, **attrs):
+    # Satu trace = satu turn percakapan (root span + semua stage di bawahnya)
+    root = Span(name, **attrs)
+    stack = _stack()
+    stack.append(root)
+    try:
+        yield root
+    finally:
+        root.finish()
+        stack.remove(root)
+        for item in root.walk():
+            observe(item.name, item.duration_ms)
+        export_trace(root)
+
+@contextmanager
+def span(name, **attrs):
+    stack = _stack()
+    current = Span(name, **attrs)
+    if stack:
+        stack[-1].children.append(current)
+    stack.append(current)
+    try:
+        yield current
+    finally:
+        current.finish()
+        stack.remove(current)
+        # Span di luar trace (mis. ingest dokumen) tetap masuk histogram
+        if not stack:
+            for item in current.walk():
+                observe(item.name, item.duration_ms)
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+# --- 2. LLM STREAM: TTFT + total generation ---
+def traced_stream(llm, prompt):
+    with span("llm.generate") as generate_span:
+        first_token_at = None
+        output_tokens = 0
+        for chunk in llm.stream(prompt):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                ttft_ms = (first_token_at - generate_span.start) * 1000
+                generate_span.set(ttft_ms=round(ttft_ms, 3))
+                observe("llm.ttft", ttft_ms)
+            output_tokens += 1
+            yield chunk
+        generate_span.set(output_chunks=output_tokens)
+
+# --- 3. ROLLING HISTOGRAMS ---
+class RollingHistogram:
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.values.append(value)
+            self.count += 1
+            self.total += value
+
+    def snapshot(self):
+        with self.lock:
+            values = sorted(self.values)
+            count, total = self.count, self.total
+        if not values:
+            return {"count": count, "sum": total}
+        result = {"count": count, "sum": total}
+        for q in QUANTILES:
+            index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+            result[f"p{int(q * 100)}"] = values[index]
+        return result
+
+def observe(name, value_ms):
+    with _histograms_lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = RollingHistogram()
+    histogram.observe(value_ms)
+
+def latency_snapshot():
+    with _histograms_lock:
+        items = list(_histograms.items())
+    return {name: histogram.snapshot() for name, histogram in sorted(items)}
+
+# --- 3.1. COUNTERS: Event yang cukup dihitung (cache hit/miss, dll.) ---
+def increment(name, value=1):
+    with _counters_lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def counter_snapshot():
+    with _counters_lock:
+        return dict(sorted(_counters.items()))
+
+def set_gauge(name, value):
+    with _counters_lock:
+        _gauges[name] = value
+
+def gauge_snapshot():
+    with _counters_lock:
+        return dict(sorted(_gauges.items()))
+
+# --- 4. EXPORT: JSONL + Prometheus text ---
+def export_trace(root, path=None):
+    path = path or TRACE_FILE
+    if not path:
+        return
+    record = {"ts": time.time(), **root.to_dict()}
+    with _export_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def render_prometheus():
+    lines = [
+        "# HELP richbot_stage_latency_ms Per-stage latency of the RAG pipeline (rolling window).",
+        "# TYPE richbot_stage_latency_ms summary",
+    ]
+    for name, stats in latency_snapshot().items():
+        for q in QUANTILES:
+            key = f"p{int(q * 100)}"
+            if key in stats:
+                lines.append(f'richbot_stage_latency_ms{{stage="{name}",quantile="{q}"}} {stats[key]:.3f}')
+        lines.append(f'richbot_stage_latency_ms_sum{{stage="{name}"}} {stats["sum"]:.3f}')
+        lines.append(f'richbot_stage_latency_ms_count{{stage="{name}"}} {stats["count"]}')
+
+    lines.append("# HELP richbot_events_total Event counters (cache hits/misses, etc.).")
+    lines.append("# TYPE richbot_events_total counter")
+    for name, value in counter_snapshot().items():
+        lines.append(f'richbot_events_total{{event="{name}"}} {value}')
+
+    lines.append("# HELP richbot_resource Current resource usage (resident indexes, bytes, etc.).")
+    lines.append("# TYPE richbot_resource gauge")
+    for name, value in gauge_snapshot().items():
+        lines.append(f'richbot_resource{{resource="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=None):
+    global _metrics_server
+    port = port or METRICS_PORT
+    if not port or _metrics_server is not None:
+        return _metrics_server
+
+    _metrics_server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+    threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _metrics_server